@@ -0,0 +1,189 @@
+"""
+Applies a saved cleaning plan to many files without the Streamlit app.
+
+    python batch.py cleaning_plan.json "incoming/*.csv" --output-dir cleaned --workers 8 --memory-limit 4096
+
+Each file is cleaned in its own worker process and written to the output directory with the same
+name (in the format given by --format, default: the input's format). A summary with the row counts
+and timings of every file is printed and written to the output directory.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import parallel
+from cleaning import IN_PLACE_OPERATIONS, OPERATIONS
+from export import WRITERS
+from file_formats import SUFFIXES, file_format, read_file
+from plan import execute_plan, plan_from_json
+
+SUMMARY_FILE = "summary.csv"
+SUMMARY_COLUMNS = ["file", "output", "rows_in", "rows_out", "read_s", "clean_s", "write_s", "error"]
+
+
+def find_inputs(pattern):
+    """
+    Returns the supported files in a directory, or the files matching a glob pattern, sorted.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    paths = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return [path for path in paths if any(path.lower().endswith(suffix) for suffix, _ in SUFFIXES)]
+
+
+def output_path(path, output_dir, output_format=None):
+    """
+    Path of the cleaned file: same name in output_dir, with the suffix of output_format if given.
+    """
+    name = os.path.basename(path)
+    if output_format is not None:
+        fmt = file_format(name)
+        name = name[:len(name) - len(fmt) - 1] + "." + output_format
+    return os.path.join(output_dir, name)
+
+
+def _limit_worker(memory_limit):
+    """
+    Runs in each worker process: caps its address space so a huge file fails with MemoryError
+    instead of taking the machine down, and keeps column work and pyarrow to one thread since the
+    pool already uses every core.
+    """
+    parallel.WORKERS = 1
+    if memory_limit:
+        try:
+            import resource
+
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        except (ImportError, ValueError, OSError):
+            # Not available on this platform
+            pass
+    try:
+        import pyarrow
+
+        pyarrow.set_cpu_count(1)
+        pyarrow.set_io_thread_count(1)
+    except ImportError:
+        pass
+
+
+def _failed(result, error):
+    result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def clean_file(path, steps, output_dir, output_format=None):
+    """
+    Reads, cleans and writes one file. Errors of any kind (including those of the readers, such as
+    zipfile.BadZipFile for a corrupt XLSX file) are reported in the result instead of raised, so
+    one bad file does not stop the batch.
+    Returns:
+        - result: dictionary with the file, row counts, timings in seconds and the error if any
+    """
+    result = dict.fromkeys(SUMMARY_COLUMNS)
+    result["file"] = path
+    try:
+        start = time.perf_counter()
+        fmt = file_format(path)
+        df = read_file(path, fmt)
+        result["rows_in"] = len(df)
+        read_done = time.perf_counter()
+        result["read_s"] = read_done - start
+
+        df, _ = execute_plan(df, steps, OPERATIONS, dataset_key=path, in_place_operations=IN_PLACE_OPERATIONS)
+        result["rows_out"] = len(df)
+        clean_done = time.perf_counter()
+        result["clean_s"] = clean_done - read_done
+
+        out_format = output_format or fmt
+        if out_format not in WRITERS:
+            # e.g. Arrow inputs are written as Feather, which is the same file format
+            out_format = "feather"
+        out = output_path(path, output_dir, None if out_format == fmt else out_format)
+        with open(out, "wb") as f:
+            WRITERS[out_format](df, f)
+        result["output"] = out
+        result["write_s"] = time.perf_counter() - clean_done
+    except Exception as e:
+        return _failed(result, e)
+    return result
+
+
+def run_batch(plan_path, pattern, output_dir, output_format=None, workers=None, memory_limit=None, progress=None):
+    """
+    Cleans every input file with a saved plan, in parallel. A file whose worker fails or dies
+    (e.g. killed for using too much memory, which breaks the pool for the files still running) is
+    recorded with its error, so the summary always covers every file. The output directory must
+    not be a directory of input files, since the cleaned files would overwrite them.
+    Parameters:
+        - plan_path: JSON plan written by the app ("Download plan")
+        - pattern: directory or glob pattern of the input files
+        - output_dir: directory for the cleaned files and the summary
+        - output_format: key of export.WRITERS (default: the format of each input)
+        - workers: number of worker processes (default: number of CPUs)
+        - memory_limit: maximum bytes of address space per worker (default: no limit)
+        - progress: optional function called with each file's result as it finishes
+    Returns:
+        - summary: pandas DataFrame with one row per file, in input order
+    """
+    with open(plan_path, encoding="utf-8") as f:
+        steps = plan_from_json(f.read())
+    paths = find_inputs(pattern)
+    target = os.path.realpath(output_dir)
+    if any(os.path.dirname(os.path.realpath(path)) == target for path in paths):
+        raise ValueError(f"The output directory {output_dir} contains input files; choose another one.")
+    os.makedirs(output_dir, exist_ok=True)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker, initargs=(memory_limit,)) as pool:
+        futures = {pool.submit(clean_file, path, steps, output_dir, output_format): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # BrokenProcessPool, or the result could not be sent back
+                result = _failed(dict.fromkeys(SUMMARY_COLUMNS, None) | {"file": path}, e)
+            results[path] = result
+            if progress is not None:
+                progress(result)
+
+    summary = pd.DataFrame([results[path] for path in paths], columns=SUMMARY_COLUMNS)
+    summary = summary.astype({"rows_in": "Int64", "rows_out": "Int64"})
+    summary.to_csv(os.path.join(output_dir, SUMMARY_FILE), index=False)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a saved cleaning plan to many files.")
+    parser.add_argument("plan", help="cleaning plan JSON downloaded from the app")
+    parser.add_argument("inputs", help="directory or glob pattern of the files to clean")
+    parser.add_argument("--output-dir", default="cleaned", help="directory for the cleaned files and summary.csv")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="output format (default: same as each input)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--memory-limit", type=int, default=None, help="memory limit per worker, in MB")
+    args = parser.parse_args()
+
+    def progress(result):
+        status = result["error"] or f"{result['rows_in']} -> {result['rows_out']} rows"
+        print(f"{result['file']}: {status}", flush=True)
+
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit else None
+    start = time.perf_counter()
+    try:
+        summary = run_batch(args.plan, args.inputs, args.output_dir, args.format, args.workers, memory_limit, progress)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    failed = summary["error"].notna().sum()
+    print(f"Cleaned {len(summary) - failed} of {len(summary)} files in {time.perf_counter() - start:.1f}s "
+          f"({os.path.join(args.output_dir, SUMMARY_FILE)})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
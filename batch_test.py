@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from batch import SUMMARY_FILE, clean_file, run_batch
+from plan import plan_to_json
+
+STEPS = [{"op": "remove_duplicates", "subset": None, "keep": "first"}]
+
+
+def _exit_worker(*args):
+    os._exit(1)
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inputs = os.path.join(self.tmp.name, "incoming")
+        self.output_dir = os.path.join(self.tmp.name, "cleaned")
+        os.makedirs(self.inputs)
+        self.plan = os.path.join(self.tmp.name, "plan.json")
+        with open(self.plan, "w", encoding="utf-8") as f:
+            f.write(plan_to_json(STEPS))
+        pd.DataFrame({"a": [1, 1, 2]}).to_csv(os.path.join(self.inputs, "good.csv"), index=False)
+        with open(os.path.join(self.inputs, "corrupt.xlsx"), "wb") as f:
+            f.write(b"not a zip file")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bad_file_does_not_stop_the_batch(self):
+        summary = run_batch(self.plan, self.inputs, self.output_dir, workers=1).set_index("file")
+        good, corrupt = os.path.join(self.inputs, "good.csv"), os.path.join(self.inputs, "corrupt.xlsx")
+        self.assertEqual((summary.loc[good, "rows_in"], summary.loc[good, "rows_out"]), (3, 2))
+        self.assertTrue(pd.isna(summary.loc[good, "error"]))
+        self.assertIn("BadZipFile", summary.loc[corrupt, "error"])
+        self.assertEqual(len(pd.read_csv(os.path.join(self.output_dir, "good.csv"))), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, SUMMARY_FILE)))
+
+    def test_clean_file_reports_errors(self):
+        result = clean_file(os.path.join(self.inputs, "corrupt.xlsx"), STEPS, self.output_dir)
+        self.assertIn("BadZipFile", result["error"])
+
+    def test_dead_workers_are_recorded(self):
+        # Forked workers see the patched clean_file and exit as if killed for their memory use
+        with mock.patch("batch.clean_file", _exit_worker):
+            summary = run_batch(self.plan, self.inputs, self.output_dir, workers=1)
+        self.assertTrue(summary["error"].str.contains("BrokenProcessPool").all())
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, SUMMARY_FILE)))
+
+    def test_output_dir_must_not_hold_the_inputs(self):
+        with self.assertRaises(ValueError):
+            run_batch(self.plan, self.inputs, os.path.join(self.inputs, "..", "incoming"))
+        self.assertFalse(os.path.exists(os.path.join(self.inputs, SUMMARY_FILE)))
+
+
+if __name__ == "__main__":
+    unittest.main()
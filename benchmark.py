@@ -0,0 +1,310 @@
+"""
+Times the cleaning functions and the CSV/XLSX read and write paths on generated dirty data, and
+compares the timings with a stored baseline.
+
+    python benchmark.py --rows 10000 100000 --save-baseline
+    python benchmark.py --rows 10000 100000 --check
+
+The data comes from a seeded generator (generate_dirty_data), so every run measures the same
+frames. --check fails when a case is slower than its baseline by more than --tolerance, ignoring
+differences under MIN_DIFFERENCE_S, or uses more memory (RSS growth, and the traced peak with
+--trace-memory) by more than --memory-tolerance, ignoring differences under MIN_DIFFERENCE_MB.
+Baselines depend on the machine: save one before a change and check after it, on the same machine.
+"""
+import argparse
+import json
+import os
+import platform
+import string
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from cleaning import (apply_data_type_recommendations, automated_data_cleaning, optimize_memory, recommend_data_types,
+                      remove_duplicates, remove_near_duplicates, remove_outdated, replace_text_in_column)
+from export import write_csv, write_xlsx
+from file_formats import read_file
+from instrument import Recorder, frame_rows, measure, set_memory_tracing
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# Relative slowdown allowed before --check fails
+TOLERANCE = 0.25
+
+# Differences smaller than this are timer noise
+MIN_DIFFERENCE_S = 0.05
+
+# Relative memory growth allowed before --check fails
+MEMORY_TOLERANCE = 0.25
+
+# Memory differences smaller than this are allocator and sampling noise
+MIN_DIFFERENCE_MB = 16
+
+# Measurements compared by --check, with their unit
+CHECKED = {"wall_s": "s", "rss_growth_mb": "MB", "traced_peak_mb": "MB"}
+
+# Extra columns added by --width
+EXTRA_COLUMNS = 0
+
+# Distinct values of the generated text columns, set by --cardinality
+CARDINALITY = 1000
+
+# Cases that are too slow for the largest sizes run on at most this many rows
+MAX_ROWS = {"remove_near_duplicates": 200000, "write_xlsx": 100000, "read_xlsx": 100000}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%m-%d-%Y %H:%M", "%d %b %Y"]
+
+
+def _words(rng, n, cardinality, length=6):
+    """
+    n values drawn from a vocabulary of `cardinality` random words.
+    """
+    letters = np.array(list(string.ascii_lowercase))
+    vocabulary = np.array(["".join(word) for word in letters[rng.integers(0, 26, (cardinality, length))]], dtype=object)
+    return vocabulary[rng.integers(0, cardinality, n)]
+
+
+def _with_missing(rng, values, fraction):
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < fraction)
+
+
+def _typo(rng, texts):
+    """
+    Changes one character of each text, for near-duplicates.
+    """
+    out = []
+    for text in texts:
+        if isinstance(text, str) and text:
+            i = rng.integers(0, len(text))
+            text = text[:i] + "x" + text[i + 1:]
+        out.append(text)
+    return out
+
+
+def generate_dirty_data(rows, seed=0, extra_columns=EXTRA_COLUMNS, cardinality=CARDINALITY, duplicates=0.05,
+                        near_duplicates=0.02, missing=0.05):
+    """
+    Generates a dirty dataset like the uploads the app cleans:
+        - id: unique integers
+        - amount: numbers stored as text, some with spaces, some missing
+        - price: floats with missing values
+        - quantity: whole numbers that fit int16
+        - category: low-cardinality text
+        - name: text drawn from `cardinality` words, with near-duplicate typos
+        - created: dates in one format, for date filters
+        - updated: dates in several formats, which stay text
+        - active: "True"/"False" text
+        - extra_0 ...: alternating numeric and text columns, for wide frames
+    Exact duplicates and near-duplicates (one typo in name) are copies of earlier rows.
+    Parameters:
+        - rows: number of rows
+        - seed: random seed; the same seed gives the same frame
+        - extra_columns: number of extra columns
+        - cardinality: distinct values of name and the extra text columns
+        - duplicates, near_duplicates, missing: fractions of the rows
+    Returns:
+        - df: pandas DataFrame with `rows` rows
+    """
+    rng = np.random.default_rng(seed)
+    n_dup = int(rows * duplicates)
+    n_near = int(rows * near_duplicates)
+    n = rows - n_dup - n_near
+
+    amounts = rng.integers(0, 100000, n).astype(str).astype(object)
+    padded = rng.random(n) < 0.1
+    amounts[padded] = np.char.add(" ", amounts[padded].astype(str))
+    created = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365 * 24 * 60, n), unit="min")
+    formats = rng.integers(0, len(DATE_FORMATS), n)
+    updated = np.empty(n, dtype=object)
+    for i, fmt in enumerate(DATE_FORMATS):
+        chosen = formats == i
+        updated[chosen] = created[chosen].strftime(fmt)
+
+    df = pd.DataFrame({
+        "id": np.arange(n),
+        "amount": _with_missing(rng, amounts, missing),
+        "price": _with_missing(rng, rng.random(n) * 1000, missing),
+        "quantity": rng.integers(-1000, 30000, n),
+        "category": _with_missing(rng, _words(rng, n, 12, 4), missing),
+        "name": _with_missing(rng, _words(rng, n, cardinality), missing),
+        "created": created.strftime("%Y-%m-%d %H:%M:%S"),
+        "updated": updated,
+        "active": rng.choice(["True", "False"], n),
+    })
+    for i in range(extra_columns):
+        if i % 2:
+            df[f"extra_{i}"] = _with_missing(rng, _words(rng, n, cardinality), missing)
+        else:
+            df[f"extra_{i}"] = _with_missing(rng, rng.normal(size=n), missing)
+
+    copies = df.iloc[rng.integers(0, n, n_dup)]
+    near = df.iloc[rng.integers(0, n, n_near)].copy()
+    near["name"] = _typo(rng, near["name"])
+    df = pd.concat([df, copies, near], ignore_index=True)
+    # Copies end up among the other rows
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+def _cases(df, tmp_dir):
+    """
+    Returns the benchmark cases as name -> (prepare, run): prepare builds the input outside the
+    measurement (e.g. the copy an in-place function modifies), run is measured.
+    """
+    recommendations = recommend_data_types(df)
+    typed = apply_data_type_recommendations(df.copy(), recommendations)
+    csv_path = os.path.join(tmp_dir, "data.csv")
+    xlsx_path = os.path.join(tmp_dir, "data.xlsx")
+    time_filter = [pd.Timestamp("2021-01-01"), pd.Timestamp("2022-06-30")]
+    small = df.iloc[:MAX_ROWS["write_xlsx"]]
+
+    def write_to(path, writer, frame):
+        with open(path, "wb") as f:
+            writer(frame, f)
+
+    def written(path, writer, frame):
+        # Read cases also run alone, without their write case
+        if not os.path.exists(path):
+            write_to(path, writer, frame)
+        return path
+
+    return {
+        "remove_duplicates": (lambda: df, lambda data: remove_duplicates(data)),
+        "remove_near_duplicates": (lambda: df.iloc[:MAX_ROWS["remove_near_duplicates"]],
+                                   lambda data: remove_near_duplicates(data, ["name"], 0.5)),
+        "recommend_data_types": (lambda: df, lambda data: recommend_data_types(data)),
+        "apply_data_type_recommendations": (lambda: df.copy(), lambda data: apply_data_type_recommendations(data, recommendations)),
+        "optimize_memory": (lambda: typed.copy(), lambda data: optimize_memory(data, recommendations)),
+        "remove_outdated": (lambda: df, lambda data: remove_outdated(data, "created", time_filter)),
+        "replace_text_in_column": (lambda: df.copy(), lambda data: replace_text_in_column(data, "name", "a", "b")),
+        "automated_data_cleaning": (lambda: typed.copy(), lambda data: automated_data_cleaning(data)),
+        "write_csv": (lambda: df, lambda data: write_to(csv_path, write_csv, data)),
+        "read_csv": (lambda: written(csv_path, write_csv, df), lambda path: read_file(path, "csv")),
+        "write_xlsx": (lambda: small, lambda data: write_to(xlsx_path, write_xlsx, data)),
+        "read_xlsx": (lambda: written(xlsx_path, write_xlsx, small), lambda path: read_file(path, "xlsx")),
+    }
+
+
+def run_benchmarks(rows, seed=0, extra_columns=EXTRA_COLUMNS, repeat=3, cases=None, trace_memory=False,
+                   cardinality=CARDINALITY):
+    """
+    Runs every case on a generated frame of each size.
+    Parameters:
+        - rows: list of row counts
+        - seed, extra_columns, cardinality: passed to generate_dirty_data
+        - repeat: runs per case; the fastest is kept, the slower ones being noise
+        - cases: names of the cases to run (default: all)
+        - trace_memory: also record the peak of traced allocations (tracemalloc; much slower)
+    Returns:
+        - results: dictionary of "case@rows" -> measurement of the fastest run ("case@rows/cardinality"
+          when cardinality is not CARDINALITY, so baselines of different data are not compared)
+    """
+    suffix = "" if cardinality == CARDINALITY else f"/{cardinality}"
+    results = {}
+    set_memory_tracing(trace_memory)
+    try:
+        for n in rows:
+            df = generate_dirty_data(n, seed, extra_columns, cardinality)
+            with tempfile.TemporaryDirectory(prefix="benchmark-") as tmp_dir:
+                for name, (prepare, run) in _cases(df, tmp_dir).items():
+                    if cases and name not in cases:
+                        continue
+                    recorder = Recorder(log_path=None)
+                    for _ in range(repeat):
+                        data = prepare()
+                        with measure(name, frame_rows(data), into=recorder):
+                            run(data)
+                    best = min(recorder.records(), key=lambda record: record["wall_s"])
+                    results[f"{name}@{n}{suffix}"] = {key: best.get(key) for key in
+                                              ("wall_s", "cpu_s", "rss_growth_mb", "traced_peak_mb", "rows_in")}
+                    print(f"{name:<32} {n:>9} rows  {best['wall_s']:8.3f}s", flush=True)
+    finally:
+        set_memory_tracing(False)
+    return results
+
+
+def _regressed(before, now, tolerance, min_difference):
+    return before is not None and now is not None and now > before * (1 + tolerance) and now - before > min_difference
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_difference=MIN_DIFFERENCE_S,
+            memory_tolerance=MEMORY_TOLERANCE, min_memory_difference=MIN_DIFFERENCE_MB):
+    """
+    Returns the cases that regressed against their baseline as a list of (case, measurement,
+    baseline value, value now): wall_s when they are slower, rss_growth_mb or traced_peak_mb
+    when they use more memory. Memory measurements missing on either side are not compared.
+    """
+    regressions = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        for key in CHECKED:
+            if key == "wall_s":
+                limits = tolerance, min_difference
+            else:
+                limits = memory_tolerance, min_memory_difference
+            if _regressed(before.get(key), result.get(key), *limits):
+                regressions.append((case, key, before[key], result[key]))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path, results):
+    """
+    Writes the results, merged into the existing baseline so sizes run separately are kept.
+    """
+    baseline = load_baseline(path) if os.path.exists(path) else {}
+    baseline.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                   "pandas": pd.__version__, "results": baseline}, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning functions on generated dirty data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="row counts to generate (up to 10M)")
+    parser.add_argument("--width", type=int, default=EXTRA_COLUMNS, help="extra columns in the generated data")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generator")
+    parser.add_argument("--cardinality", type=int, default=CARDINALITY, help="distinct values of the generated text columns")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the fastest is kept")
+    parser.add_argument("--cases", nargs="*", help="cases to run (default: all)")
+    parser.add_argument("--trace-memory", action="store_true", help="record the peak of traced allocations (slower)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--check", action="store_true", help="fail if a case is slower than its baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="relative slowdown allowed by --check")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help="relative memory growth allowed by --check")
+    args = parser.parse_args()
+
+    if args.check and not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline file {args.baseline} to check against. Run with --save-baseline first "
+              f"(before the change), or pass --baseline.", file=sys.stderr)
+        return 2
+
+    results = run_benchmarks(args.rows, args.seed, args.width, args.repeat, args.cases, args.trace_memory, args.cardinality)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved {len(results)} results to {args.baseline}")
+    if args.check:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance,
+                              memory_tolerance=args.memory_tolerance)
+        for case, key, before, now in regressions:
+            unit = CHECKED[key]
+            print(f"{'SLOWER' if key == 'wall_s' else 'MORE MEMORY'} {case} ({key}): "
+                  f"{before:.3f}{unit} -> {now:.3f}{unit}")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bytes of cached frames and artifacts kept per server process
+MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Values sampled per object column to estimate its size
+SIZE_SAMPLE = 1000
+
+
+def content_hash(data):
+    """
+    Returns a short hex digest of bytes, used to identify an upload across reruns.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def version_key(dataset_key, history):
+    """
+    Identifies a version of a dataset: its content hash plus the operations applied to it.
+    Parameters:
+        - dataset_key: content hash of the upload
+        - history: list of JSON-serializable operation descriptions
+    Returns:
+        - key: string, equal to dataset_key for the unmodified upload
+    """
+    if not history:
+        return dataset_key
+    return content_hash((dataset_key + json.dumps(history, sort_keys=True, default=str)).encode())
+
+
+def sizeof(value):
+    """
+    Estimates the memory held by a cached value. Object columns are estimated from a sample
+    instead of DataFrame.memory_usage(deep=True), which would visit every string.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum()) + sum(
+            _object_overhead(value[col]) for col in value.columns if value[col].dtype == object)
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True)) + (_object_overhead(value) if value.dtype == object else 0)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value[:SIZE_SAMPLE]) * max(1, len(value) // SIZE_SAMPLE)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _object_overhead(series):
+    sample = series.iloc[:SIZE_SAMPLE]
+    if len(sample) == 0:
+        return 0
+    return int(sum(sys.getsizeof(item) for item in sample) / len(sample) * len(series))
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by the estimated size of its values.
+    Cached values are shared: callers must not modify them in place.
+    The cache is shared by the sessions of the server, which run in separate threads.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = sizeof(value) if nbytes is None else nbytes
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value
+            self.entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                return self.get(key)
+        # Computed outside the lock so other sessions are not blocked meanwhile
+        return self.put(key, compute())
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.nbytes -= entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+# Shared by all reruns and sessions of the server process
+artifacts = LRUCache()
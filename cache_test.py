@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache, content_hash, sizeof, version_key
+
+
+class CacheTest(unittest.TestCase):
+    def test_version_key(self):
+        key = content_hash(b"a,b\n1,2\n")
+        self.assertEqual(version_key(key, []), key)
+        step = [{"op": "drop", "col": "a"}]
+        self.assertEqual(version_key(key, step), version_key(key, [{"col": "a", "op": "drop"}]))
+        self.assertNotEqual(version_key(key, step), key)
+        self.assertNotEqual(version_key(key, step), version_key(content_hash(b"other"), step))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(max_bytes=30)
+        cache.put("a", "x", nbytes=10)
+        cache.put("b", "y", nbytes=10)
+        cache.put("c", "z", nbytes=10)
+        cache.get("a")
+        cache.put("d", "w", nbytes=10)
+        self.assertEqual(list(cache.entries), ["c", "a", "d"])
+        self.assertEqual(cache.nbytes, 30)
+
+    def test_values_larger_than_the_cache_are_not_kept(self):
+        cache = LRUCache(max_bytes=10)
+        self.assertEqual(cache.put("a", "x", nbytes=11), "x")
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.nbytes, 0)
+
+    def test_get_or_compute_and_discard(self):
+        cache = LRUCache()
+        calls = []
+        compute = lambda: calls.append(1) or np.zeros(4)
+        first = cache.get_or_compute("k", compute)
+        self.assertIs(cache.get_or_compute("k", compute), first)
+        self.assertEqual(len(calls), 1)
+        cache.discard("k")
+        cache.discard("k")
+        self.assertEqual(cache.nbytes, 0)
+        self.assertIsNone(cache.get("k"))
+
+    def test_sizeof(self):
+        self.assertEqual(sizeof(np.zeros(10)), 80)
+        frame = pd.DataFrame({"t": ["abc"] * 1000, "n": np.zeros(1000)})
+        estimate = sizeof(frame)
+        exact = frame.memory_usage(deep=True, index=True).sum()
+        self.assertAlmostEqual(estimate / exact, 1, delta=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+import pandas as pd
+from type_inference import SAMPLE_SIZE, infer_column_type
+from datetimes import get_date_index, get_parsed_dates
+from dedup import drop_duplicates_hashed
+from fuzzy_dedup import remove_near_duplicates
+from text_replace import replace_text
+from imputation import fill_missing, imputation_plan
+from downcast import memory_report, memory_types
+from functools import partial
+from parallel import map_columns, map_columns_processes
+from column_profile import cached_profiles
+from instrument import instrumented
+
+def remove_duplicates(df, subset=None, keep="first", progress=None):
+    """
+    Removes duplicate rows from a pandas DataFrame. Rows are compared by 128-bit hash keys
+    (dedup.drop_duplicates_hashed), which spill to disk if they outgrow the memory budget.
+    Parameters:
+        - df: pandas DataFrame
+        - subset: columns that identify a duplicate (default: all columns)
+        - keep: "first", "last" or False (drop every copy)
+        - progress: optional function called with (done, total) as the rows are hashed (jobs.Job.update)
+    Returns:
+        - df: pandas DataFrame without duplicate rows
+    """
+    return drop_duplicates_hashed(df, subset, keep, progress=progress)
+
+def recommend_data_types(df, sample_size=SAMPLE_SIZE, dataset_key=None, workers=None, processes=False, profiles=None):
+    """
+    Recommends data types for each column in a pandas DataFrame.
+    Each column is screened on a bounded random sample and only confirmed on the full data when the
+    sample leaves it ambiguous (see type_inference.infer_column_type). Columns are inferred in
+    parallel (parallel.py).
+    Parameters:
+        - df: pandas DataFrame
+        - sample_size: maximum number of rows screened per column
+        - dataset_key: identifies the dataset version; date columns parsed here are cached under it
+        - workers: number of threads or processes (default: parallel.WORKERS)
+        - processes: infer text columns in worker processes, for dates that only parse value by value
+          in Python; dates parsed there are not cached and the profiles are not used
+        - profiles: dictionary of column -> ColumnProfile (column_profile.py); null counts, min/max,
+          samples and distinct values are read from them instead of scanning the columns
+    Returns:
+        - recommendations: dictionary with column names as keys and recommended data types as values
+    """
+    infer = partial(infer_column_type, sample_size=sample_size, dataset_key=dataset_key)
+    if profiles is not None and not processes:
+        return map_columns(lambda series: infer(series, profile=profiles.get(series.name)), df, workers=workers)
+    if not processes:
+        return map_columns(infer, df, workers=workers)
+
+    text_columns = [col for col in df.columns if df[col].dtype == object]
+    recommendations = map_columns(infer, df, [col for col in df.columns if col not in text_columns], workers)
+    recommendations.update(map_columns_processes(partial(infer_column_type, sample_size=sample_size), df, text_columns, workers))
+    return {col: recommendations[col] for col in df.columns}
+def _to_boolean(series):
+    """
+    Converts True/False values or strings with missing values to the nullable boolean type.
+    Raises ValueError on any other value instead of turning it into False.
+    """
+    valid = series.isna() | series.isin([True, False, "True", "False"])
+    if not valid.all():
+        raise ValueError(f"Column {series.name} has a value that is not True or False: {series[~valid].iloc[0]!r}")
+    return series.isin([True, "True"]).astype("boolean").mask(series.isna())
+
+def _to_numbers(series):
+    """
+    Parses numbers the way type_inference confirms them (pd.to_numeric with errors="coerce"), so a
+    recommended type can always be applied: integers too large for int64 become floats instead of
+    raising. Raises ValueError on a value that is not a number instead of turning it into NaN.
+    """
+    numbers = pd.to_numeric(series, errors="coerce")
+    invalid = numbers.isna() & series.notna()
+    if invalid.any():
+        raise ValueError(f"Column {series.name} has a value that is not a number: {series[invalid].iloc[0]!r}")
+    return numbers
+
+def _to_dates(df, col, dataset_key=None, fmt=None):
+    """
+    Parses a date column. With an explicit format (e.g. found on the first chunk of a streamed file),
+    a value it does not parse raises ValueError instead of silently becoming NaT.
+    """
+    parsed = get_parsed_dates(df, col, dataset_key, fmt=fmt)
+    if parsed is None:
+        raise ValueError(f"Column {col} does not contain dates.")
+    if fmt is not None:
+        invalid = parsed.isna() & df[col].notna()
+        if invalid.any():
+            raise ValueError(f"Column {col} has a value that is not a date in format {fmt}: {df[col][invalid].iloc[0]!r}")
+    return parsed
+
+def apply_data_type_recommendations(df, recommendations, dataset_key=None, date_formats=None, progress=None):
+    """
+    Applies recommended data types to the columns in a pandas DataFrame. A value that does not fit its column's
+    type raises ValueError.
+    Parameters:
+        - df: pandas DataFrame
+        - recommendations: dictionary with column names as keys and recommended data types as values
+        - dataset_key: identifies the dataset version; date columns already parsed under it are reused
+        - date_formats: dictionary of column -> date format to parse with instead of inferring one per call,
+          so the chunks of a streamed file are all parsed the same way (streaming.date_formats)
+        - progress: optional function called with (columns done, columns) before each column (jobs.Job.update)
+    Returns:
+        - df: pandas DataFrame with updated data types
+    """
+    date_formats = date_formats or {}
+    for i, (col, dtype) in enumerate(recommendations.items()):
+        if progress is not None:
+            progress(i, len(recommendations))
+        if df[col].dtype == dtype:
+            continue
+        if pd.api.types.is_object_dtype(df[col].dtype) and dtype.lower().startswith(("int", "float")):
+            # Parse numeric strings in C instead of calling int()/float() per value
+            df[col] = _to_numbers(df[col]).astype(dtype)
+        elif pd.api.types.is_object_dtype(df[col].dtype) and dtype == "bool":
+            # astype(bool) would turn the string "False" into True
+            df[col] = df[col].isin([True, "True"])
+        elif pd.api.types.is_object_dtype(df[col].dtype) and dtype == "boolean":
+            df[col] = _to_boolean(df[col])
+        elif dtype == "datetime64[ns]":
+            df[col] = _to_dates(df, col, dataset_key, date_formats.get(col))
+        else:
+            df[col] = df[col].astype(dtype)
+    
+    return df
+
+def optimize_memory(df, recommendations, dataset_key=None):
+    """
+    Casts the columns of a pandas DataFrame to the most compact types that keep their values:
+    categorical for repetitive text, float32 where it is lossless and nullable integers for whole
+    numbers with missing values (downcast.memory_types). Columns are cast one at a time, so the
+    frame is never copied as a whole.
+    Parameters:
+        - df: pandas DataFrame (modified in place)
+        - recommendations: dictionary with column names as keys and recommended data types as values
+        - dataset_key: identifies the dataset version; date columns already parsed under it are reused
+    Returns:
+        - df: pandas DataFrame with compact types
+        - report: pandas DataFrame with memory usage per column before and after
+    """
+    types = memory_types(df, recommendations)
+    before, dtypes_before = df.memory_usage(deep=True, index=False), df.dtypes
+    df = apply_data_type_recommendations(df, types, dataset_key)
+    report = memory_report(before, df.memory_usage(deep=True, index=False), dtypes_before, df.dtypes)
+    return df, report
+
+def remove_outdated(df, date_col, time_filter, dataset_key=None, date_format=None):
+    """
+    Keeps the rows whose date falls in a time range. Rows without a valid date are removed.
+    The range is looked up in a sorted positional index of the parsed date column
+    (datetimes.get_date_index), which is built once per (dataset_key, date_col).
+    Parameters:
+        - df: pandas DataFrame
+        - date_col: name of the date column
+        - time_filter: [start, end] pair (either may be None for an open end), or a single start cutoff
+        - dataset_key: identifies the dataset version; the parsed column and its index are cached under it
+        - date_format: format of the dates (default: inferred from a sample of the column)
+    Returns:
+        - df: pandas DataFrame with the rows in range, in their original order
+    """
+    if not time_filter:
+        return df
+
+    if isinstance(time_filter, (list, tuple)):
+        start, end = time_filter
+    else:
+        start, end = time_filter, None
+
+    date_index = get_date_index(df, date_col, dataset_key, date_format)
+    if date_index is None:
+        raise ValueError(f"Column {date_col} does not contain dates.")
+
+    return df.take(date_index.positions(start, end))
+
+def _convert_replacement(col_dtype, new_text):
+    if pd.api.types.is_integer_dtype(col_dtype):
+        new_text = int(new_text)
+    elif pd.api.types.is_float_dtype(col_dtype):
+        new_text = float(new_text)
+    elif pd.api.types.is_bool_dtype(col_dtype):
+        new_text = bool(new_text)
+    elif pd.api.types.is_datetime64_dtype(col_dtype):
+        new_text = pd.to_datetime(new_text)
+    return str(new_text)
+
+def replace_text_in_column(df, col_name, old_text, new_text):
+    """
+    Replaces text in a column of a pandas DataFrame, keeping the column's data type.
+    The replacement runs on the distinct values of the column when it is repetitive (text_replace.replace_text).
+    Parameters:
+        - df: pandas DataFrame
+        - col_name: name of the column
+        - old_text: text to replace
+        - new_text: replacement text, converted to the column's type first
+    Returns:
+        - df: pandas DataFrame with the replaced column
+    """
+    return replace_many_in_column(df, col_name, {old_text: new_text})
+
+def replace_many_in_column(df, col_name, rules):
+    """
+    Applies several old -> new text replacements to a column in one pass over its values.
+    Parameters:
+        - df: pandas DataFrame
+        - col_name: name of the column
+        - rules: dictionary of old text -> new text
+    Returns:
+        - df: pandas DataFrame with the replaced column
+    """
+    col_dtype = df[col_name].dtype
+    rules = {old: _convert_replacement(col_dtype, new) for old, new in rules.items() if old}
+    if rules:
+        df[col_name] = replace_text(df[col_name], rules)
+    
+    return df
+
+def change_data_types(df, types):
+    """
+    Changes the data types of columns in a pandas DataFrame. Only the columns whose type changes are converted;
+    the others are shared with df instead of copied.
+    Parameters:
+        - df: pandas DataFrame
+        - types: dictionary with column names as keys and data types as values
+    Returns:
+        - df: pandas DataFrame with the new data types
+    """
+    changed = {col: dtype for col, dtype in types.items() if df[col].dtype != pd.api.types.pandas_dtype(dtype)}
+    if not changed:
+        return df
+    return df.astype(changed, copy=False)
+
+def parse_replace_rules(text):
+    """
+    Parses batch replacement rules written one per line as "old -> new".
+    """
+    rules = {}
+    for line in text.splitlines():
+        if "->" in line:
+            old, new = line.split("->", 1)
+            rules[old.strip()] = new.strip()
+    return rules
+
+def automated_data_cleaning(data, dataset_key=None, progress=None):
+    """
+    Fills missing values by column type: integer columns with the mean, other numeric columns with the median,
+    categorical columns with the most frequent value, datetime columns by forward fill and the rest by backward fill.
+    The null mask is computed for all columns in one pass, or read from the column profiles already computed for
+    the dataset version, and the values are filled in place, without copying the data first (imputation.py).
+    Parameters:
+        - data: pandas DataFrame (modified in place)
+        - dataset_key: identifies the dataset version; its cached column profiles are used if there are any
+        - progress: optional function called with (columns filled, columns to fill) (jobs.Job.update)
+    Returns:
+        - data: the same DataFrame with missing values filled
+    """
+    return fill_missing(data, imputation_plan(data, profiles=cached_profiles(dataset_key)), progress)
+
+# Cleaning operations that can be recorded in the history and replayed on a dataset version
+OPERATIONS = {
+    "apply_data_type_recommendations": lambda df, version, recommendations, progress=None: apply_data_type_recommendations(df, recommendations, version, progress=progress),
+    "optimize_memory": lambda df, version, recommendations: optimize_memory(df, recommendations, version),
+    "change_data_types": lambda df, version, types: change_data_types(df, types),
+    "replace_text": lambda df, version, col_name, rules: replace_many_in_column(df, col_name, rules),
+    "remove_duplicates": lambda df, version, subset, keep, progress=None: remove_duplicates(df, subset, keep, progress),
+    "remove_near_duplicates": lambda df, version, columns, threshold, survivor, blocking: remove_near_duplicates(df, columns, threshold, survivor, blocking),
+    "remove_outdated": lambda df, version, date_col, time_filter: remove_outdated(df, date_col, time_filter, version),
+    "automated_data_cleaning": lambda df, version, progress=None: automated_data_cleaning(df, version, progress),
+}
+
+# Every call of an operation is timed and its memory measured (instrument.py)
+OPERATIONS = {name: instrumented(name, func) for name, func in OPERATIONS.items()}
+
+# Operations that modify their input in place; they get a new frame sharing its columns (datastore.copy_on_write),
+# since they replace columns rather than write into them, so cached versions stay intact
+IN_PLACE_OPERATIONS = {"apply_data_type_recommendations", "optimize_memory", "replace_text", "automated_data_cleaning"}
+
+# Operations whose result on a row does not depend on the other rows, which can run chunk by chunk, with the
+# parameter naming the only column they change
+ROW_LOCAL_OPERATIONS = {"replace_text": "col_name"}
+
+# Operations taking a progress function, through which a background job follows them and cancels them
+# between columns
+PROGRESS_OPERATIONS = {"remove_duplicates", "apply_data_type_recommendations", "automated_data_cleaning"}
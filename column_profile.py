@@ -0,0 +1,321 @@
+import numpy as np
+import pandas as pd
+
+from cache import artifacts
+from parallel import map_columns
+
+# Register index bits of the HyperLogLog sketch: 2**14 registers, about 0.8% standard error
+HLL_PRECISION = 14
+
+# Frequent values kept per column (space-saving summary capacity is a multiple of it)
+TOP_K = 20
+
+# Values kept in the reservoir sample of each column, as many as the type inference screens
+SAMPLE_SIZE = 10000
+
+# Rows summarized at a time; bounds the distinct values counted exactly at once
+PROFILE_CHUNK_SIZE = 1000000
+
+
+def _bit_length(values):
+    """
+    Number of significant bits of each uint64, computed exactly with shifts (log2 in float64 rounds).
+    """
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= np.uint64(1 << shift)
+        length[high] += shift
+        values[high] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct values of a column in fixed memory (2**precision bytes).
+    Each value is hashed to 64 bits: the top bits pick a register, which keeps the longest run of
+    leading zeros seen in the other bits. Sketches of two chunks combine with merge().
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        """
+        Adds 64-bit hashes (uint64 array, e.g. from pd.util.hash_pandas_object).
+        """
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits + 1 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            # Linear counting is more accurate while many registers are empty
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+
+class TopK:
+    """
+    Frequent values of a column, summarized chunk by chunk in bounded memory (mergeable
+    space-saving / Misra-Gries summary). Each chunk is counted exactly and added to the summary;
+    whenever a summary outgrows its capacity, the count of the first value that does not fit is
+    subtracted from every counter and the counters that reach zero are dropped. Kept counts are then lower bounds that undercount by at most `error`; every value
+    more frequent than `error` is kept. With fewer distinct values than the capacity the counts
+    are exact.
+    """
+
+    def __init__(self, k=TOP_K, capacity=None):
+        self.k = k
+        self.capacity = capacity or 10 * k
+        self.counts = pd.Series(dtype="int64")
+        self.error = 0
+
+    def update(self, counts):
+        """
+        Adds the value counts of a chunk (Series of value -> count).
+        """
+        # The chunk is reduced to a summary of its own first, so only two small summaries are aligned
+        counts = self._prune(counts[counts > 0])
+        if len(self.counts):
+            counts = self._prune(self.counts.add(counts, fill_value=0).astype("int64"))
+        self.counts = counts
+        return self
+
+    def _prune(self, counts):
+        if len(counts) <= self.capacity:
+            return counts
+        cut = int(counts.nlargest(self.capacity + 1).iloc[-1])
+        self.error += cut
+        return counts[counts > cut] - cut
+
+    def merge(self, other):
+        self.error += other.error
+        return self.update(other.counts)
+
+    def exact(self):
+        """
+        True if the counters hold every distinct value with its exact count.
+        """
+        return self.error == 0
+
+    def top(self):
+        """
+        Returns the k most frequent values as a Series of value -> count, most frequent first.
+        """
+        return self.counts.sort_values(ascending=False, kind="stable").iloc[:self.k]
+
+
+class ReservoirSample:
+    """
+    Uniform sample of the non-null values of a column, kept as a bottom-k sample: every value
+    gets a random priority and the `size` lowest priorities are kept, which stays uniform when
+    chunks or samples are merged.
+    """
+
+    def __init__(self, size=SAMPLE_SIZE, seed=0):
+        self.size = size
+        self.rng = np.random.RandomState(seed)
+        self.priorities = np.empty(0)
+        self.values = None
+
+    def update(self, values):
+        """
+        Adds the non-null values of a chunk (Series).
+        """
+        return self._add(self.rng.random_sample(len(values)), values)
+
+    def merge(self, other):
+        if other.values is None:
+            return self
+        return self._add(other.priorities, other.values)
+
+    def _add(self, priorities, values):
+        if self.values is not None:
+            priorities = np.concatenate([self.priorities, priorities])
+            values = pd.concat([self.values, values])
+        if len(values) > self.size:
+            # Original row order, so the sample reads like the column
+            keep = np.sort(np.argpartition(priorities, self.size)[:self.size])
+            priorities, values = priorities[keep], values.iloc[keep]
+        self.priorities, self.values = priorities, values
+        return self
+
+    def sample(self):
+        return self.values if self.values is not None else pd.Series(dtype=object)
+
+
+def _min_max(values):
+    """
+    Minimum and maximum of the non-null values, or (None, None) if they cannot be ordered
+    (mixed types) or there are none.
+    """
+    if len(values) == 0 or isinstance(values.dtype, pd.CategoricalDtype) and not values.cat.ordered:
+        return None, None
+    try:
+        return values.min(), values.max()
+    except TypeError:
+        return None, None
+
+
+class ColumnProfile:
+    """
+    Summary of one column computed in one pass over it: row and null counts, min/max, an
+    estimated distinct count (HyperLogLog), the most frequent values (TopK) and a uniform sample
+    of the non-null values (ReservoirSample). Memory does not grow with the number of rows.
+    Profiles of two chunks of a column combine with merge(), so a column can also be profiled
+    while it is streamed.
+    """
+
+    def __init__(self, name, dtype, top_k=TOP_K, sample_size=SAMPLE_SIZE, seed=0):
+        self.name = name
+        self.dtype = dtype
+        self.rows = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.sketch = HyperLogLog()
+        self.frequent = TopK(top_k)
+        self.reservoir = ReservoirSample(sample_size, seed)
+
+    def update(self, series):
+        """
+        Adds a chunk of the column.
+        """
+        values = series.dropna()
+        self.rows += len(series)
+        self.nulls += len(series) - len(values)
+        if len(values) == 0:
+            return self
+        low, high = _min_max(values)
+        self._extend(low, high)
+        # One hashing pass: the distinct values and their counts feed both the sketch and the summary
+        codes, uniques = pd.factorize(values)
+        self.sketch.update(pd.util.hash_pandas_object(pd.Series(uniques), index=False).to_numpy())
+        self.frequent.update(pd.Series(np.bincount(codes, minlength=len(uniques)), index=uniques))
+        self.reservoir.update(values.reset_index(drop=True))
+        return self
+
+    def _extend(self, low, high):
+        try:
+            if low is not None:
+                self.min = low if self.min is None else min(self.min, low)
+            if high is not None:
+                self.max = high if self.max is None else max(self.max, high)
+        except TypeError:
+            # Chunks hold values that cannot be compared with each other
+            self.min = self.max = None
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self._extend(other.min, other.max)
+        self.sketch.merge(other.sketch)
+        self.frequent.merge(other.frequent)
+        self.reservoir.merge(other.reservoir)
+        return self
+
+    def __sizeof__(self):
+        # Used by the artifact cache to account for cached profiles
+        sample = self.reservoir.values
+        return (self.sketch.registers.nbytes + int(self.frequent.counts.memory_usage(index=True))
+                + self.reservoir.priorities.nbytes + (0 if sample is None else int(sample.memory_usage(index=True))))
+
+    @property
+    def has_nulls(self):
+        return self.nulls > 0
+
+    def distinct(self):
+        """
+        Number of distinct non-null values: exact when the frequent-value summary holds every
+        value, estimated by HyperLogLog otherwise.
+        """
+        if self.frequent.exact():
+            return len(self.frequent.counts)
+        return self.sketch.estimate()
+
+    def top(self):
+        return self.frequent.top()
+
+    def sample(self):
+        return self.reservoir.sample()
+
+    def values(self):
+        """
+        Returns the distinct non-null values if the summary holds all of them exactly, else None.
+        """
+        if not self.frequent.exact():
+            return None
+        return self.frequent.counts.index
+
+    def summary(self):
+        """
+        Returns the profile as a dictionary for display.
+        """
+        return {
+            "rows": self.rows,
+            "missing": self.nulls,
+            "distinct": self.distinct(),
+            "distinct is exact": self.frequent.exact(),
+            "min": self.min,
+            "max": self.max,
+            "dtype": str(self.dtype),
+        }
+
+
+def profile_column(series, top_k=TOP_K, sample_size=SAMPLE_SIZE, chunk_size=PROFILE_CHUNK_SIZE):
+    """
+    Profiles a column chunk by chunk.
+    Parameters:
+        - series: pandas Series
+        - top_k: number of frequent values reported
+        - sample_size: number of values in the sample
+        - chunk_size: rows summarized at a time
+    Returns:
+        - profile: ColumnProfile
+    """
+    profile = ColumnProfile(series.name, series.dtype, top_k, sample_size)
+    for start in range(0, max(len(series), 1), chunk_size):
+        profile.update(series.iloc[start:start + chunk_size])
+    return profile
+
+
+def profile_frame(df, workers=None):
+    """
+    Profiles every column of a DataFrame, in parallel (parallel.map_columns).
+    Returns:
+        - profiles: dictionary of column -> ColumnProfile
+    """
+    return map_columns(profile_column, df, workers=workers)
+
+
+def get_profiles(df, dataset_key=None):
+    """
+    Returns the profiles of a dataset version, computed once and kept in the artifact cache
+    under dataset_key. Without a dataset_key they are computed and not cached.
+    """
+    if dataset_key is None:
+        return profile_frame(df)
+    return artifacts.get_or_compute((dataset_key, "profile"), lambda: profile_frame(df))
+
+
+def cached_profiles(dataset_key):
+    """
+    Returns the profiles of a dataset version if they were already computed, else None, for
+    operations that use them when available but would not compute them just for themselves.
+    """
+    if dataset_key is None:
+        return None
+    return artifacts.get((dataset_key, "profile"))
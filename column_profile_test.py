@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import artifacts
+from column_profile import HyperLogLog, TopK, cached_profiles, get_profiles, profile_column
+
+
+class ColumnProfileTest(unittest.TestCase):
+    def test_counts_and_range(self):
+        series = pd.Series([3, None, 1, 3, 2], name="n")
+        summary = profile_column(series, chunk_size=2).summary()
+        self.assertEqual((summary["rows"], summary["missing"], summary["distinct"]), (5, 1, 3))
+        self.assertTrue(summary["distinct is exact"])
+        self.assertEqual((summary["min"], summary["max"]), (1, 3))
+
+    def test_chunks_give_the_same_profile(self):
+        series = pd.Series(np.random.default_rng(0).integers(0, 50, 10000))
+        whole, chunked = profile_column(series), profile_column(series, chunk_size=333)
+        self.assertEqual(whole.summary(), chunked.summary())
+        self.assertEqual(whole.frequent.counts.to_dict(), chunked.frequent.counts.to_dict())
+        self.assertEqual(sorted(whole.values()), list(range(50)))
+
+    def test_distinct_estimate(self):
+        hashes = pd.util.hash_pandas_object(pd.Series(np.arange(100000)), index=False).to_numpy()
+        sketch = HyperLogLog().update(hashes[:60000]).merge(HyperLogLog().update(hashes[40000:]))
+        self.assertAlmostEqual(sketch.estimate() / 100000, 1, delta=0.03)
+
+    def test_frequent_values_survive_pruning(self):
+        frequent = TopK(k=2, capacity=5)
+        for start in range(0, 1000, 100):
+            rare = pd.Series(1, index=[f"r{i}" for i in range(start, start + 100)])
+            frequent.update(pd.concat([rare, pd.Series({"a": 50, "b": 30})]))
+        self.assertFalse(frequent.exact())
+        self.assertEqual(list(frequent.top().index), ["a", "b"])
+        self.assertGreaterEqual(frequent.top()["a"] + frequent.error, 500)
+
+    def test_mixed_values_have_no_range(self):
+        profile = profile_column(pd.Series(["a", 1, None], dtype=object))
+        self.assertIsNone(profile.min)
+        self.assertEqual(len(profile.sample()), 2)
+
+    def test_profiles_are_cached_per_version(self):
+        df = pd.DataFrame({"a": [1, 2]})
+        artifacts.discard(("v-profile-test", "profile"))
+        self.assertIsNone(cached_profiles("v-profile-test"))
+        profiles = get_profiles(df, "v-profile-test")
+        self.assertIs(cached_profiles("v-profile-test"), profiles)
+        artifacts.discard(("v-profile-test", "profile"))
+
+
+if __name__ == "__main__":
+    unittest.main()
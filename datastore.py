@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache import artifacts, sizeof
+
+# Directory of the shared base tables; a fixed directory is also shared by the server processes
+# of one machine (default: a temporary directory per server process)
+STORE_DIR = os.environ.get("CLEANER_STORE_DIR")
+
+# Bytes of base table files kept on disk; the least recently used are deleted beyond this
+MAX_DISK_BYTES = 20 * 1024 * 1024 * 1024
+
+# Bytes of cached versions one session may create before its oldest ones are evicted
+SESSION_BYTES = 1024 * 1024 * 1024
+
+
+def write_base(df, path):
+    """
+    Writes a parsed upload as an uncompressed Arrow IPC (Feather) file, which can be memory-mapped
+    without decoding. Written to a temporary name first, so a reader never sees a partial file.
+    """
+    import pyarrow.feather as feather
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read_only(series):
+    values = series.to_numpy()
+    if not isinstance(series.dtype, np.dtype) or not values.flags.writeable:
+        return series
+    values = values.view()
+    values.flags.writeable = False
+    return pd.Series(values, index=series.index, name=series.name, copy=False)
+
+
+def open_base(path):
+    """
+    Opens a base table written by write_base. Numeric and date columns without missing values are
+    views of the memory-mapped file: they take no heap memory, and the operating system shares
+    their pages between sessions and server processes. Text, boolean and nullable columns are
+    converted to pandas arrays once. Every column is read-only, so code that would modify the
+    shared table in place fails instead of changing it for the other sessions.
+    Parameters:
+        - path: path of the file
+    Returns:
+        - df: pandas DataFrame
+        - mapped: bytes of df held by the file mapping rather than the heap
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(path)
+    mapping = source.read_buffer()
+    source.seek(0)
+    table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas(split_blocks=True)
+    if len(df.columns):
+        frame = pd.concat([_read_only(df.iloc[:, i]) for i in range(len(df.columns))], axis=1, copy=False)
+        frame.columns = df.columns
+        df = frame
+    start, end = mapping.address, mapping.address + mapping.size
+    mapped = 0
+    for i in range(len(df.columns)):
+        values = df.iloc[:, i].to_numpy()
+        if isinstance(values, np.ndarray) and start <= values.__array_interface__["data"][0] < end:
+            mapped += values.nbytes
+    return df, mapped
+
+
+def copy_on_write(df, columns=()):
+    """
+    Returns a new frame sharing the column arrays of df, except for columns, which are copied.
+    Operations that modify their input get this instead of df.copy(): replacing or adding a column
+    leaves df intact, so only the columns an operation writes into in place need a copy.
+    Parameters:
+        - df: pandas DataFrame
+        - columns: columns to copy
+    Returns:
+        - df: pandas DataFrame
+    """
+    if not len(df.columns):
+        return df.copy()
+    columns = set(columns)
+    parts = [df.iloc[:, i].copy() if col in columns else df.iloc[:, i] for i, col in enumerate(df.columns)]
+    out = pd.concat(parts, axis=1, copy=False)
+    out.columns = df.columns
+    return out
+
+
+class DatasetStore:
+    """
+    Holds the parsed uploads shared by all sessions of the server. Each upload is parsed once, by
+    the first session that opens it, and written to a base table file named by its content hash
+    (cache.content_hash); every session then works on the same read-only frame, memory-mapped from
+    that file (open_base). When the frame is evicted from cache.artifacts it is mapped again from
+    the file instead of being parsed again. Files are deleted in least-recently-used order beyond
+    max_disk_bytes.
+
+    The versions a session creates are overlays on the base table: they share its unchanged
+    columns (copy_on_write, versions.apply_delta) and are recorded as deltas (versions.py). Their
+    bytes are charged to the session that created them; beyond session_bytes, the session's oldest
+    versions are evicted from cache.artifacts, to be rebuilt from their deltas when needed again,
+    so one session cannot push the other sessions' versions out of the shared cache.
+    """
+
+    def __init__(self, directory=STORE_DIR, max_disk_bytes=MAX_DISK_BYTES, session_bytes=SESSION_BYTES):
+        self.directory = directory
+        self.tmp_dir = None
+        self.max_disk_bytes = max_disk_bytes
+        self.session_bytes = session_bytes
+        # dataset key -> bytes of its file
+        self.files = OrderedDict()
+        self.disk_bytes = 0
+        # session -> OrderedDict of cache key -> bytes
+        self.sessions = {}
+        self.lock = threading.RLock()
+
+    def path(self, dataset_key):
+        with self.lock:
+            directory = self.directory
+            if directory is None:
+                if self.tmp_dir is None:
+                    self.tmp_dir = tempfile.mkdtemp(prefix="datasets-")
+                directory = self.tmp_dir
+            os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{dataset_key}.arrow")
+
+    def base(self, dataset_key, load):
+        """
+        Returns the shared frame of an upload, cached in cache.artifacts as (dataset_key, "frame").
+        Parameters:
+            - dataset_key: content hash of the upload and its load options
+            - load: function parsing the upload, called only if it has no base table file yet
+        Returns:
+            - df: read-only pandas DataFrame; frames Arrow cannot store (e.g. columns mixing
+              numbers and text) are kept as parsed, in memory
+        """
+        key = (dataset_key, "frame")
+        df = artifacts.get(key)
+        if df is not None:
+            return df
+        path = self.path(dataset_key)
+        if not os.path.exists(path):
+            df = load()
+            try:
+                write_base(df, path)
+            except (ImportError, TypeError, ValueError, NotImplementedError, OSError):
+                # pyarrow's errors derive from these
+                return artifacts.put(key, df)
+        df, mapped = open_base(path)
+        self._track(dataset_key, os.path.getsize(path))
+        # Only the heap part counts against the cache; the mapped pages belong to the page cache
+        return artifacts.put(key, df, max(sizeof(df) - mapped, 0))
+
+    def _track(self, dataset_key, nbytes):
+        with self.lock:
+            self.disk_bytes -= self.files.pop(dataset_key, 0)
+            self.files[dataset_key] = nbytes
+            self.disk_bytes += nbytes
+            while self.disk_bytes > self.max_disk_bytes and len(self.files) > 1:
+                cold, cold_bytes = self.files.popitem(last=False)
+                self.disk_bytes -= cold_bytes
+                try:
+                    # Frames still mapped from it stay valid until they are released (POSIX)
+                    os.remove(self.path(cold))
+                except OSError:
+                    pass
+
+    def charge(self, session, key, nbytes):
+        """
+        Records that a session created the cached value under key, of nbytes, and evicts the
+        session's least recently charged values beyond session_bytes.
+        """
+        with self.lock:
+            usage = self.sessions.setdefault(session, OrderedDict())
+            usage.pop(key, None)
+            usage[key] = nbytes
+            while sum(usage.values()) > self.session_bytes and len(usage) > 1:
+                cold, _ = usage.popitem(last=False)
+                artifacts.discard(cold)
+
+    def usage(self, session):
+        with self.lock:
+            return sum(self.sessions.get(session, {}).values())
+
+    def release(self, session):
+        """
+        Forgets a session's charges, e.g. when it opens another upload. Its versions stay cached
+        for the other sessions until the cache evicts them.
+        """
+        with self.lock:
+            self.sessions.pop(session, None)
+
+    def clear(self):
+        with self.lock:
+            self.files.clear()
+            self.disk_bytes = 0
+            self.sessions.clear()
+            if self.tmp_dir is not None:
+                shutil.rmtree(self.tmp_dir, ignore_errors=True)
+                self.tmp_dir = None
+
+
+# Shared by all sessions of the server process
+store = DatasetStore()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import artifacts
+from datastore import DatasetStore, copy_on_write, open_base, write_base
+
+
+class BaseTableTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({"n": np.arange(5), "f": np.arange(5) / 2, "t": ["a", None, "c", "d", "e"]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_base_is_mapped_and_read_only(self):
+        path = os.path.join(self.tmp.name, "base.arrow")
+        write_base(self.df, path)
+        df, mapped = open_base(path)
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertEqual(mapped, self.df["n"].nbytes + self.df["f"].nbytes)
+        with self.assertRaises(ValueError):
+            df["n"].to_numpy()[0] = 9
+        self.assertEqual(os.listdir(self.tmp.name), ["base.arrow"])
+
+    def test_copy_on_write_shares_unchanged_columns(self):
+        out = copy_on_write(self.df, columns=["f"])
+        self.assertTrue(np.shares_memory(out["n"].to_numpy(), self.df["n"].to_numpy()))
+        self.assertFalse(np.shares_memory(out["f"].to_numpy(), self.df["f"].to_numpy()))
+        out["n"] = out["n"] * 2
+        out["f"].to_numpy()[0] = 9
+        self.assertEqual(self.df["n"].tolist(), list(range(5)))
+        self.assertEqual(self.df["f"].iloc[0], 0)
+
+
+class DatasetStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = DatasetStore(directory=self.tmp.name, session_bytes=100)
+
+    def tearDown(self):
+        for key in ("k1", "k2"):
+            artifacts.discard((key, "frame"))
+        self.tmp.cleanup()
+
+    def test_upload_is_parsed_once(self):
+        calls = []
+        load = lambda: calls.append(1) or pd.DataFrame({"n": np.arange(10)})
+        first = self.store.base("k1", load)
+        artifacts.discard(("k1", "frame"))
+        second = self.store.base("k1", load)
+        self.assertEqual(len(calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertIn("k1", self.store.files)
+
+    def test_frames_arrow_cannot_store_stay_in_memory(self):
+        df = self.store.base("k2", lambda: pd.DataFrame({"mixed": [1, "a"]}))
+        self.assertEqual(df["mixed"].tolist(), [1, "a"])
+        self.assertNotIn("k2", self.store.files)
+
+    def test_sessions_evict_their_own_oldest_versions(self):
+        for key in ("a", "b", "c"):
+            artifacts.put(("datastore-test", key), key, nbytes=1)
+        self.store.charge("s1", ("datastore-test", "a"), 60)
+        self.store.charge("s2", ("datastore-test", "b"), 60)
+        self.store.charge("s1", ("datastore-test", "c"), 60)
+        self.assertNotIn(("datastore-test", "a"), artifacts)
+        self.assertIn(("datastore-test", "b"), artifacts)
+        self.assertEqual((self.store.usage("s1"), self.store.usage("s2")), (60, 60))
+        self.store.release("s1")
+        self.assertEqual(self.store.usage("s1"), 0)
+        for key in ("b", "c"):
+            artifacts.discard(("datastore-test", key))
+
+    def test_old_files_are_deleted_beyond_the_disk_budget(self):
+        self.store.max_disk_bytes = 1
+        for key in ("k1", "k2"):
+            self.store.base(key, lambda: pd.DataFrame({"n": np.arange(10)}))
+        self.assertEqual(list(self.store.files), ["k2"])
+        self.assertFalse(os.path.exists(self.store.path("k1")))
+
+
+if __name__ == "__main__":
+    unittest.main()
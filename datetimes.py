@@ -0,0 +1,299 @@
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Formats tried in order when inferring the format of a date column.
+# Month-first comes before day-first to match what pd.to_datetime does without a format.
+DATETIME_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M",
+    "%Y/%m/%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d.%m.%Y %H:%M:%S",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+]
+
+# Number of rows used to infer the format of a column
+FORMAT_SAMPLE_SIZE = 10000
+
+# Number of parsed columns kept in memory
+CACHE_SIZE = 16
+
+# (dataset_key, column) -> (format, parsed Series)
+_parsed_cache = OrderedDict()
+
+# (dataset_key, column) -> SortedDateIndex
+_index_cache = OrderedDict()
+
+# (dataset_key, column) -> row index of the columns found not to hold dates, so a rerun does not
+# try every format on them again
+_not_dates = OrderedDict()
+
+# Columns may be parsed from several threads at once (parallel.map_columns)
+_cache_lock = threading.Lock()
+
+
+def infer_datetime_format(sample):
+    """
+    Infers an explicit datetime format from a sample of string values.
+    Parameters:
+        - sample: pandas Series of non-null values
+    Returns:
+        - fmt: the first format in DATETIME_FORMATS that parses every value, or None
+    """
+    if len(sample) == 0 or not pd.api.types.is_object_dtype(sample.dtype):
+        return None
+    values = sample.astype(str).str.strip()
+    # Try the formats on a handful of values first, then on the whole sample
+    head = values.iloc[:20]
+    for fmt in DATETIME_FORMATS:
+        if pd.to_datetime(head, format=fmt, errors="coerce").isna().any():
+            continue
+        if not pd.to_datetime(values, format=fmt, errors="coerce").isna().any():
+            return fmt
+    return None
+
+
+def parse_datetimes(series, fmt=None):
+    """
+    Parses a column to datetime64[ns]. Values that do not match become NaT.
+    Parameters:
+        - series: pandas Series
+        - fmt: explicit format; without it pandas falls back to per-value parsing
+    Returns:
+        - parsed: datetime64[ns] Series with the same index as series
+    """
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series
+    if fmt is not None:
+        return pd.to_datetime(series.astype(str).str.strip(), format=fmt, errors="coerce")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(series, errors="coerce")
+
+
+def detect_datetime_format(sample):
+    """
+    Checks a sample of non-null values and returns (is_datetime, fmt).
+    fmt is None when the sample only parses with pandas' per-value fallback.
+    """
+    if len(sample) == 0 or not pd.api.types.is_object_dtype(sample.dtype):
+        return False, None
+    fmt = infer_datetime_format(sample)
+    if fmt is not None:
+        return True, fmt
+    return not parse_datetimes(sample).isna().any(), None
+
+
+def _cache_get(key, index):
+    with _cache_lock:
+        entry = _parsed_cache.get(key)
+        if entry is None:
+            return None
+        _parsed_cache.move_to_end(key)
+    fmt, parsed = entry
+    if parsed is not None and not parsed.index.equals(index):
+        # Same column but the rows changed since it was parsed: keep the format only
+        return fmt, None
+    return entry
+
+
+def _cache_put(key, fmt, parsed):
+    with _cache_lock:
+        _parsed_cache[key] = (fmt, parsed)
+        _parsed_cache.move_to_end(key)
+        while len(_parsed_cache) > CACHE_SIZE:
+            _parsed_cache.popitem(last=False)
+
+
+def get_parsed_dates(df, col, dataset_key=None, sample_size=FORMAT_SAMPLE_SIZE, fmt=None):
+    """
+    Returns a date column of a DataFrame parsed to datetime64[ns], parsing it at most once per
+    (dataset_key, col). The format is inferred from a sample so the full column is parsed with an
+    explicit format instead of pandas' per-value fallback.
+    Parameters:
+        - df: pandas DataFrame
+        - col: name of the date column
+        - dataset_key: identifies the dataset version (e.g. a content hash); None disables the cache
+        - sample_size: maximum number of rows used to infer the format
+        - fmt: format to parse with instead of inferring one, e.g. the format found on the first
+          chunk of a streamed file, so every chunk is parsed the same way
+    Returns:
+        - parsed: datetime64[ns] Series aligned with df, or None if the column is not a date column
+          (also cached, so a column is only checked once)
+    """
+    series = df[col]
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series
+
+    key = (dataset_key, col)
+    entry = _cache_get(key, df.index) if dataset_key is not None else None
+    if entry is not None and entry[1] is not None:
+        return entry[1]
+
+    if fmt is None and entry is not None:
+        fmt = entry[0]
+    elif fmt is None:
+        if dataset_key is not None:
+            with _cache_lock:
+                index = _not_dates.get(key)
+            if index is not None and index.equals(df.index):
+                return None
+        sample = series.sample(n=sample_size, random_state=0) if len(series) > sample_size else series
+        is_datetime, fmt = detect_datetime_format(sample.dropna())
+        if not is_datetime:
+            if dataset_key is not None:
+                with _cache_lock:
+                    _not_dates[key] = df.index
+                    _not_dates.move_to_end(key)
+                    while len(_not_dates) > CACHE_SIZE:
+                        _not_dates.popitem(last=False)
+            return None
+    parsed = parse_datetimes(series, fmt)
+    if dataset_key is not None:
+        _cache_put(key, fmt, parsed)
+    return parsed
+
+
+def parse_and_cache(series, fmt, dataset_key=None):
+    """
+    Parses a column with a format that was already inferred (e.g. while recommending data types)
+    and caches the result, or returns the cached result if the column was parsed before.
+    """
+    key = (dataset_key, series.name)
+    entry = _cache_get(key, series.index) if dataset_key is not None else None
+    if entry is not None and entry[1] is not None:
+        return entry[1]
+    parsed = parse_datetimes(series, fmt)
+    if dataset_key is not None:
+        _cache_put(key, fmt, parsed)
+    return parsed
+
+
+class SortedDateIndex:
+    """
+    Positional index over a parsed date column: the dates sorted ascending plus the row position
+    of each sorted date. A [start, end] range query is two searchsorted lookups plus a take.
+    NaT rows are kept out of the sorted part so they never match a range.
+    """
+
+    def __init__(self, parsed):
+        values = parsed.to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(values)
+        self.index = parsed.index
+        self.n_rows = len(values)
+        if valid.all():
+            order = np.argsort(values.view("int64"))
+            self.sorted_values = values[order]
+            self.order = order
+        else:
+            positions = np.flatnonzero(valid)
+            values = values[valid]
+            order = np.argsort(values.view("int64"))
+            self.sorted_values = values[order]
+            self.order = positions[order]
+
+    def __len__(self):
+        return len(self.sorted_values)
+
+    @property
+    def min(self):
+        return pd.Timestamp(self.sorted_values[0]) if len(self) else None
+
+    @property
+    def max(self):
+        return pd.Timestamp(self.sorted_values[-1]) if len(self) else None
+
+    def bounds(self, start=None, end=None):
+        """
+        Returns the slice [lo, hi) of the sorted dates that fall in [start, end].
+        """
+        lo = 0 if start is None else np.searchsorted(self.sorted_values, np.datetime64(pd.Timestamp(start)), side="left")
+        hi = len(self) if end is None else np.searchsorted(self.sorted_values, np.datetime64(pd.Timestamp(end)), side="right")
+        return lo, max(lo, hi)
+
+    def count(self, start=None, end=None):
+        lo, hi = self.bounds(start, end)
+        return hi - lo
+
+    def positions(self, start=None, end=None, keep_order=True):
+        """
+        Returns the row positions whose date is in [start, end].
+        Parameters:
+            - start, end: range bounds, either may be None for an open end
+            - keep_order: return positions in the original row order instead of date order
+        Returns:
+            - positions: numpy array of row positions
+        """
+        lo, hi = self.bounds(start, end)
+        positions = self.order[lo:hi]
+        if not keep_order:
+            return positions
+        # Sort small selections directly; scatter large ones into a bitmap, which is linear
+        k = hi - lo
+        if k == self.n_rows:
+            return np.arange(self.n_rows)
+        if k * max(1, int(np.log2(k + 1))) < self.n_rows:
+            return np.sort(positions)
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[positions] = True
+        return np.flatnonzero(selected)
+
+
+def get_date_index(df, col, dataset_key=None, fmt=None):
+    """
+    Returns the SortedDateIndex of a date column, building it at most once per (dataset_key, col).
+    Parameters:
+        - df: pandas DataFrame
+        - col: name of the date column
+        - dataset_key: identifies the dataset version; None disables the cache
+        - fmt: format of the dates (default: inferred, see get_parsed_dates)
+    Returns:
+        - index: SortedDateIndex, or None if the column is not a date column
+    """
+    key = (dataset_key, col)
+    with _cache_lock:
+        date_index = _index_cache.get(key) if dataset_key is not None else None
+        if date_index is not None and date_index.index.equals(df.index):
+            _index_cache.move_to_end(key)
+            return date_index
+
+    parsed = get_parsed_dates(df, col, dataset_key, fmt=fmt)
+    if parsed is None:
+        return None
+    date_index = SortedDateIndex(parsed)
+    if dataset_key is not None:
+        with _cache_lock:
+            _index_cache[key] = date_index
+            _index_cache.move_to_end(key)
+            while len(_index_cache) > CACHE_SIZE:
+                _index_cache.popitem(last=False)
+    return date_index
+
+
+def clear_datetime_cache():
+    with _cache_lock:
+        _parsed_cache.clear()
+        _index_cache.clear()
+        _not_dates.clear()
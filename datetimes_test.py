@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import datetimes
+from datetimes import clear_datetime_cache, detect_datetime_format, get_parsed_dates, infer_datetime_format
+
+
+class DatetimesTest(unittest.TestCase):
+    def setUp(self):
+        clear_datetime_cache()
+
+    def test_infers_an_explicit_format(self):
+        self.assertEqual(infer_datetime_format(pd.Series(["2024-01-31", "2024-02-01"])), "%Y-%m-%d")
+        self.assertEqual(infer_datetime_format(pd.Series(["31/01/2024", "01/02/2024"])), "%d/%m/%Y")
+        self.assertIsNone(infer_datetime_format(pd.Series(["a", "b"])))
+
+    def test_month_first_like_pandas(self):
+        self.assertEqual(infer_datetime_format(pd.Series(["01/02/2024"])), "%m/%d/%Y")
+
+    def test_detects_dates_without_a_known_format(self):
+        self.assertEqual(detect_datetime_format(pd.Series(["Jan 5 2024 10am", "Feb 6 2024 11pm"])), (True, None))
+        self.assertEqual(detect_datetime_format(pd.Series(["x", "2024-01-01"])), (False, None))
+
+    def test_parsed_once_per_version(self):
+        df = pd.DataFrame({"d": ["2024-01-01", "2024-01-02", None]})
+        parsed = get_parsed_dates(df, "d", "v1")
+        self.assertTrue(pd.isna(parsed.iloc[2]))
+        with mock.patch.object(datetimes, "parse_datetimes") as parse:
+            self.assertIs(get_parsed_dates(df, "d", "v1"), parsed)
+        parse.assert_not_called()
+
+    def test_text_columns_are_checked_once_per_version(self):
+        df = pd.DataFrame({"t": ["a", "b", "c"]})
+        self.assertIsNone(get_parsed_dates(df, "t", "v1"))
+        with mock.patch.object(datetimes, "detect_datetime_format") as detect:
+            self.assertIsNone(get_parsed_dates(df, "t", "v1"))
+            self.assertIsNone(datetimes.get_date_index(df, "t", "v1"))
+        detect.assert_not_called()
+
+    def test_explicit_format_is_used(self):
+        df = pd.DataFrame({"d": ["01/02/2024"]})
+        parsed = get_parsed_dates(df, "d", fmt="%d/%m/%Y")
+        self.assertEqual(parsed.iloc[0], pd.Timestamp("2024-02-01"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,399 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bytes of row keys held in memory before they are spilled to disk
+MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Number of hash partitions used once keys are spilled
+N_PARTITIONS = 64
+
+# Hash keys of the two halves of a 128-bit row key
+HASH_KEY = "0123456789123456"
+SECOND_HASH_KEY = "fedcba9876543210"
+
+# Per-column hashes are combined FNV style
+ROW_HASH_SEED = np.uint64(0xCBF29CE484222325)
+ROW_HASH_PRIME = np.uint64(0x100000001B3)
+
+# Rows looked at to decide whether an object column is repetitive enough to factorize before hashing
+CATEGORIZE_SAMPLE = 10000
+
+# pandas keeps a hash table next to the keys, roughly as large again
+HASH_TABLE_OVERHEAD = 2
+
+
+def row_keys(df, subset=None, bits=128):
+    """
+    Hashes each row of a DataFrame to a fixed-size key (hash_rows).
+    Parameters:
+        - df: pandas DataFrame
+        - subset: columns that identify a duplicate (default: all columns)
+        - bits: 64 for one uint64 per row, 128 for two (collisions become practically impossible)
+    Returns:
+        - keys: numpy array of shape (n,) for 64 bits or (n, 2) for 128 bits
+    """
+    if bits not in (64, 128):
+        raise ValueError("bits must be 64 or 128")
+    if subset is not None:
+        df = df[list(subset)]
+    h1 = hash_rows(df)
+    if bits == 64:
+        return h1
+    return np.column_stack([h1, hash_rows(df, SECOND_HASH_KEY)])
+
+
+# Mixed into the hash of each value by kind, so values of different kinds (1 and "1", or a
+# missing value and the text "nan") never hash alike
+NUMBER_TAG = np.uint64(0x9E3779B97F4A7C15)
+TEXT_TAG = np.uint64(0xC2B2AE3D27D4EB4F)
+DATETIME_TAG = np.uint64(0x165667B19E3779F9)
+OTHER_TAG = np.uint64(0x27D4EB2F165667C5)
+MISSING_HASH = np.uint64(0x85EBCA77C2B2AE63)
+
+# How hash_array hashes missing values in an object column
+MISSING_TEXTS = np.array(["None", "nan", "<NA>", "NaT"], dtype=object)
+
+
+def _categorize(series):
+    """
+    Factorizing before hashing pays off for repetitive object columns.
+    """
+    sample = series.iloc[:CATEGORIZE_SAMPLE]
+    return sample.nunique(dropna=False) * 4 < len(sample)
+
+
+def _number_hashes(values, hash_key):
+    """
+    Hashes numbers so that equal values hash alike whatever their type, as they compare in pandas:
+    whole floats are hashed as integers, so 1, 1.0 and True match whether they come from an int,
+    float, bool or object column (or from chunks read with different types).
+    """
+    if values.dtype.kind in "biu":
+        return pd.util.hash_array(values.astype("int64"), hash_key=hash_key, categorize=False) ^ NUMBER_TAG
+    values = values.astype("float64")
+    hashes = pd.util.hash_array(values, hash_key=hash_key, categorize=False)
+    with np.errstate(invalid="ignore"):
+        whole = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 2 ** 63)
+    hashes[whole] = pd.util.hash_array(values[whole].astype("int64"), hash_key=hash_key, categorize=False)
+    return hashes ^ NUMBER_TAG
+
+
+def _object_hashes(values, hash_key):
+    """
+    Hashes the values of an object array by kind: text as text, numbers with _number_hashes and
+    anything else by type and text. hash_pandas_object would turn them all into text, so 1 and "1"
+    would be duplicates while 2 and 2.0 would not, and a missing value would match the text "nan".
+    Returns (hashes, missing): the hashes of missing values are left to the caller.
+    """
+    if pd.api.types.infer_dtype(values, skipna=True) == "string":
+        hashes = pd.util.hash_array(values, hash_key=hash_key, categorize=False)
+        # hash_array hashes missing values as their text; only the values hashed like one are checked
+        suspects = np.flatnonzero(np.isin(hashes, pd.util.hash_array(MISSING_TEXTS, hash_key=hash_key, categorize=False)))
+        missing = np.zeros(len(values), dtype=bool)
+        missing[suspects[pd.isna(values[suspects])]] = True
+        return hashes ^ TEXT_TAG, missing
+
+    missing = pd.isna(values)
+    hashes = np.zeros(len(values), dtype="uint64")
+    present = np.flatnonzero(~missing)
+    values = values[present]
+    is_text = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+    is_int = np.fromiter((isinstance(value, (int, np.integer)) and -2 ** 63 <= value < 2 ** 63 for value in values),
+                         dtype=bool, count=len(values))
+    is_float = np.fromiter((isinstance(value, (float, np.floating)) for value in values), dtype=bool, count=len(values))
+    is_other = ~(is_text | is_int | is_float)
+    if is_text.any():
+        hashes[present[is_text]] = pd.util.hash_array(values[is_text], hash_key=hash_key, categorize=False) ^ TEXT_TAG
+    if is_int.any():
+        hashes[present[is_int]] = _number_hashes(values[is_int].astype("int64"), hash_key)
+    if is_float.any():
+        hashes[present[is_float]] = _number_hashes(values[is_float].astype("float64"), hash_key)
+    if is_other.any():
+        described = np.array([f"{type(value).__name__}:{value}" for value in values[is_other]], dtype=object)
+        hashes[present[is_other]] = pd.util.hash_array(described, hash_key=hash_key, categorize=False) ^ OTHER_TAG
+    return hashes, missing
+
+
+def column_hashes(series, hash_key=HASH_KEY):
+    """
+    Hashes each value of a column to a uint64. Values that pandas' drop_duplicates treats as equal
+    hash alike, and numbers match by value across int, float, bool and object columns, so chunks
+    read with different types compare the same. Missing values (None, NaN, NaT, NA) all match each
+    other and nothing else; drop_duplicates would tell None from NaN in an object column.
+    Parameters:
+        - series: pandas Series
+        - hash_key: 16 character key of the hash function
+    Returns:
+        - hashes: uint64 numpy array
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        hashes = _take_hashes(column_hashes(pd.Series(dtype.categories), hash_key), codes)
+        missing = codes < 0
+    elif isinstance(dtype, np.dtype) and dtype == object or pd.api.types.is_string_dtype(dtype):
+        values = series.to_numpy(dtype=object)
+        if _categorize(series):
+            # Hash each distinct value once; factorize matches values as drop_duplicates does
+            codes, uniques = pd.factorize(values)
+            hashes = _take_hashes(_object_hashes(uniques, hash_key)[0], codes)
+            missing = codes < 0
+        else:
+            hashes, missing = _object_hashes(values, hash_key)
+    else:
+        missing = series.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+            hashes = pd.util.hash_array(series.array.asi8, hash_key=hash_key, categorize=False) ^ DATETIME_TAG
+        elif pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            hashes = _number_hashes(series.to_numpy(dtype="int64", na_value=0), hash_key)
+        elif pd.api.types.is_float_dtype(dtype):
+            hashes = _number_hashes(series.to_numpy(dtype="float64", na_value=0.0), hash_key)
+        else:
+            # Periods, intervals, complex numbers, ...
+            hashes = _object_hashes(series.to_numpy(dtype=object), hash_key)[0]
+    hashes[missing] = MISSING_HASH
+    return hashes
+
+
+def _take_hashes(hashes, codes):
+    # Codes of missing values are -1; their hash is replaced afterwards
+    if len(hashes) == 0:
+        return np.zeros(len(codes), dtype="uint64")
+    return hashes[np.maximum(codes, 0)]
+
+
+def hash_rows(df, hash_key=HASH_KEY, progress=None):
+    """
+    Hashes each row of a DataFrame to a uint64 by combining the hashes of its values (column_hashes).
+    Parameters:
+        - df: pandas DataFrame
+        - hash_key: 16 character key of the hash function
+        - progress: optional function called with (columns hashed, columns) after each column; an
+          exception it raises (e.g. jobs.Cancelled) stops the hashing
+    Returns:
+        - hashes: uint64 numpy array
+    """
+    hashes = np.full(len(df), ROW_HASH_SEED, dtype="uint64")
+    with np.errstate(over="ignore"):
+        for i, (_, series) in enumerate(df.items()):
+            hashes = (hashes ^ column_hashes(series, hash_key)) * ROW_HASH_PRIME
+            if progress is not None:
+                progress(i + 1, len(df.columns))
+    return hashes
+
+
+def duplicated_keys(keys, keep="first"):
+    """
+    Marks duplicate keys like DataFrame.duplicated.
+    128-bit keys are first screened on their first half; only rows whose first half repeats are
+    compared on the full key.
+    Parameters:
+        - keys: array from row_keys
+        - keep: "first", "last" or False (mark every copy)
+    Returns:
+        - duplicated: boolean numpy array
+    """
+    if keys.ndim == 1:
+        return pd.Series(keys).duplicated(keep=keep).to_numpy()
+
+    candidates = pd.Series(keys[:, 0]).duplicated(keep=False).to_numpy()
+    duplicated = np.zeros(len(keys), dtype=bool)
+    if candidates.any():
+        duplicated[candidates] = pd.DataFrame(keys[candidates]).duplicated(keep=keep).to_numpy()
+    return duplicated
+
+
+class KeyStore:
+    """
+    Collects row keys in arrival order and decides which rows survive deduplication.
+    Keys stay in memory until they exceed memory_budget; then they are spilled to one file per
+    hash partition (with their row number) and deduplicated partition by partition, so only one
+    partition's keys are in memory at a time.
+    """
+
+    def __init__(self, bits=128, memory_budget=MEMORY_BUDGET, n_partitions=N_PARTITIONS, spill_dir=None):
+        self.bits = bits
+        self.memory_budget = memory_budget
+        self.n_partitions = n_partitions
+        self.spill_dir = spill_dir
+        self.n_rows = 0
+        self.nbytes = 0
+        self.chunks = []
+        self.tmp_dir = None
+        fields = [("h1", "u8"), ("h2", "u8")] if bits == 128 else [("h1", "u8")]
+        self.record = np.dtype(fields + [("row", "i8")])
+
+    @property
+    def spilled(self):
+        return self.tmp_dir is not None
+
+    def add(self, keys):
+        rows = np.arange(self.n_rows, self.n_rows + len(keys))
+        self.n_rows += len(keys)
+        if self.spilled:
+            self._spill(keys, rows)
+            return
+        self.chunks.append(keys)
+        self.nbytes += keys.nbytes
+        if self.nbytes * HASH_TABLE_OVERHEAD > self.memory_budget:
+            self.tmp_dir = tempfile.mkdtemp(prefix="dedup-", dir=self.spill_dir)
+            start = 0
+            for chunk in self.chunks:
+                self._spill(chunk, np.arange(start, start + len(chunk)))
+                start += len(chunk)
+            self.chunks = []
+            self.nbytes = 0
+
+    def _partition_path(self, partition):
+        return os.path.join(self.tmp_dir, f"part-{partition:04d}.bin")
+
+    def _spill(self, keys, rows):
+        h1 = keys if keys.ndim == 1 else keys[:, 0]
+        records = np.empty(len(keys), dtype=self.record)
+        records["h1"] = h1
+        if keys.ndim == 2:
+            records["h2"] = keys[:, 1]
+        records["row"] = rows
+        partitions = h1 % self.n_partitions
+        order = np.argsort(partitions, kind="stable")
+        bounds = np.searchsorted(partitions[order], np.arange(self.n_partitions + 1))
+        for partition in range(self.n_partitions):
+            part = records[order[bounds[partition]:bounds[partition + 1]]]
+            if len(part):
+                with open(self._partition_path(partition), "ab") as f:
+                    part.tofile(f)
+
+    def survivors(self, keep="first"):
+        """
+        Returns a boolean mask over all added rows: True for the rows to keep.
+        """
+        if not self.spilled:
+            if not self.chunks:
+                return np.ones(0, dtype=bool)
+            keys = np.concatenate(self.chunks)
+            return ~duplicated_keys(keys, keep)
+
+        keep_mask = np.zeros(self.n_rows, dtype=bool)
+        for partition in range(self.n_partitions):
+            path = self._partition_path(partition)
+            if not os.path.exists(path):
+                continue
+            # Records were appended in row order, so first/last is preserved within a partition
+            records = np.fromfile(path, dtype=self.record)
+            if self.bits == 128:
+                keys = np.column_stack([records["h1"], records["h2"]])
+            else:
+                keys = records["h1"]
+            keep_mask[records["row"][~duplicated_keys(keys, keep)]] = True
+        return keep_mask
+
+    def close(self):
+        if self.tmp_dir is not None:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            self.tmp_dir = None
+
+
+def drop_duplicates_hashed(df, subset=None, keep="first", bits=128, memory_budget=MEMORY_BUDGET, spill_dir=None,
+                           progress=None):
+    """
+    Removes duplicate rows of an in-memory DataFrame using row hash keys instead of pandas'
+    row-tuple hash table.
+    Parameters:
+        - df: pandas DataFrame
+        - subset: columns that identify a duplicate (default: all columns)
+        - keep: "first", "last" or False (drop every copy)
+        - bits: 64 or 128 bit row keys
+        - memory_budget: bytes of keys kept in memory before spilling hash partitions to disk
+        - spill_dir: directory for spilled partitions (default: system temp directory)
+        - progress: optional function called with (done, total) as the columns are hashed; an
+          exception it raises (e.g. jobs.Cancelled) stops the deduplication
+    Returns:
+        - df: pandas DataFrame without duplicate rows
+    """
+    if bits not in (64, 128):
+        raise ValueError("bits must be 64 or 128")
+    passes = 1 if bits == 64 else 2
+
+    def report(first):
+        # Each hashing pass over the columns is one share of the work
+        if progress is None:
+            return None
+        return lambda done, total: progress((0 if first else total) + done, passes * total)
+
+    frame = df if subset is None else df[list(subset)]
+    store = KeyStore(bits, memory_budget, spill_dir=spill_dir)
+    try:
+        keys = hash_rows(frame, progress=report(True))
+        if bits == 128:
+            keys = np.column_stack([keys, np.zeros_like(keys)])
+            if keys.nbytes * HASH_TABLE_OVERHEAD <= memory_budget:
+                # Rows with a unique first half cannot be duplicates: hash only the others again
+                candidates = pd.Series(keys[:, 0]).duplicated(keep=False).to_numpy()
+                keys[candidates, 1] = hash_rows(frame[candidates], SECOND_HASH_KEY, report(False))
+            else:
+                keys[:, 1] = hash_rows(frame, SECOND_HASH_KEY, report(False))
+        store.add(keys)
+        return df[store.survivors(keep)]
+    finally:
+        store.close()
+
+
+def _replay(make_chunks, spill_dir):
+    """
+    Returns (first pass, function giving a second pass) over chunks.
+    A callable is simply called twice; a one-shot iterable is written to disk during the first pass.
+    """
+    if callable(make_chunks):
+        return make_chunks(), make_chunks
+
+    tmp_dir = tempfile.mkdtemp(prefix="dedup-chunks-", dir=spill_dir)
+    paths = []
+
+    def first_pass():
+        for chunk in make_chunks:
+            path = os.path.join(tmp_dir, f"chunk-{len(paths):06d}.pkl")
+            chunk.to_pickle(path)
+            paths.append(path)
+            yield chunk
+
+    def second_pass():
+        try:
+            for path in paths:
+                yield pd.read_pickle(path)
+                os.remove(path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return first_pass(), second_pass
+
+
+def drop_duplicates_stream(chunks, subset=None, keep="first", bits=128, memory_budget=MEMORY_BUDGET, spill_dir=None):
+    """
+    Removes duplicate rows across a chunked stream. The first pass only hashes rows into a KeyStore;
+    the second pass yields each chunk without the rows that lost. Memory holds one chunk plus the
+    keys (or one partition of them once spilled).
+    Parameters:
+        - chunks: function returning a fresh iterator of DataFrames (e.g. re-reading a file), or a
+          one-shot iterable, whose chunks are then kept on disk between the passes
+        - subset, keep, bits, memory_budget, spill_dir: as in drop_duplicates_hashed
+    Yields:
+        - chunk: pandas DataFrame without duplicate rows
+    """
+    store = KeyStore(bits, memory_budget, spill_dir=spill_dir)
+    try:
+        first_pass, second_pass = _replay(chunks, spill_dir)
+        for chunk in first_pass:
+            store.add(row_keys(chunk, subset, bits))
+        keep_mask = store.survivors(keep)
+    finally:
+        store.close()
+
+    start = 0
+    for chunk in second_pass():
+        stop = start + len(chunk)
+        yield chunk[keep_mask[start:stop]]
+        start = stop
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from dedup import column_hashes, drop_duplicates_hashed, drop_duplicates_stream
+
+
+class DedupTest(unittest.TestCase):
+    def assert_same_rows(self, df, result, keep="first"):
+        pd.testing.assert_frame_equal(result, df.drop_duplicates(keep=keep))
+
+    def test_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"a": rng.integers(0, 5, 1000), "b": rng.choice(["x", "y", None], 1000)})
+        for keep in ("first", "last", False):
+            self.assert_same_rows(df, drop_duplicates_hashed(df, keep=keep), keep)
+
+    def test_subset(self):
+        df = pd.DataFrame({"a": [1, 1, 2], "b": [1, 2, 3]})
+        self.assertEqual(drop_duplicates_hashed(df, subset=["a"])["b"].tolist(), [1, 3])
+
+    def test_values_of_different_kinds_differ(self):
+        df = pd.DataFrame({"a": [1, "1", np.nan, "nan", 2, 2.0, "2"]}, dtype=object)
+        self.assert_same_rows(df, drop_duplicates_hashed(df))
+
+    def test_whole_floats_hash_like_integers(self):
+        np.testing.assert_array_equal(column_hashes(pd.Series([1, 2])), column_hashes(pd.Series([1.0, 2.0])))
+
+    def test_stream_across_chunk_types(self):
+        # CSV chunks may read the same column as int in one chunk and float in the next
+        chunks = [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [1.0, np.nan]})]
+        result = pd.concat(drop_duplicates_stream(lambda: iter(chunks)))
+        self.assertEqual(len(result), 3)
+
+    def test_stream_spills(self):
+        df = pd.DataFrame({"a": np.arange(2000) % 700})
+        chunks = [df.iloc[i:i + 500] for i in range(0, len(df), 500)]
+        result = pd.concat(drop_duplicates_stream(chunks, memory_budget=1024))
+        self.assert_same_rows(df, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
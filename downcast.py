@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from type_inference import SAMPLE_SIZE, sample_column, smallest_int_type
+
+# Object columns with fewer distinct values than this share of their rows become categorical
+CATEGORY_RATIO = 0.5
+
+
+def _numeric_values(series):
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64")
+
+
+def smallest_float_type(values):
+    """
+    Returns "float32" if every value survives a round trip through float32, else "float64".
+    float16 is not used: pandas does not support it in most operations.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        round_trip = values.astype("float32").astype("float64")
+    return "float32" if ((round_trip == values) | np.isnan(values)).all() else "float64"
+
+
+def is_low_cardinality(series, ratio=CATEGORY_RATIO, sample_size=SAMPLE_SIZE):
+    """
+    Screens a sample for repetitive values and confirms on the full column.
+    """
+    sample = sample_column(series, sample_size)
+    if len(sample) == 0 or sample.nunique() > ratio * len(sample):
+        return False
+    return series.nunique() <= ratio * series.notna().sum()
+
+
+def memory_types(df, recommendations, ratio=CATEGORY_RATIO, sample_size=SAMPLE_SIZE):
+    """
+    Turns type recommendations into compact types:
+    repetitive object columns become "category", float columns become "float32" when no value
+    loses precision, and float columns holding whole numbers and missing values become the
+    smallest nullable integer type ("Int8" ... "Int64").
+    Parameters:
+        - df: pandas DataFrame
+        - recommendations: dictionary from recommend_data_types
+        - ratio: distinct/total ratio under which object columns become categorical
+        - sample_size: rows screened before the full column is checked
+    Returns:
+        - types: dictionary with column names as keys and data types as values
+    """
+    types = {}
+    for col, dtype in recommendations.items():
+        series = df[col]
+        if dtype == "object":
+            types[col] = "category" if is_low_cardinality(series, ratio, sample_size) else dtype
+        elif dtype.startswith("float"):
+            values = _numeric_values(series)
+            missing = np.isnan(values)
+            present = values[~missing]
+            if missing.any() and len(present) and (present == np.floor(present)).all():
+                int_type = smallest_int_type(present.min(), present.max())
+                types[col] = int_type.capitalize() if int_type else smallest_float_type(values)
+            else:
+                types[col] = smallest_float_type(values)
+        else:
+            types[col] = dtype
+    return types
+
+
+def memory_report(before, after, dtypes_before, dtypes_after):
+    """
+    Builds a per-column before/after memory report.
+    Parameters:
+        - before, after: Series from DataFrame.memory_usage(deep=True, index=False)
+        - dtypes_before, dtypes_after: Series from DataFrame.dtypes
+    Returns:
+        - report: pandas DataFrame with one row per column and a "Total" row
+    """
+    report = pd.DataFrame({
+        "type before": dtypes_before.astype(str),
+        "type after": dtypes_after.astype(str),
+        "bytes before": before,
+        "bytes after": after,
+    })
+    report.loc["Total"] = ["", "", before.sum(), after.sum()]
+    report["saved %"] = (100 * (1 - report["bytes after"] / report["bytes before"].where(report["bytes before"] > 0))).round(1)
+    return report
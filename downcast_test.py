@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cleaning import optimize_memory, recommend_data_types
+from downcast import is_low_cardinality, memory_types, smallest_float_type
+
+
+class DowncastTest(unittest.TestCase):
+    def test_float32_only_when_lossless(self):
+        self.assertEqual(smallest_float_type(np.array([0.5, 1.25, np.nan])), "float32")
+        self.assertEqual(smallest_float_type(np.array([0.1, 1e300])), "float64")
+
+    def test_low_cardinality(self):
+        self.assertTrue(is_low_cardinality(pd.Series(["a", "b"] * 500)))
+        self.assertFalse(is_low_cardinality(pd.Series([f"v{i}" for i in range(1000)])))
+
+    def test_memory_types(self):
+        df = pd.DataFrame({
+            "city": ["Paris", "Lyon"] * 50,
+            "ratio": np.arange(100) / 4,
+            "count": [1.0, np.nan] * 50,
+            "big": [1e10, np.nan] * 50,
+            "name": [f"n{i}" for i in range(100)],
+        })
+        types = memory_types(df, recommend_data_types(df))
+        self.assertEqual(types, {"city": "category", "ratio": "float32", "count": "Int8", "big": "Int64", "name": "object"})
+
+    def test_optimize_memory_keeps_values(self):
+        df = pd.DataFrame({"city": ["Paris", "Lyon", None] * 100, "count": [1.0, np.nan, 300.0] * 100})
+        expected = df.copy()
+        df, report = optimize_memory(df, recommend_data_types(df))
+        self.assertEqual(str(df["city"].dtype), "category")
+        self.assertEqual(str(df["count"].dtype), "Int16")
+        self.assertEqual(df["city"].astype(object).where(df["city"].notna(), None).tolist(), expected["city"].tolist())
+        np.testing.assert_array_equal(df["count"].to_numpy(dtype="float64", na_value=np.nan), expected["count"].to_numpy())
+        self.assertLess(report.loc["Total", "bytes after"], report.loc["Total", "bytes before"])
+        self.assertEqual(list(report.index), ["city", "count", "Total"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import datetime
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+# Rows converted to a DataFrame at a time
+EXCEL_CHUNK_SIZE = 50000
+
+SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def _open(source):
+    # openpyxl is only imported when a workbook is read
+    from openpyxl import load_workbook
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    # read_only parses sheets lazily, row by row, instead of building every cell object up front
+    return load_workbook(source, read_only=True, data_only=True)
+
+
+def _missing_to_nan(values):
+    array = np.array(values, dtype=object)
+    # Missing text is NaN, as with pd.read_excel
+    array[pd.isna(array)] = np.nan
+    return array
+
+
+def list_sheets(source):
+    """
+    Returns the sheet names of a workbook. Only the workbook index (xl/workbook.xml) is read, not
+    the sheets; openpyxl would scan every sheet that does not store its dimensions.
+    """
+    try:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            root = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        return [sheet.get("name") for sheet in root.iter(f"{SPREADSHEET_NS}sheet")]
+    except (KeyError, zipfile.BadZipFile):
+        pass
+    wb = _open(source)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _column_kind(values):
+    """
+    Returns the buffer type that holds all values of a column, or None if they are all missing.
+    """
+    kinds = {type(value) for value in values if value is not None}
+    if not kinds:
+        return None
+    if kinds == {bool}:
+        return "bool"
+    if kinds == {int}:
+        return "int"
+    if kinds <= {int, float}:
+        return "float"
+    if kinds <= {datetime.datetime, datetime.date}:
+        return "datetime"
+    return "object"
+
+
+def _merge_kinds(kind, other):
+    """
+    Widens the type of a column when a chunk holds values of another type.
+    """
+    if kind is None or other is None or kind == other:
+        return kind or other
+    if {kind, other} == {"int", "float"}:
+        return "float"
+    return "object"
+
+
+def _to_array(values, kind):
+    """
+    Converts one column of a chunk into a typed array.
+    """
+    try:
+        if kind is None or kind == "float":
+            # None becomes NaN
+            return np.array(values, dtype="float64")
+        if kind == "int":
+            if None in values:
+                return pd.array(values, dtype="Int64")
+            return np.array(values, dtype="int64")
+        if kind == "bool":
+            if None in values:
+                return pd.array(values, dtype="boolean")
+            return np.array(values, dtype=bool)
+        if kind == "datetime":
+            # None becomes NaT
+            return np.array(values, dtype="datetime64[ns]")
+    except (TypeError, ValueError, OverflowError):
+        # e.g. integers beyond int64
+        pass
+    return _missing_to_nan(values)
+
+
+def _header_names(row):
+    """
+    Column names from the header row, named like pd.read_excel does: "Unnamed: i" for empty cells,
+    and "a.1", "a.2", ... for repeats of "a", so no column is lost to a repeated header.
+    """
+    names = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(row)]
+    unnamed = [i for i, value in enumerate(row) if value is None]
+    counts = {}
+    # Named columns keep their names before unnamed ones are renamed, as in pandas
+    for i in [i for i in range(len(names)) if row[i] is not None] + unnamed:
+        name = original = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def iter_excel_chunks(source, sheet=None, chunksize=EXCEL_CHUNK_SIZE, nrows=None, columns=None):
+    """
+    Streams a sheet as DataFrame chunks. Rows come from openpyxl's read-only mode and are
+    transposed into one typed array per column; the type of each column is decided on the first
+    chunk and widened (int to float, anything else to object) when a later chunk needs it.
+    Trailing empty rows are dropped, like pd.read_excel does.
+    Parameters:
+        - source: path or file-like object of an XLSX workbook
+        - sheet: sheet name (default: the first sheet)
+        - chunksize: rows per chunk
+        - nrows: maximum number of data rows (default: all)
+        - columns: columns to keep (default: all)
+    Yields:
+        - chunk: pandas DataFrame with at most chunksize rows
+    """
+    wb = _open(source)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        # Read-only sheets trust the stored dimensions, which some writers get wrong
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = _header_names(header)
+        width = len(names)
+        keep = [i for i, name in enumerate(names) if columns is None or name in columns]
+        kinds = {i: None for i in keep}
+        buffer = []
+        empty = []
+        read = 0
+
+        def flush(buffer):
+            padded = [row + (None,) * (width - len(row)) if len(row) < width else row[:width] for row in buffer]
+            values = list(zip(*padded)) if padded else [()] * width
+            data = {}
+            for i in keep:
+                kinds[i] = _merge_kinds(kinds[i], _column_kind(values[i]))
+                data[names[i]] = _to_array(values[i], kinds[i])
+            return pd.DataFrame(data)
+
+        for row in rows:
+            if nrows is not None and read >= nrows:
+                break
+            if all(value is None for value in row):
+                # Kept only if a non-empty row follows
+                empty.append(row)
+                continue
+            pending = empty + [row]
+            empty = []
+            if nrows is not None:
+                pending = pending[:nrows - read]
+            buffer.extend(pending)
+            read += len(pending)
+            while len(buffer) >= chunksize:
+                yield flush(buffer[:chunksize])
+                buffer = buffer[chunksize:]
+        if buffer or read == 0:
+            yield flush(buffer)
+    finally:
+        wb.close()
+
+
+def read_excel(source, sheet=None, columns=None, nrows=None, chunksize=EXCEL_CHUNK_SIZE):
+    """
+    Reads a sheet into a DataFrame through iter_excel_chunks.
+    Parameters:
+        - source: path or file-like object of an XLSX workbook
+        - sheet: sheet name (default: the first sheet)
+        - columns: columns to keep (default: all)
+        - nrows: maximum number of data rows, e.g. for a quick preview (default: all)
+    Returns:
+        - df: pandas DataFrame with a RangeIndex
+    """
+    chunks = list(iter_excel_chunks(source, sheet, chunksize, nrows, columns))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def excel_columns(source, sheet=None):
+    """
+    Returns the header of a sheet, reading only its first row.
+    """
+    wb = _open(source)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        header = next(ws.iter_rows(max_row=1, values_only=True), ())
+        return _header_names(header)
+    finally:
+        wb.close()
@@ -0,0 +1,52 @@
+import io
+import unittest
+
+import pandas as pd
+
+from excel import excel_columns, iter_excel_chunks, list_sheets, read_excel
+
+
+def workbook(rows, title="data"):
+    """
+    Returns an XLSX file with one sheet holding rows, as bytes.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+    for row in rows:
+        ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+class ExcelTest(unittest.TestCase):
+    def test_matches_pandas(self):
+        data = workbook([["n", "x", "t"], [1, 1.5, "a"], [2, None, "b"], [3, 2.5, None]])
+        expected = pd.read_excel(io.BytesIO(data))
+        pd.testing.assert_frame_equal(read_excel(io.BytesIO(data)), expected, check_dtype=False)
+
+    def test_chunks(self):
+        data = workbook([["n"]] + [[i] for i in range(10)])
+        chunks = list(iter_excel_chunks(io.BytesIO(data), chunksize=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(pd.concat(chunks)["n"].tolist(), list(range(10)))
+
+    def test_repeated_headers_are_renamed_like_pandas(self):
+        data = workbook([["a", "a", "a.1", None, "a"], [1, 2, 3, 4, 5]])
+        expected = list(pd.read_excel(io.BytesIO(data)).columns)
+        df = read_excel(io.BytesIO(data))
+        self.assertEqual(list(df.columns), expected)
+        self.assertEqual(df.iloc[0].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(excel_columns(io.BytesIO(data)), expected)
+
+    def test_sheets_and_columns(self):
+        data = workbook([["a", "b"], [1, 2]], title="first")
+        self.assertEqual(list_sheets(io.BytesIO(data)), ["first"])
+        self.assertEqual(list(read_excel(io.BytesIO(data), columns=["b"]).columns), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import gzip
+import io
+import tempfile
+
+from streaming import write_csv_chunks
+
+# Rows converted and written at a time
+EXPORT_CHUNK_SIZE = 50000
+
+# Exports stay in memory up to this size and move to a temporary file on disk beyond it
+SPOOL_SIZE = 32 * 1024 * 1024
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "csv.zst": "application/zstd",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+}
+
+
+def frame_chunks(df, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Yields consecutive row slices of a DataFrame (views, not copies).
+    """
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def _excel_rows(chunk):
+    """
+    Converts a chunk to rows of Python values; missing values become empty cells.
+    """
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_xlsx(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a DataFrame to an XLSX file with a write-only worksheet, which streams rows to disk
+    instead of keeping a cell object for every value.
+    Parameters:
+        - df: pandas DataFrame
+        - dest: path or writable binary file object
+        - chunksize: rows converted at a time
+    Returns:
+        - rows: number of rows written
+    """
+    # openpyxl is only imported when an XLSX file is written
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append([str(col) for col in df.columns])
+    for chunk in frame_chunks(df, chunksize):
+        for row in _excel_rows(chunk):
+            ws.append(row)
+    wb.save(dest)
+    return len(df)
+
+
+def write_csv(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a DataFrame to CSV one chunk at a time, so the whole text is never held in memory.
+    Parameters:
+        - df: pandas DataFrame
+        - dest: writable binary file object
+        - chunksize: rows formatted at a time
+    Returns:
+        - rows: number of rows written
+    """
+    text = io.TextIOWrapper(dest, encoding="utf-8", newline="")
+    try:
+        return write_csv_chunks(frame_chunks(df, chunksize), text)
+    finally:
+        # Keep dest open for the caller
+        text.flush()
+        text.detach()
+
+
+class _KeepOpen(io.RawIOBase):
+    """
+    Write-only view of a file that is not closed with the stream wrapping it.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.raw.write(data)
+
+
+def write_csv_gz(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a gzip-compressed CSV, compressing each chunk as it is formatted.
+    """
+    with gzip.GzipFile(fileobj=dest, mode="wb") as compressed:
+        return write_csv(df, compressed, chunksize)
+
+
+def write_csv_zst(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a Zstandard-compressed CSV with pyarrow's codec.
+    """
+    import pyarrow as pa
+
+    with pa.CompressedOutputStream(pa.PythonFile(_KeepOpen(dest), mode="w"), "zstd") as compressed:
+        return write_csv(df, compressed, chunksize)
+
+
+def arrow_schema(df):
+    """
+    Arrow schema of a DataFrame, computed once so every chunk is converted to the same types.
+    Categorical columns become dictionary-encoded columns.
+    """
+    import pyarrow as pa
+
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+
+def _arrow_batches(df, schema, chunksize):
+    import pyarrow as pa
+
+    for chunk in frame_chunks(df, chunksize):
+        yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def write_parquet(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a Parquet file one row group per chunk. Categorical columns keep their dictionary
+    encoding and are read back as categoricals.
+    """
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(df)
+    with pq.ParquetWriter(_KeepOpen(dest), schema, use_dictionary=True) as writer:
+        for table in _arrow_batches(df, schema, chunksize):
+            writer.write_table(table)
+    return len(df)
+
+
+def write_feather(df, dest, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Writes a Feather (Arrow IPC file) one record batch per chunk. The file is not compressed so it
+    can be memory-mapped when read back.
+    """
+    import pyarrow as pa
+
+    schema = arrow_schema(df)
+    with pa.ipc.new_file(pa.PythonFile(_KeepOpen(dest), mode="w"), schema) as writer:
+        for table in _arrow_batches(df, schema, chunksize):
+            writer.write_table(table)
+    return len(df)
+
+
+WRITERS = {
+    "csv": write_csv,
+    "csv.gz": write_csv_gz,
+    "csv.zst": write_csv_zst,
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+    "feather": write_feather,
+}
+
+
+def export_file(df, file_format, chunksize=EXPORT_CHUNK_SIZE, spool_size=SPOOL_SIZE):
+    """
+    Exports a DataFrame into a spooled temporary file.
+    Parameters:
+        - df: pandas DataFrame
+        - file_format: key of WRITERS
+        - chunksize: rows written at a time
+        - spool_size: bytes kept in memory before the file moves to disk
+    Returns:
+        - (file, nbytes): file object positioned at the start, and its size
+    """
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    output = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    WRITERS[file_format](df, output, chunksize)
+    nbytes = output.seek(0, io.SEEK_END)
+    output.seek(0)
+    return output, nbytes
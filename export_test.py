@@ -0,0 +1,36 @@
+import io
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from export import WRITERS, export_file, write_csv, write_xlsx
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"n": [1, 2, 3], "t": ["a", None, "c,d"], "f": [0.5, np.nan, 2.0]})
+
+    def test_csv_matches_to_csv(self):
+        dest = io.BytesIO()
+        self.assertEqual(write_csv(self.df, dest, chunksize=2), 3)
+        self.assertFalse(dest.closed)
+        self.assertEqual(dest.getvalue().decode(), self.df.to_csv(index=False))
+
+    def test_xlsx_round_trip(self):
+        dest = io.BytesIO()
+        self.assertEqual(write_xlsx(self.df, dest, chunksize=2), 3)
+        pd.testing.assert_frame_equal(pd.read_excel(io.BytesIO(dest.getvalue())), self.df)
+
+    def test_export_file(self):
+        output, nbytes = export_file(self.df, "csv", spool_size=1)
+        with output:
+            self.assertEqual(nbytes, len(self.df.to_csv(index=False)))
+            self.assertEqual(output.read().decode(), self.df.to_csv(index=False))
+        self.assertIn("xlsx", WRITERS)
+        with self.assertRaises(ValueError):
+            export_file(self.df, "txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
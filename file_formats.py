@@ -0,0 +1,350 @@
+import codecs
+import csv
+import io
+
+import pandas as pd
+
+from datetimes import detect_datetime_format, parse_datetimes
+from excel import excel_columns, read_excel
+from type_inference import SAMPLE_SIZE, infer_column_type, is_nullable_boolean, smallest_int_type
+
+# Bytes read from the start of a CSV to detect its encoding, delimiter, header and column types
+SNIFF_BYTES = 256 * 1024
+
+# Delimiters tried when sniffing, and encodings tried in order (latin-1 decodes anything)
+DELIMITERS = ",;\t|"
+ENCODINGS = ["utf-8", "cp1252", "latin-1"]
+
+# Formats that can be read, by file suffix (longest suffixes first)
+SUFFIXES = [
+    (".csv.gz", "csv.gz"),
+    (".csv.zst", "csv.zst"),
+    (".csv", "csv"),
+    (".xlsx", "xlsx"),
+    (".parquet", "parquet"),
+    (".feather", "feather"),
+    (".arrow", "arrow"),
+]
+
+# Extensions accepted by the uploader (Streamlit checks the last suffix only)
+UPLOAD_TYPES = ["csv", "gz", "zst", "xlsx", "parquet", "feather", "arrow"]
+
+
+def file_format(name):
+    """
+    Returns the format of a file from its name ("csv", "csv.gz", "csv.zst", "xlsx", "parquet",
+    "feather" or "arrow"). Raises ValueError for other files.
+    """
+    lower = name.lower()
+    for suffix, fmt in SUFFIXES:
+        if lower.endswith(suffix):
+            return fmt
+    raise ValueError(f"Unsupported file type: {name}")
+
+
+def _arrow_source(source, memory_map=True):
+    """
+    Opens a path or an uploaded file for pyarrow. Paths are memory-mapped, so column buffers are
+    paged in from disk instead of being read up front; uploads are wrapped without copying.
+    """
+    import pyarrow as pa
+
+    if isinstance(source, str):
+        return pa.memory_map(source) if memory_map else pa.OSFile(source)
+    if hasattr(source, "getbuffer"):
+        return pa.BufferReader(source.getbuffer())
+    return pa.PythonFile(source, mode="r")
+
+
+def _csv_stream(source, fmt):
+    """
+    Opens a CSV path or upload as a binary pyarrow stream, decompressing .csv.gz and .csv.zst.
+    The same stream type feeds the sniffer, pyarrow's CSV reader and pd.read_csv.
+    """
+    import pyarrow as pa
+
+    stream = _arrow_source(source, memory_map=False)
+    codec = {"csv.gz": "gzip", "csv.zst": "zstd"}.get(fmt)
+    return pa.CompressedInputStream(stream, codec) if codec else stream
+
+
+def _complete_lines(head, complete):
+    # Drop the partial last line of a truncated head
+    if complete or b"\n" not in head:
+        return head
+    return head[:head.rfind(b"\n") + 1]
+
+
+def sniff_csv(head, complete=False):
+    """
+    Detects the encoding, delimiter and header of a CSV from its first bytes.
+    Parameters:
+        - head: bytes from the start of the file
+        - complete: True if head is the whole file
+    Returns:
+        - options: dictionary with "encoding", "sep" and "header" (0 or None) for pd.read_csv
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    elif head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = "utf-16"
+    else:
+        encoding = None
+    lines = _complete_lines(head, complete)
+    if encoding == "utf-16":
+        text = lines[:len(lines) // 2 * 2].decode(encoding, errors="ignore")
+    elif encoding is not None:
+        text = lines.decode(encoding, errors="ignore")
+    else:
+        for encoding in ENCODINGS:
+            try:
+                text = lines.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+
+    sniffer = csv.Sniffer()
+    try:
+        sep = sniffer.sniff(text, DELIMITERS).delimiter
+    except csv.Error:
+        sep = ","
+    # Only drop the header when the sniffer finds none and the first row holds a number,
+    # which real column names rarely are
+    header = 0
+    rows = list(csv.reader(io.StringIO(text), delimiter=sep))
+    if rows:
+        try:
+            has_header = sniffer.has_header(text)
+        except csv.Error:
+            has_header = True
+        if not has_header and pd.to_numeric(pd.Series(rows[0]), errors="coerce").notna().any():
+            header = None
+    return {"encoding": encoding, "sep": sep, "header": header}
+
+
+def _csv_head(source, fmt, nbytes=SNIFF_BYTES):
+    stream = _csv_stream(source, fmt)
+    try:
+        return stream.read(nbytes)
+    finally:
+        stream.close()
+
+
+def csv_column_types(sample):
+    """
+    Runs the type recommendation on a sample and returns column -> (dtype, date format).
+    The date format is None for columns that are not dates or have no single format. Boolean
+    columns with missing values are read as booleans with missing values, like pd.read_csv does,
+    although their recommendation stays object.
+    """
+    types = {}
+    for col in sample.columns:
+        dtype = infer_column_type(sample[col])
+        if dtype == "object" and is_nullable_boolean(sample[col]):
+            dtype = "bool"
+        fmt = None
+        if dtype == "datetime64[ns]":
+            fmt = detect_datetime_format(sample[col].dropna())[1]
+        types[col] = (dtype, fmt)
+    return types
+
+
+def _arrow_type(dtype):
+    import pyarrow as pa
+
+    if dtype.lower().startswith(("int", "uint")):
+        return pa.int64()
+    if dtype.startswith("float"):
+        return pa.float64()
+    if dtype == "bool":
+        return pa.bool_()
+    if dtype == "datetime64[ns]":
+        return pa.timestamp("ns")
+    return pa.string()
+
+
+def _read_csv_arrow(source, fmt, options, types, columns, names):
+    """
+    Parses the whole file with pyarrow's multithreaded CSV reader, converting each column straight
+    to its recommended type. Date columns are parsed by pyarrow when they share one format, the
+    others are read as text. The header row is skipped and replaced by names, the column names
+    pandas gives it: pyarrow would keep repeated names, which pandas renames "a", "a.1", ...
+    """
+    import pyarrow.csv as pacsv
+
+    formats = {date_fmt for dtype, date_fmt in types.values() if dtype == "datetime64[ns]"}
+    single_format = formats.pop() if len(formats) == 1 else None
+    column_types = {}
+    for col, (dtype, date_fmt) in types.items():
+        if dtype == "datetime64[ns]" and (single_format is None or date_fmt != single_format):
+            dtype = "object"
+        column_types[col] = _arrow_type(dtype)
+    table = pacsv.read_csv(
+        _csv_stream(source, fmt),
+        read_options=pacsv.ReadOptions(encoding=options["encoding"] or "utf-8", column_names=names, skip_rows=1),
+        parse_options=pacsv.ParseOptions(delimiter=options["sep"]),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types,
+            include_columns=columns,
+            timestamp_parsers=[single_format] if single_format else None,
+            true_values=["True"],
+            false_values=["False"],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas(split_blocks=True)
+
+
+def _read_csv_pandas(source, fmt, options, types, columns):
+    """
+    Parses the whole file with pandas' C parser and explicit dtypes.
+    """
+    dtype = {}
+    for col, (col_dtype, _) in types.items():
+        if col_dtype.lower().startswith(("int", "uint")):
+            dtype[col] = "Int64"
+        elif col_dtype.startswith("float"):
+            dtype[col] = "float64"
+        elif col_dtype == "bool":
+            dtype[col] = "boolean"
+        else:
+            dtype[col] = object
+    return pd.read_csv(_csv_stream(source, fmt), usecols=columns, dtype=dtype, **options)
+
+
+def _finish_types(df, types):
+    """
+    Sizes integer columns from their actual range and parses the date columns that the reader
+    left as text with their detected format.
+    """
+    for col, (dtype, fmt) in types.items():
+        if col not in df:
+            continue
+        series = df[col]
+        if dtype == "datetime64[ns]" and not pd.api.types.is_datetime64_dtype(series.dtype):
+            df[col] = parse_datetimes(series, fmt)
+        elif dtype.lower().startswith(("int", "uint")) and pd.api.types.is_numeric_dtype(series.dtype):
+            present = series.dropna()
+            int_type = smallest_int_type(present.min(), present.max()) if len(present) else None
+            if int_type is None:
+                continue
+            has_nulls = len(present) < len(series)
+            if has_nulls or pd.api.types.is_extension_array_dtype(series.dtype):
+                int_type = int_type.capitalize()
+            df[col] = series.astype(int_type)
+    return df
+
+
+def read_csv_typed(source, fmt="csv", columns=None, sniff_bytes=SNIFF_BYTES, sample_rows=SAMPLE_SIZE):
+    """
+    Two-pass CSV ingestion. Pass 1 sniffs the encoding, delimiter and header from the first
+    sniff_bytes and runs the type recommendation on the rows found there. Pass 2 parses the whole
+    file once with those types: with pyarrow's CSV reader when possible, with pandas' C parser and
+    explicit dtypes if pyarrow rejects a value, and untyped if that fails too (e.g. text further
+    down a column that looked numeric in the sample).
+    Parameters:
+        - source: path or uploaded file
+        - fmt: "csv", "csv.gz" or "csv.zst"
+        - columns: columns to load (default: all)
+        - sniff_bytes: bytes read for pass 1
+        - sample_rows: rows of pass 1 used for the type recommendation
+    Returns:
+        - df: pandas DataFrame with integers sized to their range, dates parsed and text as object
+    """
+    head = _csv_head(source, fmt, sniff_bytes)
+    complete = len(head) < sniff_bytes
+    options = sniff_csv(head, complete)
+    lines = _complete_lines(head, complete)
+    names = list(pd.read_csv(io.BytesIO(lines), nrows=0, **options).columns)
+    sample = pd.read_csv(io.BytesIO(lines), nrows=sample_rows, usecols=columns, **options)
+    types = csv_column_types(sample)
+
+    try:
+        if options["header"] is None:
+            raise ValueError("pyarrow needs a header row")
+        df = _read_csv_arrow(source, fmt, options, types, columns, names)
+    except (ImportError, ValueError):
+        try:
+            df = _read_csv_pandas(source, fmt, options, types, columns)
+        except (TypeError, ValueError):
+            return pd.read_csv(_csv_stream(source, fmt), usecols=columns, **options)
+    return _finish_types(df, types)
+
+
+def csv_columns(source, fmt="csv"):
+    """
+    Returns the column names of a CSV from its sniffed header.
+    """
+    head = _csv_head(source, fmt)
+    complete = len(head) < SNIFF_BYTES
+    options = sniff_csv(head, complete)
+    return list(pd.read_csv(io.BytesIO(_complete_lines(head, complete)), nrows=0, **options).columns)
+
+
+def _open_ipc(source, memory_map=True):
+    import pyarrow as pa
+
+    try:
+        return pa.ipc.open_file(_arrow_source(source, memory_map))
+    except pa.ArrowInvalid:
+        # .arrow files may also hold the streaming format
+        return pa.ipc.open_stream(_arrow_source(source, memory_map))
+
+
+def _table_columns(schema):
+    # Skip the index columns pandas stores in Parquet/Arrow files
+    return [name for name in schema.names if not name.startswith("__index_level_")]
+
+
+def read_columns(source, fmt, sheet=None):
+    """
+    Lists the columns of a file without loading its data (only the header or the schema is read).
+    Parameters:
+        - source: path or uploaded file
+        - fmt: format from file_format
+        - sheet: sheet of an XLSX workbook (default: the first sheet)
+    Returns:
+        - columns: list of column names
+    """
+    if fmt.startswith("csv"):
+        return csv_columns(source, fmt)
+    if fmt == "xlsx":
+        return excel_columns(source, sheet)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return _table_columns(pq.ParquetFile(_arrow_source(source)).schema_arrow)
+    return _table_columns(_open_ipc(source).schema)
+
+
+def read_file(source, fmt, columns=None, memory_map=True, sheet=None, nrows=None):
+    """
+    Reads a file into a DataFrame, loading only the given columns. Columnar formats skip the other
+    columns on disk; CSV and XLSX still scan them but do not convert them. CSV columns are parsed
+    straight to their recommended types (read_csv_typed); XLSX sheets are streamed row by row
+    (excel.read_excel).
+    Parameters:
+        - source: path or uploaded file
+        - fmt: format from file_format
+        - columns: columns to load (default: all)
+        - memory_map: memory-map Parquet/Feather/Arrow files given by path
+        - sheet: sheet of an XLSX workbook (default: the first sheet)
+        - nrows: rows of an XLSX sheet to load, e.g. for a quick preview (default: all)
+    Returns:
+        - df: pandas DataFrame
+    """
+    columns = list(columns) if columns else None
+    if fmt.startswith("csv"):
+        return read_csv_typed(source, fmt, columns)
+    if fmt == "xlsx":
+        return read_excel(source, sheet, columns, nrows)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(_arrow_source(source, memory_map), columns=columns)
+    else:
+        table = _open_ipc(source, memory_map).read_all()
+        if columns:
+            table = table.select(columns)
+    # split_blocks avoids consolidating columns into 2D blocks, which would copy every column
+    return table.to_pandas(split_blocks=True)
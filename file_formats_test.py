@@ -0,0 +1,84 @@
+import io
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from export import export_file
+from file_formats import file_format, read_columns, read_csv_typed, read_file, sniff_csv
+
+
+class FileFormatsTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "n": [1, 2, 3],
+            "t": ["a", None, "c"],
+            "c": pd.Categorical(["x", "y", "x"]),
+        })
+
+    def exported(self, fmt):
+        output, _ = export_file(self.df, fmt, chunksize=2)
+        with output:
+            return io.BytesIO(output.read())
+
+    def test_file_format(self):
+        self.assertEqual(file_format("data.CSV.gz"), "csv.gz")
+        self.assertEqual(file_format("data.feather"), "feather")
+        with self.assertRaises(ValueError):
+            file_format("data.txt")
+
+    def test_columnar_round_trip(self):
+        for fmt in ("parquet", "feather"):
+            with self.subTest(fmt=fmt):
+                pd.testing.assert_frame_equal(read_file(self.exported(fmt), fmt), self.df)
+
+    def test_compressed_csv_round_trip(self):
+        for fmt in ("csv.gz", "csv.zst"):
+            with self.subTest(fmt=fmt):
+                df = read_file(self.exported(fmt), fmt)
+                self.assertEqual(df["n"].tolist(), [1, 2, 3])
+                self.assertEqual(df["t"].tolist()[::2], ["a", "c"])
+
+    def test_only_the_given_columns_are_loaded(self):
+        for fmt in ("parquet", "feather", "csv.gz"):
+            with self.subTest(fmt=fmt):
+                self.assertEqual(read_columns(self.exported(fmt), fmt), ["n", "t", "c"])
+                self.assertEqual(list(read_file(self.exported(fmt), fmt, columns=["t"]).columns), ["t"])
+
+    def test_paths_are_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "data.parquet")
+            with open(path, "wb") as dest:
+                dest.write(self.exported("parquet").getvalue())
+            pd.testing.assert_frame_equal(read_file(path, "parquet", columns=["n", "c"]), self.df[["n", "c"]])
+
+
+class ReadCsvTypedTest(unittest.TestCase):
+    def test_sniffs_delimiter_and_header(self):
+        self.assertEqual(sniff_csv(b"a;b\nx;1\ny;2\n", complete=True), {"encoding": "utf-8", "sep": ";", "header": 0})
+        self.assertIsNone(sniff_csv(b"1,2\n3,4\n", complete=True)["header"])
+        self.assertEqual(sniff_csv("a\né\n".encode("cp1252"), complete=True)["encoding"], "cp1252")
+
+    def test_columns_get_their_recommended_types(self):
+        csv = b"i,f,b,d,t\n1,0.5,True,2024-01-31,x\n300,,False,2024-02-01,\n"
+        df = read_csv_typed(io.BytesIO(csv))
+        self.assertEqual(df.dtypes.astype(str).tolist(), ["int16", "float64", "bool", "datetime64[ns]", "object"])
+        self.assertTrue(pd.isna(df["t"].iloc[1]))
+
+    def test_text_past_the_sample_falls_back(self):
+        csv = "n\n" + "".join(f"{i}\n" for i in range(50)) + "x\n"
+        df = read_csv_typed(io.BytesIO(csv.encode()), sample_rows=10, sniff_bytes=64)
+        self.assertEqual(df["n"].iloc[-1], "x")
+        self.assertEqual(len(df), 51)
+
+    def test_repeated_headers_are_renamed_like_pandas(self):
+        csv = b"a,a,b\n1,2,x\n3,4,y\n"
+        df = read_csv_typed(io.BytesIO(csv))
+        self.assertEqual(list(df.columns), list(pd.read_csv(io.BytesIO(csv)).columns))
+        self.assertEqual(df["a.1"].tolist(), [2, 4])
+        self.assertEqual(list(read_csv_typed(io.BytesIO(csv), columns=["a.1"]).columns), ["a.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
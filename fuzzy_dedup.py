@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+
+# Characters per shingle
+SHINGLE_SIZE = 3
+
+# Signature length and LSH banding: rows that agree on all values of one band become candidates.
+# With 16 bands of 4 values, pairs with a similarity around 0.5 or more are very likely to meet.
+NUM_PERM = 64
+BANDS = 16
+
+# Items sharing an LSH bucket are compared with up to this many neighbours, which keeps huge
+# buckets (e.g. very common values) from becoming quadratic
+MAX_BUCKET = 32
+
+# Pairs compared at a time, bounds the memory of the similarity check
+PAIR_BATCH = 100000
+
+# MinHash permutations are multiply-shift hashes of 32-bit shingle hashes
+SHIFT = np.uint64(32)
+
+SURVIVOR_RULES = ["first", "last", "most_complete"]
+
+
+def normalize_text(series):
+    """
+    Normalizes text for fuzzy comparison: lower case, accents removed, punctuation dropped and
+    whitespace collapsed.
+    Parameters:
+        - series: pandas Series
+    Returns:
+        - normalized: pandas Series of strings (missing values become "")
+    """
+    # Normalize each distinct value once
+    codes, uniques = pd.factorize(series.fillna(""))
+    text = pd.Series(uniques, dtype=object).astype(str).str.normalize("NFKD")
+    text = text.str.encode("ascii", errors="ignore").str.decode("ascii")
+    text = text.str.lower().str.replace(r"[^\w\s]", " ", regex=True)
+    text = text.str.replace(r"\s+", " ", regex=True).str.strip()
+    return pd.Series(text.to_numpy()[codes], index=series.index, dtype=object)
+
+
+def _shingles(texts):
+    """
+    Returns (item, shingle hash) arrays for every character shingle of every text.
+    """
+    items = []
+    shingles = []
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        padded = f" {text} "
+        grams = {padded[j:j + SHINGLE_SIZE] for j in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+        items.extend([i] * len(grams))
+        shingles.extend(grams)
+    hashes = pd.util.hash_array(np.array(shingles, dtype=object)) & np.uint64(0xFFFFFFFF)
+    return np.array(items, dtype="int64"), hashes
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=0):
+    """
+    Computes MinHash signatures of character shingles.
+    Parameters:
+        - texts: sequence of normalized strings
+        - num_perm: signature length
+        - seed: seed of the hash functions
+    Returns:
+        - signatures: uint32 array of shape (len(texts), num_perm); empty texts get all-max rows
+        - has_text: boolean array, False for empty texts
+    """
+    items, hashes = _shingles(texts)
+    signatures = np.full((len(texts), num_perm), np.iinfo("uint32").max, dtype="uint32")
+    has_text = np.zeros(len(texts), dtype=bool)
+    if len(items) == 0:
+        return signatures, has_text
+
+    rng = np.random.RandomState(seed)
+    a = rng.randint(0, 2 ** 63, size=num_perm, dtype="uint64") * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 2 ** 63, size=num_perm, dtype="uint64")
+    # Items are in ascending order, so each item's shingles are one contiguous run
+    starts = np.flatnonzero(np.r_[True, items[1:] != items[:-1]])
+    present = items[starts]
+    has_text[present] = True
+    with np.errstate(over="ignore"):
+        for k in range(num_perm):
+            permuted = ((a[k] * hashes + b[k]) >> SHIFT).astype("uint32")
+            signatures[present, k] = np.minimum.reduceat(permuted, starts)
+    return signatures, has_text
+
+
+def _band_keys(signatures, band, rows_per_band, blocks):
+    keys = blocks.astype("uint64") * np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over="ignore"):
+        for column in range(band * rows_per_band, (band + 1) * rows_per_band):
+            keys = (keys ^ signatures[:, column].astype("uint64")) * np.uint64(0x100000001B3)
+    return keys
+
+
+def candidate_pairs(signatures, has_text, blocks, bands=BANDS):
+    """
+    Generates candidate pairs with MinHash LSH: items that share all values of a band (and the
+    same blocking key) are candidates. Runs in O(items * bands) plus the size of the output.
+    Parameters:
+        - signatures: array from minhash_signatures
+        - has_text: boolean array, items without text are never candidates
+        - blocks: integer blocking code per item
+        - bands: number of LSH bands
+    Returns:
+        - pairs: int64 array of shape (n_pairs, 2) with left < right
+    """
+    rows_per_band = signatures.shape[1] // bands
+    items = np.flatnonzero(has_text)
+    found = []
+    for band in range(bands):
+        keys = _band_keys(signatures[items], band, rows_per_band, blocks[items])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        for distance in range(1, min(MAX_BUCKET, len(order))):
+            same = np.flatnonzero(sorted_keys[distance:] == sorted_keys[:-distance])
+            if len(same) == 0:
+                break
+            found.append(np.column_stack([items[order[same]], items[order[same + distance]]]))
+    if not found:
+        return np.empty((0, 2), dtype="int64")
+    pairs = np.sort(np.concatenate(found), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def estimated_similarity(signatures, pairs):
+    """
+    Estimates the Jaccard similarity of each pair as the share of equal signature values.
+    """
+    similarity = np.empty(len(pairs))
+    for start in range(0, len(pairs), PAIR_BATCH):
+        batch = pairs[start:start + PAIR_BATCH]
+        similarity[start:start + PAIR_BATCH] = (signatures[batch[:, 0]] == signatures[batch[:, 1]]).mean(axis=1)
+    return similarity
+
+
+def connected_components(n, pairs):
+    """
+    Labels each of n items with the smallest item number of its connected component.
+    """
+    labels = np.arange(n)
+    if len(pairs) == 0:
+        return labels
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        # Pointer jumping: follow labels to their roots
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def find_near_duplicates(df, columns, threshold=0.5, blocking=None, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Groups rows whose text in the given columns is nearly the same.
+    Values are normalized; identical normalized values are grouped directly, and the distinct
+    values are compared only when MinHash LSH makes them candidates.
+    Parameters:
+        - df: pandas DataFrame
+        - columns: columns compared fuzzily (joined into one text per row)
+        - threshold: minimum estimated Jaccard similarity of character shingles
+        - blocking: optional columns that must match exactly for rows to be compared
+        - num_perm: MinHash signature length
+        - bands: number of LSH bands
+    Returns:
+        - clusters: pandas Series aligned with df, holding the position of the first row of each row's cluster
+    """
+    text = normalize_text(df[columns[0]])
+    for col in columns[1:]:
+        text = text + " " + normalize_text(df[col])
+    text = text.str.strip()
+
+    # One item per distinct (blocking key, normalized text)
+    text_codes, text_uniques = pd.factorize(text)
+    if blocking:
+        block_codes = df[list(blocking)].groupby(list(blocking), sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        block_codes = np.zeros(len(df), dtype="int64")
+    item_codes, item_keys = pd.factorize(block_codes.astype("int64") * len(text_uniques) + text_codes)
+    item_blocks = item_keys // max(1, len(text_uniques))
+    item_texts = text_uniques[item_keys % max(1, len(text_uniques))]
+
+    signatures, has_text = minhash_signatures(item_texts, num_perm)
+    pairs = candidate_pairs(signatures, has_text, item_blocks, bands)
+    pairs = pairs[estimated_similarity(signatures, pairs) >= threshold]
+    item_labels = connected_components(len(item_keys), pairs)
+
+    # Rows without any text are never grouped
+    row_labels = item_labels[item_codes]
+    empty = ~has_text[item_codes]
+    row_labels[empty] = len(item_keys) + np.flatnonzero(empty)
+
+    # Label every cluster by its first row
+    first_row = pd.Series(np.arange(len(df))).groupby(row_labels).transform("min").to_numpy()
+    return pd.Series(first_row, index=df.index, name="cluster")
+
+
+def cluster_report(df, clusters):
+    """
+    Summarizes clusters with more than one row.
+    Parameters:
+        - df: pandas DataFrame
+        - clusters: Series from find_near_duplicates
+    Returns:
+        - report: pandas DataFrame with cluster, size and the row labels in the cluster
+    """
+    sizes = clusters.map(clusters.value_counts())
+    grouped = clusters[sizes > 1]
+    report = pd.DataFrame({"cluster": grouped.to_numpy(), "row": grouped.index})
+    report = report.groupby("cluster")["row"].agg(size="size", rows=list).reset_index()
+    return report.sort_values("size", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def choose_survivors(df, clusters, survivor="first"):
+    """
+    Picks the row kept from each cluster.
+    Parameters:
+        - df: pandas DataFrame
+        - clusters: Series from find_near_duplicates
+        - survivor: "first", "last" or "most_complete" (fewest missing values, first on ties)
+    Returns:
+        - keep: boolean numpy array aligned with df
+    """
+    labels = clusters.to_numpy()
+    positions = pd.Series(np.arange(len(df)))
+    if survivor == "first":
+        chosen = positions.groupby(labels).transform("min")
+    elif survivor == "last":
+        chosen = positions.groupby(labels).transform("max")
+    elif survivor == "most_complete":
+        missing = df.isna().sum(axis=1).to_numpy()
+        ranked = pd.DataFrame({"label": labels, "missing": missing, "position": positions})
+        ranked = ranked.sort_values(["label", "missing", "position"], kind="stable")
+        best = ranked.drop_duplicates("label").set_index("label")["position"]
+        chosen = pd.Series(labels).map(best)
+    else:
+        raise ValueError(f"Unknown survivor rule: {survivor}")
+    return chosen.to_numpy() == positions.to_numpy()
+
+
+def remove_near_duplicates(df, columns, threshold=0.5, survivor="first", blocking=None):
+    """
+    Removes near-duplicate rows, keeping one row per cluster.
+    Parameters:
+        - df: pandas DataFrame
+        - columns, threshold, blocking: as in find_near_duplicates
+        - survivor: rule from SURVIVOR_RULES
+    Returns:
+        - (df, report): DataFrame without near-duplicates and the cluster report
+    """
+    clusters = find_near_duplicates(df, columns, threshold, blocking)
+    report = cluster_report(df, clusters)
+    return df[choose_survivors(df, clusters, survivor)], report
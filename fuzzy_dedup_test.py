@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from fuzzy_dedup import connected_components, find_near_duplicates, normalize_text, remove_near_duplicates
+
+
+class FuzzyDedupTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "name": ["Acme Corporation", "ACME corporation!", "Acme Corporatoin", "Globex Inc", None, None],
+            "city": ["Paris", "Paris", "Lyon", "Paris", None, None],
+            "phone": [None, "123", "456", "789", None, None],
+        })
+
+    def test_normalize_text(self):
+        normalized = normalize_text(pd.Series(["  Crème   Brûlée!", None]))
+        self.assertEqual(normalized.tolist(), ["creme brulee", ""])
+
+    def test_typos_are_grouped(self):
+        clusters = find_near_duplicates(self.df, ["name"], threshold=0.5)
+        self.assertEqual(clusters.iloc[:4].tolist(), [0, 0, 0, 3])
+
+    def test_rows_without_text_are_never_grouped(self):
+        clusters = find_near_duplicates(self.df, ["name"])
+        self.assertNotEqual(clusters.iloc[4], clusters.iloc[5])
+
+    def test_blocking_columns_must_match(self):
+        clusters = find_near_duplicates(self.df, ["name"], blocking=["city"])
+        self.assertEqual(clusters.iloc[:3].tolist(), [0, 0, 2])
+
+    def test_survivor_rules(self):
+        kept, report = remove_near_duplicates(self.df, ["name"], survivor="first")
+        self.assertEqual(kept.index.tolist(), [0, 3, 4, 5])
+        self.assertEqual(report["size"].tolist(), [3])
+        kept, _ = remove_near_duplicates(self.df, ["name"], survivor="last")
+        self.assertEqual(kept.index.tolist(), [2, 3, 4, 5])
+        kept, _ = remove_near_duplicates(self.df, ["name"], survivor="most_complete")
+        self.assertEqual(kept.index.tolist(), [1, 3, 4, 5])
+        with self.assertRaises(ValueError):
+            remove_near_duplicates(self.df, ["name"], survivor="best")
+
+    def test_connected_components(self):
+        labels = connected_components(6, np.array([[4, 5], [1, 2], [2, 4]]))
+        self.assertEqual(labels.tolist(), [0, 1, 1, 3, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
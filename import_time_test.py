@@ -0,0 +1,42 @@
+import subprocess
+import sys
+import unittest
+
+# Modules used by batch workers and scripts, which must not need the Streamlit app
+CORE_MODULES = ["cleaning", "plan", "batch", "file_formats", "export", "streaming"]
+
+# Heavy dependencies that must only be imported on the code paths that use them
+LAZY_MODULES = ["streamlit", "openpyxl"]
+
+# Cumulative import time allowed per module; pandas alone takes most of it
+BUDGET_MS = 1000
+
+
+def import_times(module):
+    """
+    Imports a module in a new interpreter with python -X importtime and returns
+    {module name: cumulative import time in ms}.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_core_modules_import_quickly_without_the_ui(self):
+        for module in CORE_MODULES:
+            with self.subTest(module=module):
+                times = import_times(module)
+                for lazy in LAZY_MODULES:
+                    self.assertNotIn(lazy, times, f"{module} imports {lazy}")
+                self.assertLess(times[module], BUDGET_MS, f"{module} takes {times[module]:.0f} ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,296 @@
+import numpy as np
+import pandas as pd
+
+from parallel import map_columns
+
+# Values kept per numeric column to estimate the median of a stream
+SAMPLE_SIZE = 10000
+
+
+def column_kind(dtype):
+    """
+    Classifies a dtype the way automated_data_cleaning fills it:
+    "integer" (mean), "float" (median), "categorical" (mode), "datetime" (forward fill) or "other" (backward fill).
+    """
+    if pd.api.types.is_bool_dtype(dtype):
+        return "other"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "integer"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "float"
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "categorical"
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return "datetime"
+    return "other"
+
+
+def _mean(series, kind):
+    value = series.mean()
+    # Integer columns (nullable Int64 ...) cannot hold a fractional mean
+    return round(value) if kind == "integer" and pd.notna(value) else value
+
+
+def _mode(series, profile=None):
+    """
+    Most frequent category, counted with bincount on the category codes, or read from the
+    column's profile when it holds exact counts.
+    """
+    if profile is not None and profile.frequent.exact():
+        # Ties go to the first category, as with bincount
+        counts = profile.frequent.counts.reindex(series.cat.categories, fill_value=0)
+        return counts.index[counts.to_numpy().argmax()] if counts.any() else np.nan
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    return series.cat.categories[counts.argmax()] if counts.any() else np.nan
+
+
+def _column_fill(series, profile=None):
+    kind = column_kind(series.dtype)
+    if kind == "integer":
+        return ("value", _mean(series, kind))
+    if kind == "float":
+        return ("value", series.median())
+    if kind == "categorical":
+        return ("value", _mode(series, profile))
+    if kind == "datetime":
+        return ("ffill", None)
+    return ("bfill", None)
+
+
+def imputation_plan(df, workers=None, profiles=None):
+    """
+    Decides how each column with missing values is filled.
+    The null mask of the whole frame is computed in one vectorized pass, or the null counts are
+    read from the column profiles when given; statistics are only computed for the columns that
+    need them, in parallel (parallel.map_columns).
+    Parameters:
+        - df: pandas DataFrame
+        - workers: number of threads (default: parallel.WORKERS)
+        - profiles: dictionary of column -> ColumnProfile of df (optional, see column_profile.py)
+    Returns:
+        - plan: dictionary of column -> ("value", fill value), ("ffill", None) or ("bfill", None)
+    """
+    if profiles is not None and all(col in profiles for col in df.columns):
+        columns = [col for col in df.columns if profiles[col].has_nulls]
+        return map_columns(lambda series: _column_fill(series, profiles[series.name]), df, columns, workers)
+    null_counts = df.isna().sum()
+    return map_columns(_column_fill, df, null_counts.index[null_counts.to_numpy() > 0], workers)
+
+
+def fill_missing(df, plan, progress=None):
+    """
+    Fills missing values in place following an imputation plan. Each filled column is replaced
+    rather than written into, so a frame sharing its arrays with other dataset versions
+    (datastore.copy_on_write) is filled without changing them; fillna(inplace=True) would write
+    into them and copy the columns of each type into one new block.
+    Parameters:
+        - df: pandas DataFrame (modified in place)
+        - plan: dictionary from imputation_plan or ImputationStats.plan
+        - progress: optional function called with (columns filled, columns to fill) after each column
+    Returns:
+        - df: the same DataFrame
+    """
+    values = {col: value for col, (how, value) in plan.items() if how == "value" and pd.notna(value) and col in df}
+    fills = {col: how for col, (how, _) in plan.items() if how in ("ffill", "bfill") and col in df}
+    total = len(values) + len(fills)
+    for i, (col, value) in enumerate(values.items()):
+        df[col] = df[col].fillna(value)
+        if progress is not None:
+            progress(i + 1, total)
+    for i, (col, how) in enumerate(fills.items()):
+        df[col] = df[col].ffill() if how == "ffill" else df[col].bfill()
+        if progress is not None:
+            progress(len(values) + i + 1, total)
+    return df
+
+
+def _merge_kinds(previous, kind):
+    """
+    Kind of a column that is previous in some chunks and kind in others. Integers and floats make a
+    float column; any other mix (e.g. numbers in one chunk and text in another) is an object column
+    in the whole file, so it is filled like one.
+    """
+    if previous == kind:
+        return kind
+    if {previous, kind} == {"integer", "float"}:
+        return "float"
+    return "other"
+
+
+class ImputationStats:
+    """
+    Running statistics for imputing a chunked stream: pass 1 calls update() on every chunk,
+    pass 2 fills each chunk with the callable from filler(). Statistics of two streams can be
+    combined with merge().
+    Means are exact (count and sum), modes are exact (merged value counts) and medians are
+    estimated from a bottom-k sample: each value gets a random priority and the SAMPLE_SIZE
+    lowest priorities are kept, which is a uniform sample that stays uniform when merged.
+    Forward and backward fills carry values across chunk boundaries using the first and last
+    valid value of each chunk.
+    """
+
+    def __init__(self, sample_size=SAMPLE_SIZE, seed=0):
+        self.sample_size = sample_size
+        self.rng = np.random.RandomState(seed)
+        self.kinds = {}
+        # Columns whose kind was decided from non-missing values
+        self.typed = set()
+        self.nulls = {}
+        self.counts = {}
+        self.sums = {}
+        self.samples = {}
+        self.value_counts = {}
+        self.first_valid = {}
+        self.n_chunks = 0
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            series = chunk[col]
+            nulls = int(series.isna().sum())
+            self.nulls[col] = self.nulls.get(col, 0) + nulls
+            kind = column_kind(series.dtype)
+            previous = self.kinds.get(col)
+            if nulls == len(series) and previous is not None:
+                # An all-missing chunk says nothing about the column's type (CSV chunks read it as float)
+                kind = previous
+            elif previous is not None and col in self.typed:
+                kind = _merge_kinds(previous, kind)
+            self.kinds[col] = kind
+            if nulls < len(series):
+                self.typed.add(col)
+
+            if kind in ("integer", "float") and pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.dropna().to_numpy(dtype="float64")
+                self.counts[col] = self.counts.get(col, 0) + len(values)
+                self.sums[col] = self.sums.get(col, 0.0) + float(values.sum())
+                self._add_sample(col, values, self.rng.random_sample(len(values)))
+            elif kind == "categorical" and isinstance(series.dtype, pd.CategoricalDtype):
+                counts = series.value_counts()
+                self.value_counts[col] = counts.add(self.value_counts[col], fill_value=0) if col in self.value_counts else counts
+            # Kept for every column, since a later chunk may turn it into a backward-filled one
+            valid = series.first_valid_index()
+            self.first_valid.setdefault(col, [None] * self.n_chunks)
+            self.first_valid[col].append(None if valid is None else series.loc[valid])
+        self.n_chunks += 1
+        for firsts in self.first_valid.values():
+            firsts.extend([None] * (self.n_chunks - len(firsts)))
+
+    def _add_sample(self, col, values, priorities):
+        if col in self.samples:
+            old_values, old_priorities = self.samples[col]
+            values = np.concatenate([old_values, values])
+            priorities = np.concatenate([old_priorities, priorities])
+        if len(values) > self.sample_size:
+            keep = np.argpartition(priorities, self.sample_size)[:self.sample_size]
+            values, priorities = values[keep], priorities[keep]
+        self.samples[col] = (values, priorities)
+
+    def merge(self, other):
+        """
+        Adds the statistics of another stream that comes after this one.
+        """
+        for col, kind in other.kinds.items():
+            if col in self.typed and col not in other.typed:
+                kind = self.kinds[col]
+            elif col in self.typed:
+                kind = _merge_kinds(self.kinds[col], kind)
+            self.kinds[col] = kind
+        self.typed |= other.typed
+        for col, value in other.nulls.items():
+            self.nulls[col] = self.nulls.get(col, 0) + value
+        for col, value in other.counts.items():
+            self.counts[col] = self.counts.get(col, 0) + value
+        for col, value in other.sums.items():
+            self.sums[col] = self.sums.get(col, 0.0) + value
+        for col, (values, priorities) in other.samples.items():
+            self._add_sample(col, values, priorities)
+        for col, counts in other.value_counts.items():
+            self.value_counts[col] = counts.add(self.value_counts[col], fill_value=0) if col in self.value_counts else counts
+        for col in set(self.first_valid) | set(other.first_valid):
+            self.first_valid[col] = (self.first_valid.get(col, [None] * self.n_chunks)
+                                     + other.first_valid.get(col, [None] * other.n_chunks))
+        self.n_chunks += other.n_chunks
+        return self
+
+    def plan(self):
+        """
+        Returns the imputation plan for the columns that had missing values.
+        """
+        plan = {}
+        for col, kind in self.kinds.items():
+            if not self.nulls.get(col):
+                continue
+            if kind == "integer":
+                mean = self.sums[col] / self.counts[col] if self.counts.get(col) else np.nan
+                plan[col] = ("value", round(mean) if pd.notna(mean) else mean)
+            elif kind == "float":
+                values = self.samples.get(col, (np.empty(0), None))[0]
+                plan[col] = ("value", float(np.median(values)) if len(values) else np.nan)
+            elif kind == "categorical":
+                counts = self.value_counts.get(col)
+                plan[col] = ("value", counts.idxmax() if counts is not None and len(counts) and counts.max() > 0 else np.nan)
+            elif kind == "datetime":
+                plan[col] = ("ffill", None)
+            else:
+                plan[col] = ("bfill", None)
+        return plan
+
+    def filler(self):
+        """
+        Returns a function that fills the chunks of pass 2, which must be the same chunks, in the
+        same order, as the ones given to update().
+        """
+        plan = self.plan()
+        # For each chunk, the first valid value in any later chunk (for backward fill)
+        next_valid = {}
+        for col, firsts in self.first_valid.items():
+            following = [None] * len(firsts)
+            value = None
+            for i in range(len(firsts) - 1, -1, -1):
+                following[i] = value
+                if firsts[i] is not None:
+                    value = firsts[i]
+            next_valid[col] = following
+        state = {"chunk": 0, "last_valid": {}}
+
+        def fill(chunk):
+            i = state["chunk"]
+            fill_missing(chunk, {col: step for col, step in plan.items() if step[0] == "value"})
+            for col, (how, _) in plan.items():
+                if col not in chunk:
+                    continue
+                if how == "ffill":
+                    carry = state["last_valid"].get(col)
+                    filled = chunk[col].ffill()
+                    if carry is not None:
+                        filled = filled.fillna(carry)
+                    chunk[col] = filled
+                    last = filled.last_valid_index()
+                    if last is not None:
+                        state["last_valid"][col] = filled.loc[last]
+                elif how == "bfill":
+                    filled = chunk[col].bfill()
+                    carry = next_valid.get(col, [])[i] if i < len(next_valid.get(col, [])) else None
+                    if carry is not None:
+                        filled = filled.fillna(carry)
+                    chunk[col] = filled
+            state["chunk"] += 1
+            return chunk
+
+        return fill
+
+
+def collect_imputation_stats(chunks, sample_size=SAMPLE_SIZE):
+    """
+    Runs pass 1 of a streamed imputation.
+    Parameters:
+        - chunks: iterable of pandas DataFrames
+        - sample_size: values kept per numeric column to estimate its median
+    Returns:
+        - stats: ImputationStats
+    """
+    stats = ImputationStats(sample_size)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
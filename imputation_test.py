@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cleaning import automated_data_cleaning
+from imputation import ImputationStats, collect_imputation_stats, fill_missing
+
+
+class ImputationTest(unittest.TestCase):
+    def test_fills_by_column_type(self):
+        df = pd.DataFrame({
+            "i": pd.array([1, None, 4], dtype="Int64"),
+            "f": [1.0, np.nan, 3.0],
+            "c": pd.Categorical(["x", None, "x"]),
+            "d": pd.to_datetime(["2024-01-01", None, "2024-01-03"]),
+            "t": ["a", None, "b"],
+        })
+        df = automated_data_cleaning(df)
+        self.assertEqual(df["i"].tolist(), [1, 2, 4])
+        self.assertEqual(df["f"].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(df["c"].tolist(), ["x", "x", "x"])
+        self.assertEqual(df["d"].iloc[1], pd.Timestamp("2024-01-01"))
+        self.assertEqual(df["t"].tolist(), ["a", "b", "b"])
+
+    def test_filled_columns_are_replaced_not_written_into(self):
+        values = np.array([1.0, np.nan])
+        df = pd.DataFrame({"f": values}, copy=False)
+        fill_missing(df, {"f": ("value", 0.0)})
+        self.assertTrue(np.isnan(values[1]))
+        self.assertEqual(df["f"].tolist(), [1.0, 0.0])
+
+    def test_stream_fills_across_chunks(self):
+        chunks = [pd.DataFrame({"f": [1.0, np.nan], "t": [None, None]}),
+                  pd.DataFrame({"f": [3.0, np.nan], "t": [None, "z"]})]
+        stats = collect_imputation_stats(chunks)
+        fill = stats.filler()
+        result = pd.concat([fill(chunk.copy()) for chunk in chunks])
+        self.assertEqual(result["f"].tolist(), [1.0, 2.0, 3.0, 2.0])
+        self.assertEqual(result["t"].tolist(), ["z", "z", "z", "z"])
+
+    def test_merge_equals_one_stream(self):
+        first, second = pd.DataFrame({"i": [1, None]}), pd.DataFrame({"i": [5, 6]})
+        merged = collect_imputation_stats([first]).merge(collect_imputation_stats([second]))
+        self.assertEqual(merged.plan(), collect_imputation_stats([first, second]).plan())
+
+    def test_type_conflict_between_chunks(self):
+        stats = ImputationStats()
+        stats.update(pd.DataFrame({"a": [1.0, np.nan]}))
+        stats.update(pd.DataFrame({"a": ["x", None]}))
+        self.assertEqual(stats.kinds["a"], "other")
+        self.assertEqual(stats.plan()["a"], ("bfill", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cleaning import apply_data_type_recommendations, recommend_data_types
+from type_inference import infer_column_type, is_nullable_boolean
+
+
+class InferenceTest(unittest.TestCase):
+    def test_numeric_text(self):
+        self.assertEqual(infer_column_type(pd.Series(["1", "2", "30000"], dtype=object)), "int16")
+        self.assertEqual(infer_column_type(pd.Series(["1.5", "2", None], dtype=object)), "float64")
+
+    def test_native_integers_get_the_smallest_type(self):
+        self.assertEqual(infer_column_type(pd.Series([0, 100, -5])), "int8")
+
+    def test_boolean_text(self):
+        self.assertEqual(infer_column_type(pd.Series(["True", "False", "True"], dtype=object)), "bool")
+
+    def test_booleans_with_gaps_are_not_numbers(self):
+        series = pd.Series([True, np.nan, False], dtype=object)
+        self.assertEqual(infer_column_type(series), "object")
+        self.assertTrue(is_nullable_boolean(series))
+        self.assertFalse(is_nullable_boolean(pd.Series([1, np.nan, 0], dtype=object)))
+
+    def test_dates(self):
+        series = pd.Series(["2024-01-01", "2024-02-15", "2024-03-31"], dtype=object)
+        self.assertEqual(infer_column_type(series), "datetime64[ns]")
+
+    def test_text(self):
+        self.assertEqual(infer_column_type(pd.Series(["a", "b", "1"], dtype=object)), "object")
+
+    def test_recommendations_can_be_applied(self):
+        df = pd.DataFrame({"n": ["1", "2", "3"], "flag": ["True", "False", "False"], "name": ["a", "b", "c"]})
+        df = apply_data_type_recommendations(df, recommend_data_types(df))
+        self.assertEqual(df["n"].tolist(), [1, 2, 3])
+        self.assertEqual(df["flag"].tolist(), [True, False, False])
+        self.assertEqual(df["name"].dtype, object)
+
+    def test_integers_beyond_int64_can_be_applied(self):
+        df = pd.DataFrame({"n": ["12345678901234567890", "1"], "m": ["123456789012345678901234", "-1"]})
+        recommendations = recommend_data_types(df)
+        self.assertEqual(recommendations, {"n": "float64", "m": "float64"})
+        df = apply_data_type_recommendations(df, recommendations)
+        self.assertEqual(df["m"].tolist(), [1.2345678901234568e23, -1.0])
+
+    def test_text_in_a_number_column_raises(self):
+        with self.assertRaises(ValueError):
+            apply_data_type_recommendations(pd.DataFrame({"n": ["1", "x"]}), {"n": "int64"})
+
+
+if __name__ == "__main__":
+    unittest.main()
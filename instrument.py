@@ -0,0 +1,288 @@
+import functools
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+from cache import sizeof
+
+# Measurements kept in memory per server process
+MAX_RECORDS = 1000
+
+# Measurements are also appended to this JSON-lines file when it is set
+LOG_PATH = os.environ.get("CLEANER_PERF_LOG")
+
+# Lines of profiler output kept per measurement
+PROFILE_LINES = 25
+
+PROFILERS = ["cProfile", "pyinstrument"]
+
+# Seconds between two samples of the resident set size during a measurement
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def _current_rss():
+    """
+    Current resident set size of the process in bytes, or None where it is not available. Read
+    from /proc/self/statm on Linux, else from psutil if it is installed.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class _RssSampler:
+    """
+    Samples the current resident set size in a background thread while a measured block runs. The
+    peak of the process (ru_maxrss) only ever grows, so after one large operation it says nothing
+    about the next ones; the highest sample is the peak of this block.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.start = _current_rss()
+        self.peak = self.start
+        self._stopped = threading.Event()
+        self._thread = None
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        rss = _current_rss()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            self._sample()
+
+    def stop(self):
+        """
+        Stops sampling and returns (resident set size at the start, peak), in bytes or None.
+        """
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._sample()
+        return self.start, self.peak
+
+
+# Measurements running now, by id of their record, shared by the threads of the process
+_running = {}
+_running_lock = threading.Lock()
+
+
+def _enter(record):
+    """
+    Registers a measurement that starts. Measurements of other threads running at the same time
+    are marked as overlapping on both sides: CPU time, resident set size and traced allocations
+    are counted for the whole process, so their figures include the other operations' share.
+    """
+    thread = threading.get_ident()
+    with _running_lock:
+        for other in _running.values():
+            if other["_thread"] != thread:
+                other["overlapping"] += 1
+                record["overlapping"] += 1
+        _running[id(record)] = record
+
+
+def _leave(record):
+    with _running_lock:
+        _running.pop(id(record), None)
+
+
+def frame_rows(value):
+    """
+    Rows of a DataFrame, or of the first item of a (DataFrame, report) result; None otherwise.
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+def frame_bytes(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    # Estimated from a sample of the text values (cache.sizeof)
+    return sizeof(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+class Recorder:
+    """
+    Keeps the latest measurements (see measure), shared by the threads and sessions of the server,
+    and appends them to a JSON-lines file when log_path is set. With a profiler set, every
+    measured call is also profiled and the hottest functions are kept with its measurement.
+    """
+
+    def __init__(self, max_records=MAX_RECORDS, log_path=LOG_PATH):
+        self.entries = deque(maxlen=max_records)
+        self.log_path = log_path
+        # None, "cProfile" or "pyinstrument"
+        self.profiler = None
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.entries.append(record)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def records(self):
+        with self.lock:
+            return list(self.entries)
+
+    def to_json_lines(self):
+        return "".join(json.dumps(record, default=str) + "\n" for record in self.records())
+
+    def summary(self):
+        """
+        Returns one row per operation: number of calls and total and maximum wall time, CPU time
+        and peak memory, slowest first. overlapped_calls counts the calls whose CPU time and memory
+        include other operations running at the same time (see measure).
+        """
+        records = pd.DataFrame(self.records())
+        if records.empty:
+            return records
+        summary = records.groupby("operation").agg(
+            calls=("wall_s", "size"), wall_s=("wall_s", "sum"), max_wall_s=("wall_s", "max"),
+            cpu_s=("cpu_s", "sum"), max_rss_growth_mb=("rss_growth_mb", "max"),
+            overlapped_calls=("process_wide", "sum"))
+        return summary.sort_values("wall_s", ascending=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+@contextmanager
+def _profiled(profiler, record):
+    if profiler is None:
+        yield
+        return
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            record["profile"] = "pyinstrument is not installed"
+            yield
+            return
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            record["profile"] = "\n".join(session.output_text(unicode=False, color=False).splitlines()[:PROFILE_LINES])
+        return
+
+    import cProfile
+    import pstats
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        out = io.StringIO()
+        pstats.Stats(session, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        record["profile"] = out.getvalue()
+
+
+@contextmanager
+def measure(operation, rows_in=None, bytes_in=None, into=None):
+    """
+    Measures the code in its block: wall time, CPU time of the process (so parallel column work is
+    counted), the peak of the resident set size sampled during the block (rss_peak_mb) and its
+    growth over the size at the start (rss_growth_mb) and, when tracemalloc is on, the peak of
+    traced allocations. CPU time, resident set size and traced allocations are figures of the
+    whole process: when other measured operations ran at the same time (jobs of other sessions),
+    overlapping counts them and process_wide is True, as these figures then include their share.
+    The caller may fill in rows_out and bytes_out (and any other detail) on the yielded record,
+    which is recorded when the block ends, also when it raises.
+    Parameters:
+        - operation: name of the operation
+        - rows_in, bytes_in: size of the input, if known
+        - into: Recorder (default: the shared recorder)
+    Yields:
+        - record: dictionary of the measurement
+    """
+    into = recorder if into is None else into
+    record = {"operation": operation, "started": time.time(), "rows_in": rows_in, "rows_out": None,
+              "bytes_in": bytes_in, "bytes_out": None, "thread": threading.current_thread().name,
+              "overlapping": 0, "_thread": threading.get_ident()}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        traced_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    _enter(record)
+    sampler = _RssSampler()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with _profiled(into.profiler, record):
+            yield record
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["wall_s"] = time.perf_counter() - wall
+        record["cpu_s"] = time.process_time() - cpu
+        rss_start, rss_peak = sampler.stop()
+        record["rss_peak_mb"] = None if rss_peak is None else rss_peak / 2 ** 20
+        record["rss_growth_mb"] = None if rss_peak is None else (rss_peak - rss_start) / 2 ** 20
+        if tracing:
+            record["traced_peak_mb"] = (tracemalloc.get_traced_memory()[1] - traced_before) / 2 ** 20
+        _leave(record)
+        del record["_thread"]
+        record["process_wide"] = record["overlapping"] > 0
+        into.add(record)
+
+
+def instrumented(operation, func, into=None):
+    """
+    Wraps a function taking a DataFrame first so that every call is measured, with its rows and
+    estimated bytes in and out.
+    """
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        with measure(operation, frame_rows(df), frame_bytes(df), into) as record:
+            result = func(df, *args, **kwargs)
+            record["rows_out"] = frame_rows(result)
+            record["bytes_out"] = frame_bytes(result)
+        return result
+
+    return wrapper
+
+
+def memory_tracing():
+    return tracemalloc.is_tracing()
+
+
+def set_memory_tracing(enabled):
+    """
+    Starts or stops tracemalloc, which adds the peak of traced allocations to each measurement
+    but slows allocation-heavy code down.
+    """
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# Shared by all sessions of the server process
+recorder = Recorder()
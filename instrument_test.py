@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from instrument import Recorder, instrumented, measure, memory_tracing, set_memory_tracing
+
+
+class InstrumentTest(unittest.TestCase):
+    def setUp(self):
+        self.recorder = Recorder()
+
+    def test_rows_and_bytes_in_and_out(self):
+        drop_first = instrumented("drop_first", lambda df: df.iloc[1:], into=self.recorder)
+        drop_first(pd.DataFrame({"a": range(10)}))
+        record, = self.recorder.records()
+        self.assertEqual((record["operation"], record["rows_in"], record["rows_out"]), ("drop_first", 10, 9))
+        self.assertGreater(record["bytes_in"], record["bytes_out"])
+        self.assertGreaterEqual(record["wall_s"], 0)
+        self.assertFalse(record["process_wide"])
+        self.assertNotIn("_thread", record)
+
+    def test_resident_set_size_is_sampled(self):
+        with measure("allocate", into=self.recorder):
+            block = bytearray(64 * 2 ** 20)
+            block[::4096] = b"x" * len(block[::4096])
+        record, = self.recorder.records()
+        if record["rss_peak_mb"] is None:
+            self.skipTest("resident set size is not available")
+        self.assertGreater(record["rss_growth_mb"], 32)
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(ZeroDivisionError):
+            with measure("fail", into=self.recorder):
+                1 / 0
+        self.assertEqual(self.recorder.records()[0]["error"], "ZeroDivisionError: division by zero")
+
+    def test_overlapping_measurements_are_process_wide(self):
+        inside, release = threading.Event(), threading.Event()
+
+        def other():
+            with measure("other", into=self.recorder):
+                inside.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        inside.wait(5)
+        with measure("this", into=self.recorder):
+            pass
+        release.set()
+        thread.join()
+        records = {record["operation"]: record for record in self.recorder.records()}
+        self.assertTrue(records["this"]["process_wide"])
+        self.assertEqual(records["other"]["overlapping"], 1)
+        summary = self.recorder.summary()
+        self.assertEqual(summary.loc["this", "overlapped_calls"], 1)
+
+    def test_profile_and_traced_allocations(self):
+        self.recorder.profiler = "cProfile"
+        tracing = memory_tracing()
+        set_memory_tracing(True)
+        try:
+            with measure("profiled", into=self.recorder):
+                sorted(range(1000))
+        finally:
+            set_memory_tracing(tracing)
+        record, = self.recorder.records()
+        self.assertIn("function calls", record["profile"])
+        self.assertIn("traced_peak_mb", record)
+
+    def test_log_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "perf.jsonl")
+            recorder = Recorder(log_path=path)
+            with measure("logged", into=recorder):
+                pass
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline())["operation"], "logged")
+            self.assertEqual(recorder.to_json_lines().count("\n"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Background operations run at the same time across all sessions of the server
+JOB_WORKERS = 4
+
+# Rows processed between two progress updates of a chunked operation
+JOB_CHUNK_SIZE = 200000
+
+# Seconds a finished job waits for its session to collect it; then it is dropped with its result
+JOB_TTL = 15 * 60
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a job when it was cancelled; the job stops at its next progress update.
+    """
+
+
+class Job:
+    """
+    One operation running in the background. The function run by the job reports its progress
+    with update(), which is also where a cancelled job stops. Everything the job computes stays
+    on the job (result or error) until its session collects it, so a rerun of the script does
+    not lose or repeat the work.
+    """
+
+    def __init__(self, job_id, session, name, info=None):
+        self.id = job_id
+        self.session = session
+        self.name = name
+        # Anything the caller needs when the job finishes (e.g. the history it computes)
+        self.info = info or {}
+        self.fraction = 0.0
+        self.message = ""
+        self.started = time.monotonic()
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    def update(self, done, total, message=None):
+        """
+        Reports progress as done out of total units of work; raises Cancelled if the job was cancelled.
+        """
+        if self._cancel.is_set():
+            raise Cancelled()
+        self.fraction = min(1.0, done / total) if total else 1.0
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None:
+            # Not started yet: it never runs
+            self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return "cancelling" if self._cancel.is_set() else "running"
+        if self.future.cancelled() or isinstance(self.future.exception(), Cancelled):
+            return "cancelled"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def result(self):
+        return self.future.result()
+
+    def error(self):
+        return None if self.future.cancelled() else self.future.exception()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def _finish(self, future):
+        self.finished = time.monotonic()
+
+
+class JobRunner:
+    """
+    Runs jobs for the Streamlit sessions in a shared thread pool. Threads rather than processes:
+    results are DataFrames that go into the in-process caches, and the pandas work of the
+    cleaning operations releases the GIL for much of its time.
+
+    A finished job is kept until its session collects it (forget), or for ttl seconds if the
+    session never comes back (closed tab, expired session), so abandoned results do not pile up.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="cleaning-job")
+        self.ttl = ttl
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, session, name, func, *args, info=None, **kwargs):
+        """
+        Starts func(*args, job=job, **kwargs) in the background and returns the Job.
+        """
+        with self.lock:
+            self._expire()
+            job = Job(next(self.ids), session, name, info)
+            self.jobs[job.id] = job
+        job.future = self.pool.submit(func, *args, job=job, **kwargs)
+        job.future.add_done_callback(job._finish)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            self._expire()
+            return self.jobs.get(job_id)
+
+    def session_jobs(self, session):
+        with self.lock:
+            self._expire()
+            return [job for job in self.jobs.values() if job.session == session]
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished is not None and now - job.finished > self.ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def forget(self, job_id):
+        """
+        Drops a finished job once its session has collected the result.
+        """
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+
+def run_chunked(func, data, job, done=0, total=1, chunk_size=JOB_CHUNK_SIZE):
+    """
+    Runs a row-local operation chunk by chunk so that it reports progress and can be cancelled
+    between chunks.
+    Parameters:
+        - func: function taking a chunk of data and returning its result (DataFrame or Series), whose
+          result on a row does not depend on the other rows; it must not modify the chunk in place
+        - data: pandas DataFrame or Series
+        - job: Job reporting the progress
+        - done, total: units of work already done and in total; this call is one unit
+        - chunk_size: rows per chunk
+    Returns:
+        - result: the chunks' results concatenated
+    """
+    chunks = []
+    starts = range(0, max(len(data), 1), chunk_size)
+    for i, start in enumerate(starts):
+        job.update(done + i / len(starts), total)
+        chunks.append(func(data.iloc[start:start + chunk_size]))
+    job.update(done + 1, total)
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+
+# Shared by all sessions of the server process
+runner = JobRunner()
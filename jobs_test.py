@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import jobs
+from dedup import drop_duplicates_hashed
+from jobs import Cancelled, JobRunner, run_chunked
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class JobsTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = JobRunner(workers=2)
+
+    def tearDown(self):
+        self.runner.pool.shutdown(wait=True)
+
+    def test_result_and_progress(self):
+        def work(n, job):
+            job.update(1, 2, "half")
+            return n * 2
+
+        job = self.runner.submit("s1", "double", work, 21)
+        _wait(job)
+        self.assertEqual((job.status, job.result(), job.fraction, job.message), ("done", 42, 0.5, "half"))
+        self.assertEqual(self.runner.session_jobs("s1"), [job])
+        self.assertEqual(self.runner.session_jobs("s2"), [])
+        self.runner.forget(job.id)
+        self.assertIsNone(self.runner.get(job.id))
+
+    def test_cancel_stops_at_the_next_update(self):
+        started = threading.Event()
+
+        def work(job):
+            started.set()
+            while True:
+                job.update(0, 1)
+                time.sleep(0.01)
+
+        job = self.runner.submit("s1", "loop", work)
+        started.wait(5)
+        job.cancel()
+        _wait(job)
+        self.assertEqual(job.status, "cancelled")
+        self.assertIsInstance(job.future.exception(), Cancelled)
+
+    def test_failures_are_kept_on_the_job(self):
+        job = self.runner.submit("s1", "fail", lambda job: 1 / 0)
+        _wait(job)
+        self.assertEqual(job.status, "failed")
+        self.assertIsInstance(job.error(), ZeroDivisionError)
+
+    def test_uncollected_jobs_expire(self):
+        self.runner.ttl = 10
+        job = self.runner.submit("s1", "noop", lambda job: None)
+        _wait(job)
+        time.sleep(0.01)
+        self.assertIs(self.runner.get(job.id), job)
+        with mock.patch.object(jobs.time, "monotonic", return_value=job.finished + 11):
+            self.assertIsNone(self.runner.get(job.id))
+
+
+class RunChunkedTest(unittest.TestCase):
+    def test_chunks_are_concatenated_with_progress(self):
+        job = mock.Mock()
+        df = pd.DataFrame({"a": range(10)})
+        result = run_chunked(lambda chunk: chunk * 2, df, job, done=1, total=2, chunk_size=4)
+        pd.testing.assert_frame_equal(result, df * 2)
+        self.assertEqual([call.args for call in job.update.call_args_list],
+                         [(1, 2), (1 + 1 / 3, 2), (1 + 2 / 3, 2), (2, 2)])
+        pd.testing.assert_series_equal(run_chunked(lambda chunk: chunk + 1, df["a"], job, chunk_size=3), df["a"] + 1)
+
+    def test_cancelled_between_chunks(self):
+        job = jobs.Job(1, "s1", "chunks")
+        calls = []
+
+        def func(chunk):
+            calls.append(len(chunk))
+            job.cancel()
+            return chunk
+
+        with self.assertRaises(Cancelled):
+            run_chunked(func, pd.DataFrame({"a": range(10)}), job, chunk_size=4)
+        self.assertEqual(calls, [4])
+
+    def test_duplicate_removal_reports_progress(self):
+        calls = []
+        drop_duplicates_hashed(pd.DataFrame({"a": [1, 1, 2], "b": ["x", "x", "y"]}),
+                               progress=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls[-1], (4, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
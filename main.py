@@ -1,145 +1,387 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-import base64
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl import Workbook
-import numpy as np
-
-def remove_duplicates(df):
-    return df.drop_duplicates()
-
-def recommend_data_types(df):
+from datetime import datetime
+from type_inference import SAMPLE_SIZE
+from datetimes import get_date_index
+from functools import partial
+from streaming import CHUNK_SIZE, STREAM_DIR, cast_chunk, date_formats, resolve_stream_path, stream_clean_csv, widen_for_stream
+from dedup import drop_duplicates_stream
+from fuzzy_dedup import SURVIVOR_RULES
+from imputation import collect_imputation_stats
+from streaming import apply_steps, read_chunks
+from cleaning import (IN_PLACE_OPERATIONS, OPERATIONS, PROGRESS_OPERATIONS, ROW_LOCAL_OPERATIONS, parse_replace_rules,
+                      recommend_data_types, remove_outdated, replace_text_in_column)
+from cache import artifacts, content_hash, sizeof, version_key
+from export import MIME_TYPES, export_file
+from file_formats import UPLOAD_TYPES, file_format, read_columns, read_file
+from excel import list_sheets
+from plan import optimize_plan, plan_from_json, plan_to_json
+from column_profile import get_profiles
+from versions import apply_delta, go_to, redo, undo, versions
+from datastore import copy_on_write, store
+from jobs import run_chunked, runner
+from instrument import PROFILERS, measure, memory_tracing, recorder, set_memory_tracing
+import time
+import uuid
+from preview import PAGE_SIZE, PAGE_SIZES, displayable, get_page, page_count, view_positions, view_rows
+
+# Seconds between two updates of the progress bar of a background job
+PROGRESS_INTERVAL = 0.25
+
+def stream_large_csv():
     """
-    Recommends data types for each column in a pandas DataFrame based on its unique values.
-    Parameters:
-        - df: pandas DataFrame
-    Returns:
-        - recommendations: dictionary with column names as keys and recommended data types as values
+    Sidebar section that cleans a CSV or XLSX file on the server chunk by chunk, for files too large to upload.
+    Only the row-local operations are offered: replace text, remove outdated data and apply recommended types.
+    Files are read and written only inside CLEANER_STREAM_DIR (streaming.STREAM_DIR), since the app may be
+    used by anyone who can open it; main() hides the section when it is not set.
     """
-    # Initialize recommendations
-    recommendations = {}
+    with st.sidebar.expander("Stream large CSV file"):
+        source_path = st.text_input(f"CSV or XLSX file in {STREAM_DIR}:")
+        output_path = st.text_input(f"Cleaned CSV to write in {STREAM_DIR}:")
+        chunk_size = int(st.number_input("Rows per chunk:", min_value=1000, value=CHUNK_SIZE, step=10000))
+        if not source_path:
+            return
+        try:
+            source_path = resolve_stream_path(source_path)
+            output_path = resolve_stream_path(output_path) if output_path else None
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if source_path == output_path:
+            st.error("The cleaned file must not overwrite the file it is cleaned from.")
+            return
+
+        sheet = None
+        if source_path.lower().endswith(".xlsx"):
+            sheet = st.selectbox("Sheet:", list_sheets(source_path), key="stream_sheet")
+
+        # Column names, type recommendations and date formats come from the first rows only
+        head = next(iter(read_chunks(source_path, SAMPLE_SIZE, sheet)))
+        steps = []
+
+        if st.checkbox("Replace text", key="stream_replace"):
+            col_to_replace = st.selectbox("Select column to replace text:", head.columns, key="stream_replace_col")
+            old_text = st.text_input("Enter text to replace:", key="stream_old_text")
+            new_text = st.text_input("Enter replacement text:", key="stream_new_text")
+            steps.append(partial(replace_text_in_column, col_name=col_to_replace, old_text=old_text, new_text=new_text))
+
+        if st.checkbox("Remove outdated data", key="stream_outdated"):
+            date_col = st.selectbox("Select date column:", head.columns, key="stream_date_col")
+            start_date = st.date_input("Select start date:", key="stream_start_date")
+            end_date = st.date_input("Select end date:", key="stream_end_date")
+            time_filter = [datetime.combine(start_date, datetime.min.time()),
+                           datetime.combine(end_date, datetime.max.time())]
+            steps.append(partial(remove_outdated, date_col=date_col, time_filter=time_filter,
+                                 date_format=date_formats(head, [date_col]).get(date_col)))
+
+        if st.checkbox("Apply recommended data types", key="stream_types"):
+            recommendations = widen_for_stream(recommend_data_types(head))
+            st.write("Recommended data types:", recommendations)
+            formats = date_formats(head, [col for col, dtype in recommendations.items() if dtype == "datetime64[ns]"])
+            steps.append(partial(cast_chunk, recommendations=recommendations, date_formats=formats))
+
+        fill_missing_values = st.checkbox("Auto fill missing values", key="stream_fill")
+
+        stages = []
+        if st.checkbox("Remove duplicates", key="stream_dedup"):
+            subset = st.multiselect("Columns that identify a duplicate (all if empty):", head.columns, key="stream_dedup_subset")
+            keep = st.selectbox("Keep:", ["first", "last"], key="stream_dedup_keep")
+            # The chunks between the two passes are spilled to disk
+            stages.append(partial(drop_duplicates_stream, subset=subset or None, keep=keep))
+
+        if st.button("Clean file") and output_path:
+            status = st.empty()
+
+            def progress(rows_read, rows_written):
+                status.write(f"Read {rows_read} rows, wrote {rows_written} rows.")
+
+            try:
+                if fill_missing_values:
+                    # Pass 1 collects the fill values over the whole file, pass 2 fills each chunk
+                    status.write("Collecting statistics for missing values...")
+                    stats = collect_imputation_stats(apply_steps(read_chunks(source_path, chunk_size, sheet), steps))
+                    steps.append(stats.filler())
+
+                rows_read, rows_written = stream_clean_csv(source_path, output_path, steps, chunk_size, progress, stages, sheet=sheet)
+            except ValueError as e:
+                # A later chunk does not fit the types or date formats found on the first rows
+                st.error(f"Could not clean the file: {e}")
+                return
+            st.write(f"Wrote {rows_written} of {rows_read} rows to {output_path}.")
+
+
+def read_upload(uploaded_file):
+    fmt = file_format(uploaded_file.name)
+    with measure(f"read {fmt}", bytes_in=uploaded_file.size) as record:
+        # Only the columns picked in the sidebar are loaded (all if none), from the chosen sheet and up to the row limit
+        df = read_file(uploaded_file, fmt, st.session_state.get("load_columns"),
+                       sheet=st.session_state.get("load_sheet"), nrows=st.session_state.get("load_rows") or None)
+        record["rows_out"] = len(df)
+    return df
 
-    # Iterate over columns
-    for col in df.columns:
-        # Get unique values in column as strings
-        unique_vals = df[col].astype(str).unique()
+def session_id():
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
 
-        # Check if column has any missing values
-        if pd.isnull(unique_vals).any():
-            recommendations[col] = "object"
-            continue
-
-        # Check for boolean columns
-        if len(unique_vals) == 2 and set(unique_vals) == {"False", "True"}:
-            recommendations[col] = "bool"
-            continue
+def cache_version(key, df, delta, session, nbytes=None):
+    """
+    Caches a version and charges it to the session that created it (datastore.DatasetStore.charge). A
+    version is counted for what it adds to its parent: the columns it replaced, or the whole frame when
+    its rows were filtered, since its other columns are the parent's arrays. nbytes overrides this when
+    the caller knows what the version allocated.
+    """
+    if nbytes is None:
+        filtered = delta is None or delta.rows is not None or delta.frame is not None
+        nbytes = sizeof(df) if filtered else delta.__sizeof__()
+    artifacts.put((key, "frame"), df, nbytes)
+    store.charge(session, (key, "frame"), nbytes)
+    return df
 
-        # Check for datetime columns
-        try:
-            pd.to_datetime(unique_vals)
-            recommendations[col] = "datetime64[ns]"
-            continue
-        except ValueError:
-            pass
-
-        # Check for integer columns
-        if all([val.isdigit() or (val.startswith("-") and val[1:].isdigit()) for val in unique_vals]):
-            int_min = np.min([int(val) for val in unique_vals])
-            int_max = np.max([int(val) for val in unique_vals])
-            if -128 <= int_min and int_max <= 127:
-                recommendations[col] = "int8"
-            elif -32768 <= int_min and int_max <= 32767:
-                recommendations[col] = "int16"
-            elif -2147483648 <= int_min and int_max <= 2147483647:
-                recommendations[col] = "int32"
-            else:
-                recommendations[col] = "int64"
-            continue
+def load_version(uploaded_file, dataset_key, history):
+    """
+    Returns a version of the uploaded dataset: the parsed upload with the operations in history applied.
+    The upload is parsed once per server and shared read-only by all sessions (datastore.py). Versions are
+    cached by content hash plus history, so each one is computed once and not on every rerun; an evicted
+    version is rebuilt from its closest cached parent with the delta recorded for each later step
+    (versions.py), or by running the step again if it has no delta.
+    """
+    key = version_key(dataset_key, history)
+    df = artifacts.get((key, "frame"))
+    if df is not None:
+        return df
+    if not history:
+        return store.base(dataset_key, lambda: read_upload(uploaded_file))
+    parent = load_version(uploaded_file, dataset_key, history[:-1])
+    if key in versions:
+        delta = versions.delta(key)
+        return cache_version(key, apply_delta(parent, delta), delta, session_id())
+    df, _ = run_operation(parent, dataset_key, history)
+    return df
 
-        # Check for floating point columns
-        if all([val.replace(".", "", 1).isdigit() or (val.startswith("-") and val[1:].replace(".", "", 1).isdigit()) for val in unique_vals]):
-            recommendations[col] = "float64"
+def run_operation(parent, dataset_key, history, job=None, step=0, steps=1):
+    """
+    Applies the last operation of history to the version before it, caches the result and records
+    it as a delta against the version before it. Operations that modify their input get a frame
+    sharing the columns of the version before it, not a copy. In a background job, row-local operations run
+    chunk by chunk on the only column they change, which then replaces that column in a frame sharing the
+    others, and the operations of PROGRESS_OPERATIONS get job.update as their progress function, so they
+    report their progress and stop early when the job is cancelled.
+    Returns the new version and the operation's report (None for operations without one).
+    """
+    op = dict(history[-1])
+    name = op.pop("op")
+    parent_version = version_key(dataset_key, history[:-1])
+    nbytes = None
+    if job is not None and name in ROW_LOCAL_OPERATIONS:
+        # Measured once for all chunks rather than per chunk
+        operation = OPERATIONS[name].__wrapped__
+        col = op[ROW_LOCAL_OPERATIONS[name]]
+        with measure(name, len(parent)) as record:
+            # Each chunk of the column goes into a new one-column frame, so the operation replaces the
+            # column there and never writes into the parent's array
+            column = run_chunked(lambda chunk: operation(chunk.to_frame(), None, **op)[col], parent[col], job, step, steps)
+            df = copy_on_write(parent)
+            df[col] = column
+            record["rows_out"] = len(df)
+        nbytes = sizeof(column)
+        report = None
+    else:
+        df = copy_on_write(parent) if name in IN_PLACE_OPERATIONS else parent
+        if job is not None and name in PROGRESS_OPERATIONS:
+            op["progress"] = lambda done, total: job.update(step + done / total, steps)
+        result = OPERATIONS[name](df, parent_version, **op)
+        df, report = result if isinstance(result, tuple) else (result, None)
+    key = version_key(dataset_key, history)
+    delta = versions.add(key, parent_version, parent, df)
+    cache_version(key, df, delta, job.session if job is not None else session_id(), nbytes)
+    return df, report
+
+def compute_steps(parent, dataset_key, history, start, job):
+    """
+    Runs in a background job: computes the versions of history after its first start steps,
+    parent being the version after those steps. Versions already cached or recorded as deltas
+    are not computed again.
+    Returns (last version, report of the last step).
+    """
+    df, report = parent, None
+    steps = len(history) - start
+    for i in range(start, len(history)):
+        job.update(i - start, steps, f"Step {i + 1} of {len(history)}: {history[i]['op']}")
+        key = version_key(dataset_key, history[:i + 1])
+        cached = artifacts.get((key, "frame"))
+        if cached is None and key in versions:
+            delta = versions.delta(key)
+            cached = cache_version(key, apply_delta(df, delta), delta, job.session)
+        if cached is not None:
+            df, report = cached, None
             continue
+        df, report = run_operation(df, dataset_key, history[:i + 1], job, i - start, steps)
+    job.update(steps, steps)
+    return df, report
 
-        # Default to object column
-        recommendations[col] = "object"
-
-    return recommendations
-def apply_data_type_recommendations(df, recommendations):
+def start_job(parent, dataset_key, start, history, name, message):
     """
-    Applies recommended data types to the columns in a pandas DataFrame.
+    Starts computing the versions of history in the background (jobs.py). The session's history
+    is only updated when the job finishes (follow_job), so reruns meanwhile keep the current version.
     Parameters:
-        - df: pandas DataFrame
-        - recommendations: dictionary with column names as keys and recommended data types as values
-    Returns:
-        - df: pandas DataFrame with updated data types
+        - parent: version after the first start steps of history
+        - message: text shown when the job is done, or a function of the last step's report giving it
     """
-    for col, dtype in recommendations.items():
-        df[col] = df[col].astype(dtype)
-    
-    return df
+    if st.session_state.get("job") is not None:
+        st.warning("Another operation is still running. Wait for it or cancel it first.")
+        return
+    job = runner.submit(session_id(), name, compute_steps, parent, dataset_key, history, start,
+                        info=dict(dataset_key=dataset_key, history=history, message=message))
+    st.session_state.job = job.id
+
+def start_operation(df, dataset_key, name, message, **params):
+    """
+    Starts an operation on the current version df in the background.
+    """
+    history = st.session_state.history + [dict(op=name, **params)]
+    start_job(df, dataset_key, len(st.session_state.history), history, name, message)
 
-def remove_outdated(df, date_col, time_filter):
-    cutoff_date = None
-    
-    if time_filter:
-        cutoff_date = time_filter
-    
-    if cutoff_date:
-        mask = pd.to_datetime(df[date_col]) >= cutoff_date
-        df = df.loc[mask]
-    
+def follow_job(dataset_key):
+    """
+    Shows the progress of the session's background job with a Cancel button and waits for it.
+    A click elsewhere reruns the script without stopping the job, which is picked up again here.
+    Returns the new version when the job finished in this rerun, else None.
+    """
+    job_id = st.session_state.get("job")
+    job = runner.get(job_id) if job_id is not None else None
+    if job is None:
+        if job_id is not None:
+            st.info("The last operation finished too long ago and its result was discarded. Run it again.")
+        st.session_state.job = None
+        return None
+    if not job.done():
+        st.subheader(f"Running {job.name}")
+        bar = st.progress(job.fraction)
+        status = st.empty()
+        if st.button("Cancel", key="cancel_job"):
+            job.cancel()
+        while not job.done():
+            bar.progress(job.fraction)
+            status.write(f"{job.message} ({job.elapsed():.0f}s)")
+            time.sleep(PROGRESS_INTERVAL)
+        bar.empty()
+        status.empty()
+    st.session_state.job = None
+    runner.forget(job.id)
+    if job.status == "cancelled":
+        st.info(f"Cancelled {job.name}.")
+        return None
+    if job.status == "failed":
+        st.error(f"Could not apply {job.name}: {job.error()}")
+        return None
+    if job.info["dataset_key"] != dataset_key:
+        # The upload changed while the job ran
+        return None
+    df, report = job.result()
+    st.session_state.history = job.info["history"]
+    # A new step starts a new branch: the undone steps can no longer be redone
+    st.session_state.redo = []
+    message = job.info["message"]
+    st.write(message(report) if callable(message) else message)
+    if isinstance(report, pd.DataFrame):
+        st.dataframe(report)
     return df
 
-def replace_text_in_column(df, col_name, old_text, new_text):
-    col_dtype = df[col_name].dtype
-    
-    if col_dtype == 'int64':
-        new_text = int(new_text)
-    elif col_dtype == 'float64':
-        new_text = float(new_text)
-    elif col_dtype == 'bool':
-        new_text = bool(new_text)
-    elif col_dtype == 'datetime64[ns]':
-        new_text = pd.to_datetime(new_text)
-    
-    df[col_name] = df[col_name].astype(str).str.replace(old_text, str(new_text))
-    df[col_name] = df[col_name].astype(col_dtype)
-    
-    return df
-def automated_data_cleaning(data):
-    # Copy the original data to avoid modifying the original dataset
-    cleaned_data = data.copy()
-
-    # Automatic Data Type Recognition
-    data_types = cleaned_data.dtypes
-    numeric_cols = data_types[data_types.apply(lambda x: pd.api.types.is_numeric_dtype(x))].index
-    categorical_cols = data_types[data_types.apply(lambda x: pd.api.types.is_categorical_dtype(x))].index
-    datetime_cols = data_types[data_types.apply(lambda x: pd.api.types.is_datetime64_dtype(x))].index
-
-    # Automatic Missing Value Imputation
-    for col in cleaned_data.columns:
-        if cleaned_data[col].isnull().any():
-            if col in numeric_cols:
-                # Fill missing values with mean or median of the column
-                if pd.api.types.is_integer_dtype(cleaned_data[col]):
-                    cleaned_data[col].fillna(cleaned_data[col].mean(), inplace=True)
-                else:
-                    cleaned_data[col].fillna(cleaned_data[col].median(), inplace=True)
-            elif col in categorical_cols:
-                # Fill missing values with most frequent value in the column
-                cleaned_data[col].fillna(cleaned_data[col].mode()[0], inplace=True)
-            elif col in datetime_cols:
-                # Fill missing values with forward fill
-                cleaned_data[col].fillna(method='ffill', inplace=True)
-            else:
-                # Fill missing values with next available value in the column
-                cleaned_data[col] = cleaned_data[col].fillna(method='bfill')
+def profile_columns(df, version):
+    """
+    Column profiles of a version (column_profile.py), measured when they are computed.
+    """
+    key = (version, "profile")
+    if key in artifacts:
+        return get_profiles(df, version)
+    with measure("profile columns", len(df)):
+        return get_profiles(df, version)
+
+def recommend_types(df, version):
+    profiles = profile_columns(df, version)
+    with measure("recommend_data_types", len(df)) as record:
+        recommendations = recommend_data_types(df, dataset_key=version, profiles=profiles)
+        record["columns"] = len(recommendations)
+    return recommendations
+
+def performance_panel():
+    """
+    Sidebar panel with the timings and memory of the latest operations and I/O steps (instrument.py),
+    exported as JSON lines. Memory tracing and profiling apply to the whole server while they are on:
+    they are only changed when a session changes them (on_change), and the widgets of a new session
+    start from the server's current settings, so reruns of other sessions do not turn them back off.
+    """
+    with st.sidebar.expander("Performance"):
+        st.checkbox("Trace memory allocations (slower)", value=memory_tracing(), key="perf_trace",
+                    on_change=lambda: set_memory_tracing(st.session_state.perf_trace))
+        options = [None] + PROFILERS
+        st.selectbox("Profile each operation with:", options, index=options.index(recorder.profiler),
+                     format_func=lambda name: name or "off", key="perf_profiler",
+                     on_change=lambda: setattr(recorder, "profiler", st.session_state.perf_profiler))
+        st.write(f"Cached versions created by this session: {store.usage(session_id()) / 2 ** 20:.1f} MB "
+                 f"of {store.session_bytes / 2 ** 20:.0f} MB")
+        records = recorder.records()
+        if not records:
+            st.write("No operation measured yet.")
+            return
+        st.write("Totals per operation:")
+        st.dataframe(recorder.summary())
+        latest = pd.DataFrame(records[::-1]).drop(columns=["profile"], errors="ignore")
+        st.write("Latest operations:")
+        st.dataframe(latest.head(50))
+        profiled = [i for i, record in enumerate(records) if "profile" in record]
+        if profiled:
+            i = st.selectbox("Profile of:", profiled[::-1], format_func=lambda i: f"{records[i]['operation']} ({records[i]['wall_s']:.2f}s)")
+            st.text(records[i]["profile"])
+        st.download_button("Download measurements (JSON lines)", recorder.to_json_lines(), file_name="performance.jsonl", mime="application/x-ndjson")
+        if st.button("Clear measurements"):
+            recorder.clear()
+
+def show_preview(df, version, key):
+    """
+    Shows one page of a dataset version. Sorting and filtering run on the server over the whole
+    frame (preview.py, cached per version); only the rows of the current page are sent to the
+    browser, so the cost of a rerun does not grow with the size of the data.
+    """
+    with st.expander("Sort, filter and page", expanded=False):
+        sort_by = st.selectbox("Sort by:", [None] + list(df.columns), key=f"{key}_sort")
+        ascending = st.checkbox("Ascending", value=True, key=f"{key}_ascending")
+        filter_col = st.selectbox("Filter column:", [None] + list(df.columns), key=f"{key}_filter_col")
+        filter_text = st.text_input("Rows containing:", key=f"{key}_filter_text")
+        page_size = st.selectbox("Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE), key=f"{key}_page_size")
+    positions = view_positions(df, version, sort_by, ascending, filter_col, filter_text)
+    rows = view_rows(df, positions)
+    pages = page_count(rows, page_size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        # The data or the filter changed since the page was picked
+        st.session_state[f"{key}_page"] = 1
+    page = int(st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, key=f"{key}_page")) - 1
+    st.dataframe(displayable(get_page(df, positions, page, page_size)), height=500)
+    first = min(rows, page * page_size + 1)
+    st.caption(f"Rows {first}-{min(rows, (page + 1) * page_size)} of {rows}" + (f" ({len(df)} in total)" if rows != len(df) else ""))
+
+def download_cleaned_data(cleaned_data, uploaded_file, dataset_key):
+    """
+    Offers the current version for download. The file is only written when the user asks for it,
+    streamed into a spooled temporary file (export.py) and kept in the artifact cache, so later
+    reruns serve the same file instead of exporting again.
+    """
+    version = version_key(dataset_key, st.session_state.history)
+    formats = list(MIME_TYPES)
+    original_format = file_format(uploaded_file.name)
+    selected_format = st.selectbox("Download format:", formats, index=formats.index(original_format) if original_format in formats else 0)
+    key = (version, "export", selected_format)
+    if key not in artifacts and st.button(f"Prepare {selected_format.upper()} download"):
+        with measure(f"write {selected_format}", len(cleaned_data)) as record:
+            output, nbytes = export_file(cleaned_data, selected_format)
+            record["bytes_out"] = nbytes
+        artifacts.put(key, output, nbytes)
+    output = artifacts.get(key)
+    if output is not None:
+        output.seek(0)
+        st.download_button(f"Download {selected_format.upper()}", output, file_name=f"cleaned_data.{selected_format}", mime=MIME_TYPES[selected_format])
 
-    return cleaned_data
-    
 def main():
     # Set Streamlit app title
     st.set_page_config(page_title="Dirty Data Cleaner", page_icon=":wrench:")
@@ -150,7 +392,7 @@ def main():
 
     # Step 1: Upload & Inspect Data
     st.subheader("Step 1: Upload & Inspect Data")
-    st.write("Upload your CSV or XLSX file using the file uploader on the left sidebar.")
+    st.write("Upload your CSV (optionally .csv.gz or .csv.zst), XLSX, Parquet, Feather or Arrow file using the file uploader on the left sidebar.")
     st.write("Once uploaded, you can view the original data and apply various data cleaning operations.")
 
     # Step 2: Data Type Recommendations
@@ -184,14 +426,50 @@ def main():
 
     # Define a variable to store the cleaned data
     cleaned_data = None
+    # Files too large to upload are cleaned from disk in chunks, inside the configured directory only
+    if STREAM_DIR:
+        st.sidebar.title("Large Files")
+        stream_large_csv()
     # Upload file and display original data
     st.sidebar.title("Upload & Inspect Data")
-    uploaded_file = st.sidebar.file_uploader("Choose a CSV or XLSX file", type=["csv", "xlsx"])
+    uploaded_file = st.sidebar.file_uploader("Choose a CSV, XLSX, Parquet, Feather or Arrow file", type=UPLOAD_TYPES)
     if uploaded_file is not None:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        try:
+            file_format(uploaded_file.name)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        # Identifies this upload across reruns; the parsed frame and everything derived from it are cached under it
+        dataset_key = content_hash(uploaded_file.getvalue())
+        load_options = {}
+        sheet = None
+        if file_format(uploaded_file.name) == "xlsx":
+            # Sheets are listed without loading them; only the chosen one is read, optionally only its first rows
+            sheets = artifacts.get_or_compute((dataset_key, "sheets"), lambda: list_sheets(uploaded_file))
+            sheet = st.sidebar.selectbox("Sheet:", sheets, key="load_sheet")
+            load_rows = int(st.sidebar.number_input("Rows to load (0 for all):", min_value=0, value=0, step=1000, key="load_rows"))
+            load_options.update(sheet=sheet, rows=load_rows)
+        # Only the header or schema is read to list the columns
+        all_columns = artifacts.get_or_compute(
+            (dataset_key, "columns", sheet), lambda: read_columns(uploaded_file, file_format(uploaded_file.name), sheet))
+        load_columns = st.sidebar.multiselect("Columns to load (all if empty):", all_columns, key="load_columns")
+        if load_columns:
+            load_options.update(columns=load_columns)
+        if load_options:
+            dataset_key = version_key(dataset_key, [load_options])
+        # Clear history if user uploads a new file
+        if st.session_state.get("dataset_key") != dataset_key:
+            st.session_state.dataset_key = dataset_key
+            st.session_state.history = []
+            st.session_state.redo = []
+            # The versions of the previous upload no longer count against this session's budget
+            store.release(session_id())
+        original = load_version(uploaded_file, dataset_key, [])
+        # Operations apply to the current version, i.e. the upload with every recorded step applied
+        df = load_version(uploaded_file, dataset_key, st.session_state.history)
+        version = version_key(dataset_key, st.session_state.history)
+        if st.session_state.history:
+            cleaned_data = df
 
         # Initialize values for showing/hiding sections
         show_original = True
@@ -211,102 +489,146 @@ def main():
         # Show original data
         if show_original:
             st.subheader("Original Data")
-            st.dataframe(df, height=500)
+            show_preview(original, dataset_key, "original")
         # Sidebar options to inspect data and clean it
         with st.sidebar.expander("Recommend data types for columns"):
-            recommendations = recommend_data_types(df)
+            recommendations = artifacts.get_or_compute(
+                (version, "recommendations"), lambda: recommend_types(df, version))
             st.write("Recommended data types:", recommendations)
             # Inside the "Recommend data types for columns" expander
             if st.button("Apply Recommendations"):
-                cleaned_data = apply_data_type_recommendations(df, recommendations)
-                st.write("Changed data types of recommended columns.")
-                if show_cleaned:
-                    st.subheader("Cleaned Data")
-                    st.dataframe(cleaned_data, height=500)
+                start_operation(df, dataset_key, "apply_data_type_recommendations", "Changed data types of recommended columns.",
+                                recommendations=recommendations)
+            if st.button("Optimize Memory"):
+                start_operation(df, dataset_key, "optimize_memory", "Memory usage per column:", recommendations=recommendations)
         with st.sidebar.expander("View column data types"):
             col_to_dtype = {col: st.selectbox(col, ['int', 'float', 'object', 'bool', 'datetime64[ns]'], key=col) for col in df.columns}
             if st.button("Change Data Types"):
-                df = df.astype(col_to_dtype)
-                cleaned_data = df.astype(col_to_dtype)
-                st.write("Changed data types of selected columns.")
-                if show_cleaned:
-                    st.subheader("Cleaned Data")
-                    st.dataframe(cleaned_data, height=500)       
+                start_operation(df, dataset_key, "change_data_types", "Changed data types of selected columns.", types=col_to_dtype)
 
         with st.sidebar.expander("Show unique values in column"):
             col = st.selectbox("Select column:", df.columns)
-            unique_values = df[col].astype(str).unique()
-            st.write(f"Unique values in {col} column:", unique_values.tolist())
+            # Bounded summary computed once per version, instead of listing every distinct value
+            profile = profile_columns(df, version)[col]
+            st.write(profile.summary())
+            top = profile.top()
+            if profile.frequent.exact():
+                st.write(f"Most frequent values in {col} column:")
+            else:
+                st.write(f"Most frequent values in {col} column (counts may be up to {profile.frequent.error} too low):")
+            st.dataframe(pd.DataFrame({"value": top.index.astype(str), "count": top.to_numpy()}))
+            values = profile.values()
+            if values is not None:
+                st.write(f"Unique values in {col} column:", values.astype(str).tolist())
+            else:
+                st.write(f"Sample of {col} column:", profile.sample().astype(str).head(100).tolist())
         # Sidebar section
         with st.sidebar.expander("Replace text in column"):
             col_to_replace = st.selectbox("Select column to replace text:", df.columns)
             old_text = st.text_input("Enter text to replace:")
             new_text = st.text_input("Enter replacement text:")
+            batch_rules = st.text_area("Or several replacements, one \"old -> new\" per line:")
 
 
             if st.button("Replace Text"):
-                cleaned_data = replace_text_in_column(df, col_to_replace, old_text, new_text)
-                st.write("Replaced text in column:", col_to_replace)
-                if show_cleaned:
-                    st.subheader("Cleaned Data")
-                    st.dataframe(cleaned_data, height=500)
+                rules = parse_replace_rules(batch_rules) if batch_rules.strip() else {old_text: new_text}
+                start_operation(df, dataset_key, "replace_text", f"Replaced text in column: {col_to_replace}",
+                                col_name=col_to_replace, rules=rules)
         # Sidebar options to clean data
         st.sidebar.title("Data Cleaning Options")
         with st.sidebar.expander("Remove duplicates"):
+            dedup_subset = st.multiselect("Columns that identify a duplicate (all if empty):", df.columns)
+            dedup_keep = st.selectbox("Keep:", ["first", "last", "none"])
             if st.button("Remove Duplicates"):
-                df = remove_duplicates(df)
-                cleaned_data = remove_duplicates(df)
-                st.write("Removed duplicate rows.")
-                if show_cleaned:
-                    st.subheader("Cleaned Data")
-                    st.dataframe(cleaned_data, height=500)
+                start_operation(df, dataset_key, "remove_duplicates", "Removed duplicate rows.",
+                                subset=dedup_subset or None, keep=False if dedup_keep == "none" else dedup_keep)
+        with st.sidebar.expander("Remove near-duplicates"):
+            fuzzy_cols = st.multiselect("Columns to compare fuzzily:", df.columns)
+            blocking_cols = st.multiselect("Columns that must match exactly (optional):", df.columns)
+            threshold = st.slider("Similarity threshold:", 0.3, 1.0, 0.5, 0.05)
+            survivor = st.selectbox("Row to keep from each cluster:", SURVIVOR_RULES)
+            if st.button("Remove Near-Duplicates") and fuzzy_cols:
+                start_operation(df, dataset_key, "remove_near_duplicates", lambda report: f"Found {len(report)} clusters of near-duplicate rows.",
+                                columns=fuzzy_cols, threshold=threshold, survivor=survivor, blocking=blocking_cols or None)
         with st.sidebar.expander("Remove outdated data"):
             date_col = st.selectbox("Select date column:", df.columns)
-            start_date = st.date_input("Select start date:")
-            end_date = st.date_input("Select end date:")
-            start_time = st.time_input("Select start time:")
-            end_time = st.time_input("Select end time:")
+            # Sorted index of the column, built once per dataset and reused while the inputs change
+            date_index = get_date_index(df, date_col, version)
+            if date_index is not None and len(date_index):
+                min_date, max_date = date_index.min, date_index.max
+            else:
+                min_date = max_date = datetime.now()
+            start_date = st.date_input("Select start date:", value=min_date.date())
+            end_date = st.date_input("Select end date:", value=max_date.date())
+            start_time = st.time_input("Select start time:", value=datetime.min.time())
+            end_time = st.time_input("Select end time:", value=datetime.max.time().replace(microsecond=0))
             start_datetime = datetime.combine(start_date, start_time)
             end_datetime = datetime.combine(end_date, end_time)
             time_filter = [start_datetime, end_datetime]
+            if date_index is not None:
+                st.write(f"Rows in range: {date_index.count(start_datetime, end_datetime)} of {len(df)}")
 
             if st.button("Remove Outdated Data"):
-                cleaned_data = remove_outdated(df, date_col, time_filter)
-                st.write("Removed outdated rows.")
-
-                if show_cleaned:
-                    st.subheader("Cleaned Data")
-                    st.dataframe(cleaned_data, height=500)
+                if date_index is None:
+                    st.error(f"Column {date_col} does not contain dates.")
+                else:
+                    start_operation(df, dataset_key, "remove_outdated", "Removed outdated rows.", date_col=date_col, time_filter=time_filter)
         with st.sidebar.expander("Auto fill missing values"):
             if st.button("Auto fill missing values"):
-                df = automated_data_cleaning(df)
-                cleaned_data = df
-                st.subheader("Cleaned Data")
-                st.dataframe(cleaned_data, height=500)
-
-        # Show cleaned data
-        if show_cleaned:
+                start_operation(df, dataset_key, "automated_data_cleaning", "Filled missing values.")
+
+        # Steps applied so far, saved as a cleaning plan that can be replayed on another file
+        with st.sidebar.expander("Cleaning plan"):
+            if st.session_state.history:
+                st.write([step["op"] for step in st.session_state.history])
+                st.download_button("Download plan", plan_to_json(st.session_state.history), file_name="cleaning_plan.json", mime="application/json")
+                if st.button("Optimize steps"):
+                    # Same result with fewer or cheaper steps, computed from the upload in the background
+                    start_job(original, dataset_key, 0, optimize_plan(st.session_state.history), "optimized steps", "Optimized the cleaning steps.")
+                if st.button("Reset cleaning steps"):
+                    # The steps can be redone from "Version history"
+                    st.session_state.history, st.session_state.redo = go_to(st.session_state.history, st.session_state.redo, 0)
+                    cleaned_data = None
+            plan_file = st.file_uploader("Replay a saved plan:", type=["json"])
+            if plan_file is not None and st.button("Apply plan"):
+                try:
+                    steps = optimize_plan(plan_from_json(plan_file.getvalue()))
+                    start_job(df, dataset_key, len(st.session_state.history), st.session_state.history + steps, "plan",
+                              f"Applied {len(steps)} steps.")
+                except (KeyError, TypeError, ValueError) as e:
+                    st.error(f"Could not read the plan: {e}")
+
+        # Every version of this session: going back is cheap, versions are rebuilt from cached frames and deltas
+        with st.sidebar.expander("Version history"):
+            history = st.session_state.history
+            labels = ["0: uploaded data"] + [f"{i + 1}: {step['op']}" for i, step in enumerate(history)]
+            st.write(labels)
+            new_history = None
+            if st.button("Undo", disabled=not history):
+                new_history, st.session_state.redo = undo(history, st.session_state.redo)
+            if st.button("Redo", disabled=not st.session_state.redo):
+                new_history, st.session_state.redo = redo(history, st.session_state.redo)
+            target = st.selectbox("Version:", range(len(labels)), index=len(labels) - 1, format_func=lambda n: labels[n])
+            if st.button("Go to version (view or download it below)") and target < len(history):
+                new_history, st.session_state.redo = go_to(history, st.session_state.redo, target)
+            if new_history is not None:
+                st.session_state.history = new_history
+                cleaned_data = load_version(uploaded_file, dataset_key, new_history) if new_history else None
+
+        # Operation started by a button above or in an earlier rerun
+        job_result = follow_job(dataset_key)
+        if job_result is not None:
+            cleaned_data = job_result
+
+        # Show cleaned data, once per rerun, after any operation of this rerun has been applied
+        if show_cleaned and cleaned_data is not None:
             st.subheader("Cleaned Data")
-            st.dataframe(cleaned_data, height=500)
+            show_preview(cleaned_data, version_key(dataset_key, st.session_state.history), "cleaned")
             # Download cleaned data as file
-            file_format = uploaded_file.name.split(".")[-1]
+            download_cleaned_data(cleaned_data, uploaded_file, dataset_key)
 
-            if file_format == 'csv':
-                data = cleaned_data.to_csv(index=False)
-            else:
-                wb = Workbook()
-                ws = wb.active
-                for r in dataframe_to_rows(cleaned_data, index=False, header=True):
-                    ws.append(r)
-                data = openpyxl.writer.excel.save_virtual_workbook(wb)
-
-            b64 = base64.b64encode(data).decode()
-            href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="cleaned_data.{file_format}"><button>Download {file_format.upper()}</button></a>'
-            st.markdown(href, unsafe_allow_html=True)
-            # Clear history if user uploads a new file
-            if uploaded_file != st.session_state.get('uploaded_file', None):
-                st.session_state.uploaded_file = uploaded_file
-                st.session_state.cleaned_data = []
+    # Last, so that it includes what ran in this rerun
+    performance_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cleaning import remove_outdated
+from datetimes import SortedDateIndex, clear_datetime_cache
+
+
+class RemoveOutdatedTest(unittest.TestCase):
+    def setUp(self):
+        clear_datetime_cache()
+        self.df = pd.DataFrame({
+            "date": ["2024-03-01", "2024-01-01", None, "2024-02-01", "2023-12-31"],
+            "n": range(5),
+        })
+
+    def test_range_keeps_the_original_order(self):
+        result = remove_outdated(self.df, "date", ["2024-01-01", "2024-03-01"], "v1")
+        self.assertEqual(result["n"].tolist(), [0, 1, 3])
+
+    def test_open_ends(self):
+        self.assertEqual(remove_outdated(self.df, "date", [None, "2024-01-01"])["n"].tolist(), [1, 4])
+        self.assertEqual(remove_outdated(self.df, "date", "2024-02-01")["n"].tolist(), [0, 3])
+
+    def test_rows_without_a_date_are_removed(self):
+        self.assertEqual(remove_outdated(self.df, "date", [None, None])["n"].tolist(), [0, 1, 3, 4])
+
+    def test_empty_filter_keeps_every_row(self):
+        self.assertIs(remove_outdated(self.df, "date", None), self.df)
+
+    def test_text_column_raises(self):
+        with self.assertRaises(ValueError):
+            remove_outdated(pd.DataFrame({"t": ["a", "b"]}), "t", ["2024-01-01", None])
+
+    def test_index_matches_a_boolean_filter(self):
+        rng = np.random.default_rng(0)
+        dates = pd.Series(pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 1000, 5000), unit="D"))
+        dates[rng.random(5000) < 0.1] = pd.NaT
+        index = SortedDateIndex(dates)
+        start, end = pd.Timestamp("2024-06-01"), pd.Timestamp("2025-01-31")
+        expected = np.flatnonzero(((dates >= start) & (dates <= end)).to_numpy())
+        np.testing.assert_array_equal(index.positions(start, end), expected)
+        self.assertEqual(index.count(start, end), len(expected))
+        self.assertEqual(index.min, dates.min())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Workers used when none is given (None: one per CPU). Batch workers set it to 1.
+WORKERS = None
+
+# Frames with fewer cells than this are processed serially: starting a pool would cost more
+MIN_PARALLEL_CELLS = 1000000
+
+
+def worker_count(workers=None):
+    return max(1, workers or WORKERS or os.cpu_count() or 1)
+
+
+def _serial(func, df, columns):
+    return {col: func(df[col]) for col in columns}
+
+
+def map_columns(func, df, columns=None, workers=None):
+    """
+    Runs func on each column in a thread pool. Suited to per-column work done by NumPy and pandas
+    (reductions, hashing, parsing), which releases the GIL for most of its time.
+    Parameters:
+        - func: function taking a Series
+        - df: pandas DataFrame
+        - columns: columns to process (default: all)
+        - workers: number of threads (default: WORKERS)
+    Returns:
+        - results: dictionary of column -> result, in column order whatever order the threads finish in
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    workers = min(worker_count(workers), len(columns))
+    if workers <= 1 or df.size < MIN_PARALLEL_CELLS:
+        return _serial(func, df, columns)
+    with ThreadPoolExecutor(workers) as pool:
+        return dict(zip(columns, pool.map(lambda col: func(df[col]), columns)))
+
+
+def _shared_copy(data, segments):
+    """
+    Copies a buffer into a new shared memory segment and returns the segment's name.
+    """
+    data = data.reshape(-1).view(np.uint8) if isinstance(data, np.ndarray) else memoryview(data).cast("B")
+    segment = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+    segment.buf[:data.nbytes] = data
+    segments.append(segment)
+    return segment.name
+
+
+def share_column(series, segments):
+    """
+    Describes a column for a worker process. Fixed-width NumPy columns are copied into one shared
+    memory segment; text columns are laid out as Arrow strings (offsets and UTF-8 data) in shared
+    memory, so neither is pickled. Other columns (categorical, mixed objects, ...) are pickled.
+    Parameters:
+        - series: pandas Series
+        - segments: list that receives the created segments; the caller closes and unlinks them
+    Returns:
+        - spec: picklable description passed to attach_column
+    """
+    spec = {"name": series.name, "length": len(series)}
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        values = np.ascontiguousarray(series.to_numpy())
+        spec.update(kind="numpy", dtype=values.dtype.str, segments=[(_shared_copy(values, segments), values.nbytes)])
+        return spec
+    if dtype == object:
+        try:
+            import pyarrow as pa
+
+            array = pa.array(series, type=pa.large_string(), from_pandas=True)
+        except (ImportError, TypeError, ValueError):
+            array = None
+        if array is not None:
+            buffers = []
+            for buffer in array.buffers():
+                buffers.append(None if buffer is None else (_shared_copy(buffer, segments), buffer.size))
+            spec.update(kind="string", segments=buffers, null_count=array.null_count, offset=array.offset)
+            return spec
+    spec.update(kind="pickle", series=series.reset_index(drop=True))
+    return spec
+
+
+def attach_column(spec, segments):
+    """
+    Rebuilds a column described by share_column in a worker process. NumPy columns are views of the
+    shared memory; text columns are decoded into Python strings.
+    Parameters:
+        - spec: description from share_column
+        - segments: list that receives the attached segments; the caller closes them
+    Returns:
+        - series: pandas Series with a RangeIndex
+    """
+    if spec["kind"] == "pickle":
+        return spec["series"]
+    if spec["kind"] == "numpy":
+        name, nbytes = spec["segments"][0]
+        segment = shared_memory.SharedMemory(name=name)
+        segments.append(segment)
+        values = np.frombuffer(segment.buf[:nbytes], dtype=np.dtype(spec["dtype"]))
+        return pd.Series(values, name=spec["name"], copy=False)
+
+    import pyarrow as pa
+
+    buffers = []
+    for entry in spec["segments"]:
+        if entry is None:
+            buffers.append(None)
+            continue
+        name, nbytes = entry
+        segment = shared_memory.SharedMemory(name=name)
+        segments.append(segment)
+        buffers.append(pa.py_buffer(segment.buf[:nbytes]))
+    array = pa.Array.from_buffers(pa.large_string(), spec["length"], buffers, spec["null_count"], spec["offset"])
+    return pd.Series(array.to_pandas(), name=spec["name"], dtype=object)
+
+
+def _run_shared(func, spec):
+    segments = []
+    try:
+        result = func(attach_column(spec, segments))
+        # Results must not keep views of the shared memory, which is released below
+        return result.copy() if isinstance(result, (pd.Series, np.ndarray)) else result
+    finally:
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # A view is still alive; the mapping is released when it is collected
+                pass
+
+
+def map_columns_processes(func, df, columns=None, workers=None):
+    """
+    Runs func on each column in a process pool, for per-column checks written in pure Python,
+    which hold the GIL. Columns reach the workers through shared memory (share_column).
+    Parameters:
+        - func: picklable (module-level) function taking a Series; the Series has a RangeIndex and its
+          result must not depend on the index
+        - df: pandas DataFrame
+        - columns: columns to process (default: all)
+        - workers: number of processes (default: WORKERS)
+    Returns:
+        - results: dictionary of column -> result, in column order
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    workers = min(worker_count(workers), len(columns))
+    if workers <= 1 or df.size < MIN_PARALLEL_CELLS:
+        return _serial(func, df, columns)
+    segments = []
+    try:
+        specs = [share_column(df[col], segments) for col in columns]
+        with ProcessPoolExecutor(workers) as pool:
+            return dict(zip(columns, pool.map(partial(_run_shared, func), specs)))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import parallel
+from parallel import attach_column, map_columns, map_columns_processes, share_column
+
+
+def _null_count(series):
+    return int(series.isna().sum())
+
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "i": np.arange(6),
+            "f": [0.5, np.nan] * 3,
+            "t": ["a", None, "é", "", None, "c"],
+            "c": pd.Categorical(["x", None] * 3),
+        })
+
+    def test_columns_survive_shared_memory(self):
+        segments = []
+        try:
+            specs = [share_column(self.df[col], segments) for col in self.df.columns]
+            self.assertEqual([spec["kind"] for spec in specs], ["numpy", "numpy", "string", "pickle"])
+            attached = []
+            for spec in specs:
+                series = attach_column(spec, attached)
+                pd.testing.assert_series_equal(series, self.df[spec["name"]])
+                del series
+            for segment in attached:
+                segment.close()
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def test_results_keep_column_order(self):
+        with mock.patch.object(parallel, "MIN_PARALLEL_CELLS", 0):
+            expected = {"i": 0, "f": 3, "t": 2, "c": 3}
+            self.assertEqual(list(map_columns(_null_count, self.df, workers=4).items()), list(expected.items()))
+            self.assertEqual(map_columns_processes(_null_count, self.df, ["t", "f"], workers=2), {"t": 2, "f": 3})
+
+    def test_small_frames_run_serially(self):
+        with mock.patch.object(parallel, "ThreadPoolExecutor") as pool:
+            self.assertEqual(map_columns(_null_count, self.df, workers=4)["f"], 3)
+        pool.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+
+PLAN_VERSION = 1
+
+# Steps that give the same result when run twice in a row with the same parameters
+IDEMPOTENT_OPERATIONS = {
+    "remove_duplicates",
+    "remove_outdated",
+    "apply_data_type_recommendations",
+    "change_data_types",
+    "optimize_memory",
+    "automated_data_cleaning",
+}
+
+def _encode(value):
+    if isinstance(value, (datetime.datetime, datetime.date, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in a cleaning plan")
+
+
+def plan_to_json(steps):
+    """
+    Serializes a cleaning plan: a list of steps like {"op": "remove_duplicates", "subset": None, "keep": "first"}.
+    Dates are stored as ISO strings.
+    """
+    return json.dumps({"version": PLAN_VERSION, "steps": steps}, default=_encode, indent=2)
+
+
+def plan_from_json(text):
+    """
+    Reads a plan written by plan_to_json. Returns the list of steps.
+    """
+    plan = json.loads(text)
+    if not isinstance(plan, dict) or "steps" not in plan:
+        raise ValueError("Not a cleaning plan")
+    if plan.get("version", PLAN_VERSION) > PLAN_VERSION:
+        raise ValueError(f"Cleaning plan version {plan['version']} is newer than this app supports")
+    return plan["steps"]
+
+
+def _range(time_filter):
+    """
+    Normalizes a remove_outdated filter to a (start, end) pair of Timestamps or None.
+    """
+    if not time_filter:
+        return None, None
+    if isinstance(time_filter, (list, tuple)):
+        start, end = time_filter
+    else:
+        start, end = time_filter, None
+    return (None if start is None else pd.Timestamp(start)), (None if end is None else pd.Timestamp(end))
+
+
+def _intersect(first, second):
+    """
+    Fuses two remove_outdated steps on the same column into one keeping the rows in both ranges.
+    Two empty filters stay empty: an unbounded range would still remove the rows without a date.
+    """
+    if not first["time_filter"] and not second["time_filter"]:
+        return dict(first, time_filter=None)
+    (start1, end1), (start2, end2) = _range(first["time_filter"]), _range(second["time_filter"])
+    start = max((d for d in (start1, start2) if d is not None), default=None)
+    end = min((d for d in (end1, end2) if d is not None), default=None)
+    return dict(first, time_filter=[start, end])
+
+
+def _rule_chars(texts):
+    return set("".join(texts))
+
+
+def _can_fuse_replaces(first, second):
+    """
+    Two replaces can run as one pass when the second cannot match anything the first touched:
+    its old texts share no character with the first step's old or new texts. Rules in one pass
+    do not cascade, so without this check the results could differ.
+    """
+    touched = _rule_chars(first["rules"]) | _rule_chars(first["rules"].values())
+    return not (_rule_chars(second["rules"]) & touched)
+
+
+def _dedup_subset_covers(step, col):
+    return step.get("subset") is None or col in step["subset"]
+
+
+def _rewrite(steps):
+    """
+    Applies one round of rewrites to adjacent steps. Returns (steps, changed).
+    """
+    out = []
+    changed = False
+    for step in steps:
+        previous = out[-1] if out else None
+        if previous is None:
+            out.append(step)
+            continue
+        op, previous_op = step["op"], previous["op"]
+
+        # Drop a step that repeats the previous one exactly
+        if op == previous_op and op in IDEMPOTENT_OPERATIONS and step == previous:
+            changed = True
+            continue
+
+        # Two date filters on one column keep the intersection of their ranges
+        if op == previous_op == "remove_outdated" and step["date_col"] == previous["date_col"]:
+            out[-1] = _intersect(previous, step)
+            changed = True
+            continue
+
+        # Consecutive replaces on one column become one pass when their rules do not interact
+        if (op == previous_op == "replace_text" and step["col_name"] == previous["col_name"]
+                and _can_fuse_replaces(previous, step)):
+            out[-1] = dict(previous, rules={**previous["rules"], **step["rules"]})
+            changed = True
+            continue
+
+        # Filter before dedup: fewer rows to hash. Only safe when duplicates share the date,
+        # i.e. the date column is part of what identifies a duplicate.
+        if (op == "remove_outdated" and previous_op == "remove_duplicates"
+                and _dedup_subset_covers(previous, step["date_col"])):
+            out[-1:] = [step, previous]
+            changed = True
+            continue
+
+        out.append(step)
+    return out, changed
+
+
+def optimize_plan(steps):
+    """
+    Rewrites a cleaning plan into an equivalent one that does less work, like a query optimizer:
+        - exact repeats of idempotent steps are dropped
+        - date filters on one column are fused into one range
+        - consecutive replaces on one column are fused into one pass when their rules do not interact
+        - date filters move before duplicate removal when the date column identifies duplicates
+    Only adjacent steps are rewritten, so a step never moves past one that could change its input.
+    Parameters:
+        - steps: list of steps
+    Returns:
+        - steps: new list of steps
+    """
+    steps = [dict(step) for step in steps]
+    changed = True
+    while changed:
+        steps, changed = _rewrite(steps)
+    return steps
+
+
+def execute_plan(df, steps, operations, dataset_key=None, optimize=True, in_place_operations=()):
+    """
+    Runs a cleaning plan on a DataFrame.
+    Parameters:
+        - df: pandas DataFrame (not modified)
+        - steps: list of steps
+        - operations: dictionary of operation name -> function(df, dataset_key, **params)
+        - dataset_key: identifies the input dataset for the date caches
+        - optimize: rewrite the plan with optimize_plan first
+        - in_place_operations: operations that modify their input; the input is copied once before the first one
+    Returns:
+        - (df, reports): cleaned DataFrame and the report of each step that returns one
+    """
+    if optimize:
+        steps = optimize_plan(steps)
+    reports = []
+    copied = False
+    for i, step in enumerate(steps):
+        params = dict(step)
+        name = params.pop("op")
+        if name not in operations:
+            raise ValueError(f"Unknown cleaning operation: {name}")
+        if name in in_place_operations and not copied:
+            df = df.copy()
+            copied = True
+        # Each intermediate frame is a new dataset version for the date caches
+        key = None if dataset_key is None else f"{dataset_key}:{i}"
+        result = operations[name](df, key, **params)
+        df, report = result if isinstance(result, tuple) else (result, None)
+        if report is not None:
+            reports.append((name, report))
+    return df, reports
@@ -0,0 +1,68 @@
+import unittest
+
+import pandas as pd
+
+from cleaning import IN_PLACE_OPERATIONS, OPERATIONS
+from plan import execute_plan, optimize_plan, plan_from_json, plan_to_json
+
+
+def run(df, steps, optimize):
+    result, _ = execute_plan(df.copy(), steps, OPERATIONS, optimize=optimize, in_place_operations=IN_PLACE_OPERATIONS)
+    return result
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "date": ["2024-01-05", None, "2024-03-01", "2024-01-05", "2024-06-30"],
+            "name": ["ab", "ab", "b", "ab", "c"],
+        })
+
+    def assert_equivalent(self, steps):
+        pd.testing.assert_frame_equal(run(self.df, steps, True), run(self.df, steps, False))
+
+    def test_json_round_trip(self):
+        steps = [{"op": "remove_outdated", "date_col": "date", "time_filter": [pd.Timestamp("2024-01-01"), None]}]
+        self.assertEqual(plan_from_json(plan_to_json(steps)), [dict(steps[0], time_filter=["2024-01-01T00:00:00", None])])
+
+    def test_exact_repeats_are_dropped(self):
+        step = {"op": "remove_duplicates", "subset": None, "keep": "first"}
+        self.assertEqual(optimize_plan([step, step]), [step])
+        self.assert_equivalent([step, step])
+
+    def test_date_filters_are_intersected(self):
+        steps = [{"op": "remove_outdated", "date_col": "date", "time_filter": ["2024-01-01", "2024-05-01"]},
+                 {"op": "remove_outdated", "date_col": "date", "time_filter": ["2024-02-01", None]}]
+        optimized = optimize_plan(steps)
+        self.assertEqual(len(optimized), 1)
+        self.assertEqual(optimized[0]["time_filter"], [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-05-01")])
+        self.assert_equivalent(steps)
+
+    def test_empty_date_filters_stay_empty(self):
+        steps = [{"op": "remove_outdated", "date_col": "date", "time_filter": None},
+                 {"op": "remove_outdated", "date_col": "date", "time_filter": []}]
+        self.assertIsNone(optimize_plan(steps)[0]["time_filter"])
+        self.assertEqual(len(run(self.df, steps, True)), len(self.df))
+
+    def test_independent_replaces_are_fused(self):
+        steps = [{"op": "replace_text", "col_name": "name", "rules": {"a": "x"}},
+                 {"op": "replace_text", "col_name": "name", "rules": {"c": "y"}}]
+        self.assertEqual(optimize_plan(steps), [{"op": "replace_text", "col_name": "name", "rules": {"a": "x", "c": "y"}}])
+        self.assert_equivalent(steps)
+
+    def test_interacting_replaces_are_not_fused(self):
+        steps = [{"op": "replace_text", "col_name": "name", "rules": {"a": "b"}},
+                 {"op": "replace_text", "col_name": "name", "rules": {"b": "c"}}]
+        self.assertEqual(optimize_plan(steps), steps)
+
+    def test_filter_moves_before_dedup_on_its_column(self):
+        dedup = {"op": "remove_duplicates", "subset": None, "keep": "first"}
+        date_filter = {"op": "remove_outdated", "date_col": "date", "time_filter": ["2024-01-01", "2024-04-01"]}
+        self.assertEqual(optimize_plan([dedup, date_filter]), [date_filter, dedup])
+        self.assert_equivalent([dedup, date_filter])
+        by_name = dict(dedup, subset=["name"])
+        self.assertEqual(optimize_plan([by_name, date_filter]), [by_name, date_filter])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from cache import artifacts
+
+# Rows sent to the browser per page
+PAGE_SIZE = 100
+
+PAGE_SIZES = [25, 50, 100, 500, 1000]
+
+
+def sort_order(series, ascending=True):
+    """
+    Returns the row positions of a column in sorted order, missing values last. Columns that
+    cannot be ordered (mixed types) are sorted by their text.
+    """
+    series = series.reset_index(drop=True)
+    try:
+        ordered = series.sort_values(ascending=ascending, kind="stable", na_position="last")
+    except TypeError:
+        ordered = series.astype(str).where(series.notna()).sort_values(ascending=ascending, kind="stable", na_position="last")
+    return ordered.index.to_numpy()
+
+
+def filter_mask(series, text):
+    """
+    Returns a boolean array of the rows whose value contains text (case-insensitive). Values are
+    compared as text, including the numbers of columns mixing numbers and text; missing values
+    never match.
+    """
+    present = series.notna().to_numpy()
+    mask = np.zeros(len(series), dtype=bool)
+    values = series[present].astype(str)
+    mask[present] = values.str.contains(text, case=False, regex=False).to_numpy(dtype=bool)
+    return mask
+
+
+def view_positions(df, version, sort_by=None, ascending=True, filter_col=None, filter_text=""):
+    """
+    Returns the row positions shown by a preview, or None for all rows in their order. The sort
+    order and the filter mask are computed over the whole frame once per version and kept in the
+    artifact cache, so paging through them does not touch the other rows again.
+    Parameters:
+        - df: pandas DataFrame
+        - version: dataset version key of df
+        - sort_by: column to sort by (default: no sorting)
+        - ascending: sort direction
+        - filter_col: column to filter on (default: no filter)
+        - filter_text: text the filtered column must contain
+    Returns:
+        - positions: numpy array of row positions, or None
+    """
+    positions = None
+    if sort_by is not None:
+        positions = artifacts.get_or_compute((version, "sort_order", sort_by, ascending),
+                                             lambda: sort_order(df[sort_by], ascending))
+    if filter_col is not None and filter_text:
+        mask = artifacts.get_or_compute((version, "filter_mask", filter_col, filter_text),
+                                        lambda: filter_mask(df[filter_col], filter_text))
+        positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+    return positions
+
+
+def page_count(rows, page_size=PAGE_SIZE):
+    return max(1, -(-rows // page_size))
+
+
+def get_page(df, positions, page, page_size=PAGE_SIZE):
+    """
+    Returns one page of a preview: the rows at positions[page * page_size:(page + 1) * page_size],
+    or the same slice of df when positions is None. Only these rows are copied.
+    Parameters:
+        - df: pandas DataFrame
+        - positions: row positions from view_positions, or None
+        - page: page number, from 0
+        - page_size: rows per page
+    Returns:
+        - page: pandas DataFrame with at most page_size rows, keeping their original index
+    """
+    start = page * page_size
+    if positions is None:
+        return df.iloc[start:start + page_size]
+    return df.take(positions[start:start + page_size])
+
+
+def view_rows(df, positions):
+    return len(df) if positions is None else len(positions)
+
+
+def displayable(page):
+    """
+    Converts the columns of a page that the browser table cannot show (mixed types in an object
+    column) to text. Only the page is converted, never the frame.
+    """
+    mixed = [col for col in page.columns
+             if page[col].dtype == object and pd.api.types.infer_dtype(page[col], skipna=True) not in ("string", "empty")]
+    if not mixed:
+        return page
+    page = page.copy()
+    for col in mixed:
+        page[col] = page[col].astype(str).where(page[col].notna())
+    return page
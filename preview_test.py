@@ -0,0 +1,52 @@
+import unittest
+
+import pandas as pd
+
+from cache import artifacts
+from preview import displayable, filter_mask, get_page, page_count, sort_order, view_positions, view_rows
+
+
+class PreviewTest(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "n": [3, None, 1, 2, 10],
+            "mixed": ["Apple", 12, None, "pineapple", 120],
+        }, index=[10, 11, 12, 13, 14])
+
+    def tearDown(self):
+        artifacts.clear()
+
+    def test_missing_values_sort_last(self):
+        self.assertEqual(sort_order(self.df["n"]).tolist(), [2, 3, 0, 4, 1])
+        self.assertEqual(sort_order(self.df["n"], ascending=False).tolist(), [4, 0, 3, 2, 1])
+
+    def test_mixed_columns_sort_and_filter_as_text(self):
+        self.assertEqual(sort_order(self.df["mixed"]).tolist(), [1, 4, 0, 3, 2])
+        self.assertEqual(filter_mask(self.df["mixed"], "APPLE").tolist(), [True, False, False, True, False])
+        self.assertEqual(filter_mask(self.df["mixed"], "12").tolist(), [False, True, False, False, True])
+
+    def test_filter_keeps_the_sort_order(self):
+        positions = view_positions(self.df, "v1", sort_by="n", ascending=False, filter_col="mixed", filter_text="12")
+        self.assertEqual(positions.tolist(), [4, 1])
+        self.assertIsNone(view_positions(self.df, "v1", filter_col="mixed", filter_text=""))
+        self.assertIn(("v1", "sort_order", "n", False), artifacts)
+
+    def test_pages(self):
+        self.assertEqual(page_count(0, 2), 1)
+        self.assertEqual(page_count(5, 2), 3)
+        self.assertEqual(get_page(self.df, None, 2, page_size=2).index.tolist(), [14])
+        positions = sort_order(self.df["n"])
+        self.assertEqual(get_page(self.df, positions, 0, page_size=2).index.tolist(), [12, 13])
+        self.assertEqual(view_rows(self.df, positions[:3]), 3)
+
+    def test_only_mixed_columns_become_text(self):
+        page = displayable(self.df)
+        self.assertEqual(page["mixed"].tolist()[:2], ["Apple", "12"])
+        self.assertTrue(pd.isna(page["mixed"].iloc[2]))
+        numbers = self.df[["n"]]
+        self.assertIs(displayable(numbers), numbers)
+        self.assertEqual(self.df["mixed"].iloc[1], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import os
+
+import pandas as pd
+
+from cleaning import apply_data_type_recommendations
+from datetimes import detect_datetime_format
+from excel import iter_excel_chunks
+
+# Rows read per chunk; peak memory is bounded by a few chunks, not by the file size
+CHUNK_SIZE = 100000
+
+# Directory whose files may be streamed and written from the app; streaming is off when it is not set
+STREAM_DIR = os.environ.get("CLEANER_STREAM_DIR")
+
+
+def resolve_stream_path(path, root=STREAM_DIR):
+    """
+    Resolves a path entered in the app against root, the only directory the app may read and
+    write on the server. Raises ValueError for a path outside it (absolute, "..", symbolic links).
+    """
+    if not root:
+        raise ValueError("Streaming from server files is disabled: set CLEANER_STREAM_DIR.")
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root or resolved == root:
+        raise ValueError(f"{path} is not a file in {root}.")
+    return resolved
+
+
+def read_csv_chunks(source, chunksize=CHUNK_SIZE, **read_csv_kwargs):
+    """
+    Reads a CSV file lazily, one chunk at a time.
+    Parameters:
+        - source: path or file-like object
+        - chunksize: number of rows per chunk
+        - read_csv_kwargs: extra arguments passed to pd.read_csv
+    Yields:
+        - chunk: pandas DataFrame with at most chunksize rows
+    """
+    with pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def read_chunks(source, chunksize=CHUNK_SIZE, sheet=None, **read_csv_kwargs):
+    """
+    Reads a CSV file, or a sheet of an XLSX workbook given by path, one chunk at a time, so both
+    feed the same cleaning pipeline.
+    """
+    if isinstance(source, str) and source.lower().endswith(".xlsx"):
+        return iter_excel_chunks(source, sheet, chunksize)
+    return read_csv_chunks(source, chunksize, **read_csv_kwargs)
+
+
+def apply_steps(chunks, steps):
+    """
+    Runs row-local cleaning steps on each chunk.
+    Parameters:
+        - chunks: iterable of pandas DataFrames
+        - steps: list of functions taking and returning a DataFrame
+    Yields:
+        - chunk: cleaned pandas DataFrame
+    """
+    for chunk in chunks:
+        for step in steps:
+            chunk = step(chunk)
+        yield chunk
+
+
+def write_csv_chunks(chunks, dest):
+    """
+    Writes chunks to a CSV file as they arrive, with the header written once.
+    Parameters:
+        - chunks: iterable of pandas DataFrames
+        - dest: path or writable text file object
+    Returns:
+        - rows: number of rows written
+    """
+    if isinstance(dest, str):
+        with open(dest, "w", newline="", encoding="utf-8") as f:
+            return write_csv_chunks(chunks, f)
+
+    rows = 0
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(dest, header=header, index=False)
+        header = False
+        rows += len(chunk)
+    return rows
+
+
+def count_rows(chunks, counter):
+    """
+    Passes chunks through while adding their row count to counter["rows"].
+    """
+    for chunk in chunks:
+        counter["rows"] += len(chunk)
+        yield chunk
+
+
+def stream_clean_csv(source, dest, steps, chunksize=CHUNK_SIZE, progress=None, stages=None, **read_csv_kwargs):
+    """
+    Cleans a CSV file (or an XLSX sheet, see read_chunks) chunk by chunk and writes the result
+    incrementally as CSV.
+    Only row-local steps (replace text, remove outdated rows, type casting) give the same result as
+    on the full frame; steps that look across rows need the whole dataset.
+    Parameters:
+        - source: path or file-like object of the input CSV, or path of an XLSX workbook
+        - dest: path or writable text file object of the output CSV
+        - steps: list of functions taking and returning a DataFrame
+        - chunksize: number of rows per chunk
+        - progress: optional function called with (rows_read, rows_written) after each chunk
+        - stages: optional list of functions taking and returning an iterator of chunks, for steps
+          that look across chunks (e.g. dedup.drop_duplicates_stream)
+    Returns:
+        - (rows_read, rows_written)
+    """
+    counter = {"rows": 0}
+    written = {"rows": 0}
+    chunks = count_rows(read_chunks(source, chunksize, **read_csv_kwargs), counter)
+    cleaned = apply_steps(chunks, steps)
+    for stage in stages or []:
+        cleaned = stage(cleaned)
+
+    def report(chunks):
+        for chunk in chunks:
+            yield chunk
+            written["rows"] += len(chunk)
+            if progress is not None:
+                progress(counter["rows"], written["rows"])
+
+    write_csv_chunks(report(cleaned), dest)
+    return counter["rows"], written["rows"]
+
+
+def widen_for_stream(recommendations):
+    """
+    Adapts type recommendations made on the first chunk so they hold for the rest of the file:
+    sized integers become nullable Int64, since later chunks may have larger values or missing ones,
+    and bool becomes the nullable boolean, so a missing value stays missing. Apply them with
+    cast_chunk, which also accepts fractions in a later chunk of an integer column. A value of
+    another type in a later chunk raises ValueError (cleaning.apply_data_type_recommendations).
+    Parameters:
+        - recommendations: dictionary with column names as keys and recommended data types as values
+    Returns:
+        - recommendations: new dictionary with widened types
+    """
+    widened = {"bool": "boolean"}
+    return {col: "Int64" if dtype.startswith("int") else widened.get(dtype, dtype) for col, dtype in recommendations.items()}
+
+
+def cast_chunk(chunk, recommendations, date_formats=None):
+    """
+    Applies widened recommendations (widen_for_stream) to one chunk. An Int64 column holding
+    fractions in this chunk, which the first chunk could not show, is cast to Float64 in this chunk
+    instead of failing; the CSV output holds the same numbers either way.
+    Parameters:
+        - chunk: pandas DataFrame
+        - recommendations: dictionary of column -> type from widen_for_stream
+        - date_formats: dictionary of column -> date format (see date_formats)
+    Returns:
+        - chunk: pandas DataFrame with updated data types
+    """
+    for col, dtype in recommendations.items():
+        try:
+            chunk = apply_data_type_recommendations(chunk, {col: dtype}, date_formats=date_formats)
+        except TypeError:
+            # Raised by astype("Int64") on values with a fraction
+            if dtype != "Int64":
+                raise
+            chunk = apply_data_type_recommendations(chunk, {col: "Float64"})
+    return chunk
+
+
+def date_formats(head, columns):
+    """
+    Finds the date format of columns on the first chunk of a file, so every chunk is parsed with it:
+    inferred chunk by chunk, "01/02/2020" could be read as 2 January in one chunk and the same text
+    as 1 February in another.
+    Parameters:
+        - head: pandas DataFrame, the first chunk
+        - columns: date columns
+    Returns:
+        - formats: dictionary of column -> format; columns without a single format are left out
+    """
+    formats = {}
+    for col in columns:
+        is_datetime, fmt = detect_datetime_format(head[col].dropna())
+        if is_datetime and fmt is not None:
+            formats[col] = fmt
+    return formats
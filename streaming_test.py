@@ -0,0 +1,62 @@
+import io
+import os
+import tempfile
+import unittest
+from functools import partial
+
+import pandas as pd
+
+from cleaning import apply_data_type_recommendations, recommend_data_types, replace_text_in_column
+from streaming import cast_chunk, date_formats, resolve_stream_path, stream_clean_csv, widen_for_stream
+
+
+class StreamingTest(unittest.TestCase):
+    def test_chunks_give_the_same_result_as_the_whole_file(self):
+        df = pd.DataFrame({"name": [f"a{i % 7}" for i in range(1000)], "n": range(1000)})
+        out = io.StringIO()
+        steps = [partial(replace_text_in_column, col_name="name", old_text="a", new_text="b")]
+        counts = stream_clean_csv(io.StringIO(df.to_csv(index=False)), out, steps, chunksize=128)
+        self.assertEqual(counts, (1000, 1000))
+        expected = replace_text_in_column(df.copy(), "name", "a", "b")
+        pd.testing.assert_frame_equal(pd.read_csv(io.StringIO(out.getvalue())), expected)
+
+    def test_widened_types_hold_for_later_chunks(self):
+        self.assertEqual(widen_for_stream({"i": "int8", "b": "bool", "f": "float64"}),
+                         {"i": "Int64", "b": "boolean", "f": "float64"})
+        chunk = cast_chunk(pd.DataFrame({"i": [300, None], "b": ["True", None]}), {"i": "Int64", "b": "boolean"})
+        self.assertEqual(str(chunk["i"].dtype), "Int64")
+        self.assertTrue(pd.isna(chunk["b"].iloc[1]))
+
+    def test_fractions_in_a_later_chunk_of_an_integer_column(self):
+        csv = "n\n" + "".join(f"{i}\n" for i in range(5)) + "1.5\n"
+        recommendations = widen_for_stream(recommend_data_types(pd.read_csv(io.StringIO(csv), nrows=5)))
+        self.assertEqual(recommendations, {"n": "Int64"})
+        out = io.StringIO()
+        stream_clean_csv(io.StringIO(csv), out, [partial(cast_chunk, recommendations=recommendations)], chunksize=5)
+        self.assertEqual(pd.read_csv(io.StringIO(out.getvalue()))["n"].tolist(), [0, 1, 2, 3, 4, 1.5])
+
+    def test_values_that_are_not_true_or_false_raise(self):
+        with self.assertRaises(ValueError):
+            apply_data_type_recommendations(pd.DataFrame({"flag": [True, "Unknown", False]}), {"flag": "boolean"})
+
+    def test_every_chunk_uses_the_format_of_the_first(self):
+        head = pd.DataFrame({"d": ["13/01/2024", "01/02/2024"]})
+        formats = date_formats(head, ["d"])
+        self.assertEqual(formats, {"d": "%d/%m/%Y"})
+        later = cast_chunk(pd.DataFrame({"d": ["01/02/2024"]}), {"d": "datetime64[ns]"}, formats)
+        self.assertEqual(later["d"].iloc[0], pd.Timestamp("2024-02-01"))
+        with self.assertRaises(ValueError):
+            cast_chunk(pd.DataFrame({"d": ["2024-02-01"]}), {"d": "datetime64[ns]"}, formats)
+
+    def test_paths_stay_in_the_stream_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.assertEqual(resolve_stream_path("data.csv", root), os.path.join(os.path.realpath(root), "data.csv"))
+            for path in ("../data.csv", "/etc/passwd", "."):
+                with self.assertRaises(ValueError):
+                    resolve_stream_path(path, root)
+        with self.assertRaises(ValueError):
+            resolve_stream_path("data.csv", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Columns whose sampled distinct/total ratio is below this are replaced on their distinct values
+UNIQUE_RATIO = 0.5
+SAMPLE_SIZE = 10000
+
+
+def compile_rules(rules):
+    """
+    Compiles old -> new rules into one alternation pattern, longest match first, so every rule is
+    applied in a single scan of each value. Rules do not cascade: text produced by one rule is
+    not matched by another.
+    Parameters:
+        - rules: dictionary of old text -> new text (plain text, not regular expressions)
+    Returns:
+        - (pattern, replace): compiled pattern and the function passed to re.sub
+    """
+    olds = sorted((old for old in rules if old), key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(old) for old in olds))
+    return pattern, lambda match: rules[match.group(0)]
+
+
+def replace_in_strings(values, rules):
+    """
+    Applies the rules to a Series of strings.
+    """
+    rules = {old: new for old, new in rules.items() if old}
+    if not rules:
+        return values
+    if len(rules) == 1:
+        ((old, new),) = rules.items()
+        return values.str.replace(old, new, regex=False)
+    pattern, replace = compile_rules(rules)
+    return values.str.replace(pattern, replace, regex=True)
+
+
+def _from_strings(values, dtype):
+    """
+    Converts replaced strings back to the column's type. Booleans are mapped from "True" and
+    "False" explicitly, since astype(bool) turns every non-empty string, "False" included, into True.
+    """
+    if not pd.api.types.is_bool_dtype(dtype):
+        return values.astype(dtype)
+    booleans = values.map({"True": True, "False": False})
+    if booleans.isna().any():
+        raise ValueError(f"Column {values.name} would hold a value that is not True or False: {values[booleans.isna()].iloc[0]!r}")
+    return booleans.astype(dtype)
+
+
+def _is_low_cardinality(series):
+    sample = series.iloc[:SAMPLE_SIZE]
+    return len(sample) > 0 and sample.nunique(dropna=False) <= UNIQUE_RATIO * len(sample)
+
+
+def replace_text(series, rules, dtype=None):
+    """
+    Replaces text in the string form of a column and converts the result to dtype.
+    Categorical and repetitive columns are factorized: the rules and the conversion run on the
+    distinct values only and the codes are mapped back, so the column is not turned into strings
+    row by row. Missing values stay missing.
+    Parameters:
+        - series: pandas Series
+        - rules: dictionary of old text -> new text
+        - dtype: type of the result (default: the column's dtype)
+    Returns:
+        - series: pandas Series with the text replaced
+    """
+    dtype = series.dtype if dtype is None else dtype
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = pd.Series(series.cat.categories)
+    elif _is_low_cardinality(series):
+        codes, uniques = pd.factorize(series)
+        uniques = pd.Series(uniques)
+    else:
+        missing = series.isna().to_numpy()
+        if not missing.any():
+            return _from_strings(replace_in_strings(series.astype(str), rules), dtype)
+        # Missing values are left out: as text they would be "<NA>" or "nan", which may not convert back
+        present = np.flatnonzero(~missing)
+        replaced = _from_strings(replace_in_strings(series.iloc[present].astype(str), rules), dtype)
+        result = pd.Series(index=series.index, dtype=replaced.dtype, name=series.name)
+        result.iloc[present] = replaced.array
+        return result
+
+    if len(uniques) == 0:
+        return series.copy()
+
+    new_uniques = replace_in_strings(uniques.astype(str), rules)
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Replacements may merge categories; re-factorize them
+        new_codes, categories = pd.factorize(new_uniques)
+        remapped = np.where(codes >= 0, new_codes[codes], -1)
+        return pd.Series(pd.Categorical.from_codes(remapped, categories), index=series.index, name=series.name)
+
+    new_uniques = _from_strings(new_uniques, dtype)
+    result = new_uniques.take(np.where(codes >= 0, codes, 0))
+    result.index = series.index
+    result.name = series.name
+    return result.mask(codes < 0) if (codes < 0).any() else result
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cleaning import parse_replace_rules, replace_many_in_column, replace_text_in_column
+from text_replace import replace_text
+
+
+class TextReplaceTest(unittest.TestCase):
+    def test_rules_do_not_cascade(self):
+        series = pd.Series([f"ab{i}" for i in range(100)])
+        result = replace_text(series, {"a": "b", "b": "c"})
+        self.assertEqual(result.iloc[0], "bc0")
+
+    def test_repetitive_column_keeps_missing_values(self):
+        series = pd.Series(["x", None, "y"] * 100)
+        result = replace_text(series, {"x": "z"})
+        self.assertEqual(result.iloc[[0, 2]].tolist(), ["z", "y"])
+        self.assertTrue(pd.isna(result.iloc[1]))
+
+    def test_categorical_merges_categories(self):
+        series = pd.Series(pd.Categorical(["a", "b", None]))
+        result = replace_text(series, {"b": "a"})
+        self.assertEqual(list(result.cat.categories), ["a"])
+        self.assertTrue(pd.isna(result.iloc[2]))
+
+    def test_nullable_integers_with_missing_values(self):
+        series = pd.Series(pd.array(list(range(1000)) + [None], dtype="Int64"))
+        result = replace_text(series, {"1": "9"})
+        self.assertEqual(result.dtype, "Int64")
+        self.assertEqual(result.iloc[1], 9)
+        self.assertTrue(pd.isna(result.iloc[-1]))
+
+    def test_booleans_keep_their_values(self):
+        for values in ([True, False, True], [True, False] * 1000):
+            df = replace_text_in_column(pd.DataFrame({"b": values}), "b", "zzz", "q")
+            self.assertEqual(df["b"].tolist(), values)
+        series = pd.Series(pd.array([True, False, None], dtype="boolean"))
+        result = replace_text(series, {"False": "True"})
+        self.assertEqual(result.iloc[:2].tolist(), [True, True])
+        self.assertTrue(pd.isna(result.iloc[2]))
+        with self.assertRaises(ValueError):
+            replace_text(pd.Series([True, False]), {"True": "yes"})
+
+    def test_float_column(self):
+        df = pd.DataFrame({"f": np.arange(1000) + 0.5})
+        df = replace_many_in_column(df, "f", {".5": ".25"})
+        self.assertEqual(df["f"].iloc[0], 0.25)
+
+    def test_parse_rules(self):
+        self.assertEqual(parse_replace_rules("a -> b\nno rule\n c->d "), {"a": "b", "c": "d"})
+
+
+if __name__ == "__main__":
+    unittest.main()
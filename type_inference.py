@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from datetimes import detect_datetime_format, parse_and_cache
+
+# Number of rows screened per column before the full column is looked at
+SAMPLE_SIZE = 10000
+
+# Integer types tried in order, smallest first
+INT_TYPES = ["int8", "int16", "int32", "int64"]
+
+BOOL_STRINGS = {"False", "True"}
+
+
+def sample_column(series, sample_size=SAMPLE_SIZE, random_state=0):
+    """
+    Returns a bounded random sample of the non-null values of a column.
+    Parameters:
+        - series: pandas Series
+        - sample_size: maximum number of rows to sample
+        - random_state: seed so repeated calls pick the same rows
+    Returns:
+        - sample: pandas Series with at most sample_size non-null values
+    """
+    if len(series) > sample_size:
+        series = series.sample(n=sample_size, random_state=random_state)
+    return series.dropna()
+
+
+def smallest_int_type(int_min, int_max):
+    """
+    Returns the smallest signed integer type that holds [int_min, int_max], or None if int64 is too small.
+    """
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= int_min and int_max <= info.max:
+            return dtype
+    return None
+
+
+def _numeric_type(values):
+    """
+    Returns the recommended type for numeric values, or None if they do not fit a numeric type.
+    """
+    if len(values) == 0:
+        return None
+    int_min = values.min()
+    int_max = values.max()
+    if not (np.isfinite(int_min) and np.isfinite(int_max)):
+        return "float64"
+    if (values == np.floor(values)).all():
+        return smallest_int_type(int_min, int_max) or "float64"
+    return "float64"
+
+
+def _infer_native(series, has_nulls, profile=None):
+    """
+    Recommends a type for a column that already has a non-object dtype, using vectorized min/max
+    (taken from the column's profile when there is one).
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return "datetime64[ns]"
+    if pd.api.types.is_integer_dtype(dtype):
+        if len(series) == 0 or has_nulls:
+            return str(dtype)
+        if profile is not None and profile.min is not None:
+            return smallest_int_type(profile.min, profile.max) or str(dtype)
+        return smallest_int_type(series.min(), series.max()) or str(dtype)
+    if pd.api.types.is_float_dtype(dtype):
+        if has_nulls:
+            return "float64"
+        return _numeric_type(series.to_numpy(dtype="float64")) or "float64"
+    # Categorical, timedelta, complex, ... are kept as they are
+    return str(dtype)
+
+
+def _looks_boolean(sample):
+    uniques = pd.Series(sample.unique()).astype(str)
+    return set(uniques) == BOOL_STRINGS
+
+
+def _confirm_boolean(series, profile=None):
+    # The profile holds every distinct value of a low-cardinality column, so nothing is rescanned
+    values = profile.values() if profile is not None else None
+    uniques = pd.Series(series.unique() if values is None else values).astype(str)
+    return set(uniques) == BOOL_STRINGS
+
+
+def _has_bools(values, numbers):
+    """
+    pd.to_numeric turns True and False into 1 and 0; returns True if any of the values it turned
+    into 0 or 1 is a boolean. Only those values are looked at one by one.
+    """
+    candidates = values[numbers.isin([0, 1]).to_numpy()]
+    return any(isinstance(value, (bool, np.bool_)) for value in candidates)
+
+
+def is_nullable_boolean(series):
+    """
+    Returns True if a column holds booleans (True/False values or strings) with missing values,
+    which bool cannot hold.
+    """
+    values = series.dropna()
+    if len(values) == len(series) or len(values) == 0:
+        return False
+    return set(pd.Series(values.unique()).astype(str)) <= BOOL_STRINGS
+
+
+def _looks_numeric(sample):
+    """
+    Screens a sample with pd.to_numeric. Returns True if every sampled value is a number
+    (booleans are not).
+    """
+    numbers = pd.to_numeric(sample, errors="coerce")
+    return not numbers.isna().any() and not _has_bools(sample, numbers)
+
+
+def _confirm_numeric(series, has_nulls):
+    """
+    Confirms a numeric candidate on the full column and picks its final type.
+    Returns None if some value outside the sample is not a number.
+    """
+    values = series.dropna()
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.isna().any() or pd.api.types.is_object_dtype(numbers.dtype) or _has_bools(values, numbers):
+        return None
+    if has_nulls:
+        return "float64"
+    return _numeric_type(numbers.to_numpy(dtype="float64"))
+
+
+def _confirm_datetime(series, fmt, dataset_key):
+    """
+    Parses the full column once with the format found on the sample.
+    The parsed column is cached so reruns and remove_outdated do not parse it again.
+    """
+    parsed = parse_and_cache(series, fmt, dataset_key)
+    return not parsed[series.notna()].isna().any()
+
+
+def infer_column_type(series, sample_size=SAMPLE_SIZE, random_state=0, dataset_key=None, profile=None):
+    """
+    Recommends a data type for a single column.
+    Columns with a native dtype are decided from vectorized min/max checks.
+    Object columns are screened on a bounded random sample first; only candidates that survive
+    the sample are confirmed on the full column, so rejected columns cost O(sample). With a column
+    profile (column_profile.py), its null count, min/max, sample and distinct values are used
+    instead of scanning the column for them.
+    Parameters:
+        - series: pandas Series
+        - sample_size: maximum number of rows screened before confirming on the full column
+        - random_state: seed for the sample
+        - dataset_key: identifies the dataset version; parsed date columns are cached under it
+        - profile: ColumnProfile of the column (optional)
+    Returns:
+        - dtype: recommended data type as a string
+    """
+    has_nulls = profile.has_nulls if profile is not None else bool(series.isna().any())
+
+    if not pd.api.types.is_object_dtype(series.dtype):
+        return _infer_native(series, has_nulls, profile)
+
+    if profile is not None:
+        sample = profile.sample()
+    else:
+        sample = sample_column(series, sample_size, random_state)
+    if len(sample) == 0:
+        return "object"
+
+    # Check for boolean columns
+    if not has_nulls and sample.nunique() <= 2 and _looks_boolean(sample):
+        if _confirm_boolean(series, profile):
+            return "bool"
+        return "object"
+
+    # Check for integer and floating point columns
+    if _looks_numeric(sample):
+        return _confirm_numeric(series, has_nulls) or "object"
+
+    # Check for datetime columns
+    is_datetime, fmt = detect_datetime_format(sample)
+    if is_datetime and _confirm_datetime(series, fmt, dataset_key):
+        return "datetime64[ns]"
+
+    # Default to object column
+    return "object"
@@ -0,0 +1,228 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache import sizeof
+
+# Bytes of deltas kept in memory per server process; colder deltas are written to disk
+DELTA_BYTES = 512 * 1024 * 1024
+
+# Compression of deltas written to disk: fast, since they are read back on undo
+SPILL_COMPRESSION = {"method": "gzip", "compresslevel": 1}
+
+
+class Delta:
+    """
+    How a dataset version differs from its parent:
+        - rows: the parent rows it keeps, as a bitmap (np.packbits) when they stay in order or as
+          positions otherwise; None if it keeps every row
+        - columns: the column order of the version
+        - replaced: dictionary of column -> Series for the columns that changed (casts, replaced
+          text, filled values) or were added; the others are the parent's columns
+        - frame: the whole version, when it cannot be described against its parent
+    """
+
+    def __init__(self, rows=None, ordered=True, n_parent=0, columns=None, replaced=None, frame=None):
+        self.rows = rows
+        self.ordered = ordered
+        self.n_parent = n_parent
+        self.columns = columns
+        self.replaced = replaced or {}
+        self.frame = frame
+
+    def __sizeof__(self):
+        # Used to keep the deltas held in memory under DELTA_BYTES
+        if self.frame is not None:
+            return sizeof(self.frame)
+        rows = 0 if self.rows is None else self.rows.nbytes
+        return rows + sum(sizeof(series) for series in self.replaced.values())
+
+    def positions(self):
+        if self.rows is None:
+            return None
+        if self.ordered:
+            return np.flatnonzero(np.unpackbits(self.rows, count=self.n_parent))
+        return self.rows
+
+
+def _same_column(parent, child):
+    return parent.dtype == child.dtype and parent.equals(child)
+
+
+def make_delta(parent, child):
+    """
+    Describes child, the result of a cleaning step on parent, as a Delta. Row filters (duplicate
+    removal, date filters) are found from the index: child rows are parent rows. Then each column
+    is compared with the parent's (on the kept rows), so only the changed columns are stored.
+    Parameters:
+        - parent: pandas DataFrame before the step
+        - child: pandas DataFrame after the step
+    Returns:
+        - delta: Delta
+    """
+    if not (parent.index.is_unique and child.columns.is_unique and parent.columns.is_unique):
+        return Delta(frame=child)
+    rows = None
+    ordered = True
+    positions = None
+    if not child.index.equals(parent.index):
+        positions = parent.index.get_indexer(child.index)
+        if (positions < 0).any():
+            # Rows were relabelled or created: not a selection of the parent's rows
+            return Delta(frame=child)
+        ordered = bool((np.diff(positions) > 0).all())
+        if ordered:
+            mask = np.zeros(len(parent), dtype=bool)
+            mask[positions] = True
+            rows = np.packbits(mask)
+        else:
+            rows = positions
+
+    replaced = {}
+    for col in child.columns:
+        if col not in parent.columns:
+            replaced[col] = child[col]
+            continue
+        # Taken one column at a time, so the filtered parent is never materialized whole
+        before = parent[col] if positions is None else parent[col].take(positions)
+        if not _same_column(before, child[col]):
+            replaced[col] = child[col]
+    return Delta(rows, ordered, len(parent), list(child.columns), replaced)
+
+
+def apply_delta(parent, delta):
+    """
+    Rebuilds a version from its parent. The columns that did not change are not copied unless
+    the rows are filtered.
+    """
+    if delta.frame is not None:
+        return delta.frame
+    positions = delta.positions()
+    base = parent if positions is None else parent.take(positions)
+    if not delta.replaced:
+        return base[delta.columns] if list(base.columns) != delta.columns else base
+    columns = [delta.replaced[col] if col in delta.replaced else base[col] for col in delta.columns]
+    df = pd.concat(columns, axis=1, copy=False)
+    df.columns = pd.Index(delta.columns)
+    return df
+
+
+class VersionStore:
+    """
+    Dataset versions recorded as deltas against their parent version (make_delta), so a cleaning
+    step costs the rows and columns it changed instead of a copy of the frame. Deltas are kept in
+    memory in least-recently-used order up to max_bytes; colder ones are written to compressed
+    files and read back when a version is rebuilt. Versions are identified by cache.version_key,
+    so sessions working on the same upload share them.
+    """
+
+    def __init__(self, max_bytes=DELTA_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.nbytes = 0
+        # version -> (parent version, Delta, bytes)
+        self.entries = OrderedDict()
+        # version -> (parent version, path)
+        self.spilled = {}
+        self.tmp_dir = None
+        self.lock = threading.RLock()
+
+    def __contains__(self, version):
+        return version in self.entries or version in self.spilled
+
+    def add(self, version, parent_version, parent, child):
+        """
+        Records child, computed from parent, as a new version. Returns its Delta.
+        """
+        if version in self:
+            return self.delta(version)
+        delta = make_delta(parent, child)
+        self._keep(version, parent_version, delta)
+        return delta
+
+    def _keep(self, version, parent_version, delta):
+        nbytes = delta.__sizeof__()
+        with self.lock:
+            self.entries[version] = (parent_version, delta, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                cold, (cold_parent, cold_delta, cold_bytes) = self.entries.popitem(last=False)
+                self.nbytes -= cold_bytes
+                self._spill(cold, cold_parent, cold_delta)
+
+    def _spill(self, version, parent_version, delta):
+        if self.tmp_dir is None:
+            self.tmp_dir = tempfile.mkdtemp(prefix="versions-", dir=self.spill_dir)
+        path = os.path.join(self.tmp_dir, f"{version}.pkl.gz")
+        pd.to_pickle(delta, path, compression=SPILL_COMPRESSION)
+        self.spilled[version] = (parent_version, path)
+
+    def parent(self, version):
+        with self.lock:
+            if version in self.entries:
+                return self.entries[version][0]
+            return self.spilled[version][0]
+
+    def delta(self, version):
+        """
+        Returns the delta of a version, reading it back from disk if it was spilled.
+        """
+        with self.lock:
+            if version in self.entries:
+                self.entries.move_to_end(version)
+                return self.entries[version][1]
+            parent_version, path = self.spilled.pop(version)
+            delta = pd.read_pickle(path, compression=SPILL_COMPRESSION)
+            os.remove(path)
+            self._keep(version, parent_version, delta)
+            return delta
+
+    def rebuild(self, version, parent):
+        """
+        Rebuilds a version from its parent's frame.
+        """
+        return apply_delta(parent, self.delta(version))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.spilled.clear()
+            self.nbytes = 0
+            if self.tmp_dir is not None:
+                shutil.rmtree(self.tmp_dir, ignore_errors=True)
+                self.tmp_dir = None
+
+
+def undo(history, redo_steps):
+    """
+    Moves the last step of history to the redo stack. Returns (history, redo_steps).
+    """
+    if not history:
+        return history, redo_steps
+    return history[:-1], redo_steps + [history[-1]]
+
+
+def redo(history, redo_steps):
+    """
+    Moves the last undone step back to history. Returns (history, redo_steps).
+    """
+    if not redo_steps:
+        return history, redo_steps
+    return history + [redo_steps[-1]], redo_steps[:-1]
+
+
+def go_to(history, redo_steps, n_steps):
+    """
+    Goes back to the version after the first n_steps steps; the later steps can be redone.
+    Returns (history, redo_steps).
+    """
+    return history[:n_steps], redo_steps + history[n_steps:][::-1]
+
+
+# Shared by all sessions of the server process
+versions = VersionStore()
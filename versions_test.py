@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from versions import VersionStore, apply_delta, go_to, make_delta, redo, undo
+
+
+class DeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.parent = pd.DataFrame({"a": range(6), "b": list("xyzxyz"), "c": np.arange(6) / 2})
+
+    def assert_rebuilt(self, child):
+        pd.testing.assert_frame_equal(apply_delta(self.parent, make_delta(self.parent, child)), child)
+
+    def test_row_filter_keeps_only_a_bitmap(self):
+        child = self.parent[self.parent["a"] % 2 == 0]
+        delta = make_delta(self.parent, child)
+        self.assertTrue(delta.ordered)
+        self.assertEqual(delta.replaced, {})
+        self.assertEqual(delta.positions().tolist(), [0, 2, 4])
+        self.assert_rebuilt(child)
+
+    def test_only_changed_columns_are_stored(self):
+        child = self.parent.copy()
+        child["b"] = child["b"].str.upper()
+        child["d"] = 1
+        delta = make_delta(self.parent, child)
+        self.assertEqual(sorted(delta.replaced), ["b", "d"])
+        self.assert_rebuilt(child)
+        self.assert_rebuilt(self.parent[["c", "a"]])
+        self.assert_rebuilt(self.parent.astype({"a": "int8"}))
+
+    def test_reordered_and_relabelled_rows(self):
+        child = self.parent.sort_values("b")
+        self.assertFalse(make_delta(self.parent, child).ordered)
+        self.assert_rebuilt(child)
+        child = self.parent.reset_index(drop=True).set_axis(range(10, 16))
+        self.assertIs(make_delta(self.parent, child).frame, child)
+
+
+class VersionStoreTest(unittest.TestCase):
+    def test_cold_deltas_are_spilled_and_read_back(self):
+        parent = pd.DataFrame({"a": np.arange(1000)})
+        with tempfile.TemporaryDirectory() as root:
+            store = VersionStore(max_bytes=10000, spill_dir=root)
+            first = parent.assign(a=parent["a"] * 2)
+            second = parent.assign(a=parent["a"] * 3)
+            store.add("v1", "v0", parent, first)
+            store.add("v2", "v0", parent, second)
+            self.assertIn("v1", store.spilled)
+            self.assertEqual(store.parent("v1"), "v0")
+            pd.testing.assert_frame_equal(store.rebuild("v1", parent), first)
+            self.assertIn("v1", store.entries)
+            self.assertIn("v2", store.spilled)
+            store.clear()
+            self.assertNotIn("v2", store)
+
+    def test_undo_redo_go_to(self):
+        history, redo_steps = undo(["s1", "s2", "s3"], [])
+        self.assertEqual((history, redo_steps), (["s1", "s2"], ["s3"]))
+        history, redo_steps = go_to(history, redo_steps, 0)
+        self.assertEqual((history, redo_steps), ([], ["s3", "s2", "s1"]))
+        history, redo_steps = redo(*redo(history, redo_steps))
+        self.assertEqual((history, redo_steps), (["s1", "s2"], ["s3"]))
+        self.assertEqual(undo([], ["s1"]), ([], ["s1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()